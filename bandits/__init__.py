@@ -1,5 +1,11 @@
-from .agent import Agent, GradientAgent, BetaAgent
-from .bandit import GaussianBandit, BinomialBandit, BernoulliBandit
+from .agent import (Agent, GradientAgent, BetaAgent, LinearAgent,
+                    SlidingWindowAgent, DiscountedAgent, DiscountedBetaAgent,
+                    SparseAgent, ConjugateAgent, NormalAgent, PoissonAgent)
+from .bandit import (GaussianBandit, DriftingGaussianBandit, BinomialBandit,
+                     BernoulliBandit, PoissonBandit, LinearBandit)
 from .environment import Environment
+from .hooks import Hook, ProgressHook, SampledLogHook
 from .policy import (EpsilonGreedyPolicy, GreedyPolicy, RandomPolicy, UCBPolicy,
-                     SoftmaxPolicy)
+                     IncrementalUCBPolicy, SoftmaxPolicy, LinUCBPolicy,
+                     LinearThompsonPolicy)
+from .pool import AgentPool, BetaAgentPool
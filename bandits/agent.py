@@ -1,15 +1,37 @@
 import numpy as np
-import pymc3 as pm
 
+from bandits.nonstationary import DiscountedStats, WindowStats
+from bandits.pool import aggregate
+from bandits.posterior import (beta_posterior, GammaPosterior,
+                               NormalGammaPosterior, NormalPosterior)
+from bandits.preference import PreferenceState
+from bandits.rng import as_rng
+from bandits.snapshot import Snapshotable
 
-class Agent(object):
+
+def _check_arms(agent, arrays, name='action_attempts'):
+    k = arrays[name].shape[-1]
+    if k != agent.k:
+        raise ValueError('snapshot has {} arms, agent has {}'.format(
+            k, agent.k))
+
+
+class Agent(Snapshotable):
     """
     An Agent is able to take one of a set of actions at each time step. The
     action is chosen using a strategy based on the history of prior actions
-    and outcome observations.
+    and outcome observations. Agents that draw random numbers take them from
+    `rng`, a NumPy `Generator` or seed, or NumPy's global state when None.
     """
-    def __init__(self, bandit, policy, prior=0, gamma=None):
+    # whether `choose` takes the features of the trial, see LinearAgent
+    contextual = False
+    # whether an observation changes only the played arm's estimate and
+    # count, which `IncrementalUCBPolicy` relies on
+    local_updates = True
+
+    def __init__(self, bandit, policy, prior=0, gamma=None, rng=None):
         self.policy = policy
+        self.rng = as_rng(rng)
         self.k = bandit.k
         self.prior = prior
         self.gamma = gamma
@@ -35,6 +57,12 @@ class Agent(object):
         self.last_action = action
         return action
 
+    def choose_slate(self, m):
+        """
+        Picks `m` distinct actions to play at once, most preferred first.
+        """
+        return self.policy.choose_slate(self, m)
+
     def observe(self, reward):
         self.action_attempts[self.last_action] += 1
 
@@ -47,6 +75,55 @@ class Agent(object):
         self._value_estimates[self.last_action] += g*(reward - q)
         self.t += 1
 
+    def observe_batch(self, actions, rewards):
+        """
+        Records many (action, reward) events at once, such as delayed feedback
+        from a log, aggregating them per arm in one vectorized pass.
+
+        With sample averages this equals observing the events one by one. With
+        a constant step size `gamma`, an arm's n events in the batch are
+        applied as n rewards equal to their mean: the estimate keeps weight
+        (1-gamma)^n. This is the expected result of sequential updates over
+        the order of the events, which a delayed batch does not record.
+        """
+        index, counts, sums = aggregate(np.asarray(actions),
+                                        np.asarray(rewards, dtype=float),
+                                        self.k)
+        self.action_attempts[index] += counts
+        q = self._value_estimates[index]
+        if self.gamma is None:
+            q += (sums - counts*q) / self.action_attempts[index]
+        else:
+            decay = (1 - self.gamma)**counts
+            q = decay*q + (1 - decay)*sums/counts
+        self._value_estimates[index] = q
+        self.t += len(actions)
+        # not a single pull of the last chosen arm
+        self.last_action = None
+
+    def observe_slate(self, actions, rewards):
+        """
+        Records the rewards of a slate of distinct actions played together,
+        one reward per action. Each arm appears once, so this is the batch
+        update, and exact whatever the step size.
+        """
+        self.observe_batch(actions, rewards)
+
+    def get_state(self):
+        attrs = {'prior': self.prior, 'gamma': self.gamma, 't': self.t}
+        arrays = {'value_estimates': self._value_estimates,
+                  'action_attempts': self.action_attempts}
+        return attrs, arrays
+
+    def set_state(self, attrs, arrays):
+        _check_arms(self, arrays)
+        self.prior = attrs['prior']
+        self.gamma = attrs['gamma']
+        self.t = attrs['t']
+        self._value_estimates = arrays['value_estimates']
+        self.action_attempts = arrays['action_attempts']
+        self.last_action = None
+
     @property
     def value_estimates(self):
         return self._value_estimates
@@ -58,33 +135,64 @@ class GradientAgent(Agent):
     determining estimates of reward values. It effectively learns a preference
     for one action over another.
     """
-    def __init__(self, bandit, policy, prior=0, alpha=0.1, baseline=True):
-        super(GradientAgent, self).__init__(bandit, policy, prior)
+    # each update moves the preferences of every arm
+    local_updates = False
+
+    def __init__(self, bandit, policy, prior=0, alpha=0.1, baseline=True,
+                 rng=None):
+        super(GradientAgent, self).__init__(bandit, policy, prior, rng=rng)
         self.alpha = alpha
         self.baseline = baseline
-        self.average_reward = 0
+        self.preferences = PreferenceState(self._value_estimates)
 
     def __str__(self):
         return 'g/\u03B1={}, bl={}'.format(self.alpha, self.baseline)
 
     def observe(self, reward):
         self.action_attempts[self.last_action] += 1
-
-        if self.baseline:
-            diff = reward - self.average_reward
-            self.average_reward += 1/np.sum(self.action_attempts) * diff
-
-        pi = np.exp(self.value_estimates) / np.sum(np.exp(self.value_estimates))
-
-        ht = self.value_estimates[self.last_action]
-        ht += self.alpha*(reward - self.average_reward)*(1-pi[self.last_action])
-        self._value_estimates -= self.alpha*(reward - self.average_reward)*pi
-        self._value_estimates[self.last_action] = ht
+        self.preferences.update(self.last_action, reward, self.alpha,
+                                self.baseline)
         self.t += 1
 
+    def observe_batch(self, actions, rewards):
+        """
+        Records many (action, reward) events as a single gradient step: the
+        baseline first absorbs all the rewards, then the preferences move by
+        the summed gradient of the events under the current softmax policy.
+        This is the update for a batch of decisions all drawn from one policy,
+        and equals `observe` for a batch of one.
+        """
+        index, counts, sums = aggregate(np.asarray(actions),
+                                        np.asarray(rewards, dtype=float),
+                                        self.k)
+        self.action_attempts[index] += counts
+        self.preferences.update_batch(index, counts, sums, self.alpha,
+                                      self.baseline)
+        self.t += len(actions)
+        self.last_action = None
+
     def reset(self):
         super(GradientAgent, self).reset()
-        self.average_reward = 0
+        self.preferences.reset()
+
+    def get_state(self):
+        attrs, arrays = super(GradientAgent, self).get_state()
+        attrs.update(alpha=self.alpha, baseline=self.baseline,
+                     steps=self.preferences.n,
+                     average_reward=self.preferences.baseline)
+        return attrs, arrays
+
+    def set_state(self, attrs, arrays):
+        super(GradientAgent, self).set_state(attrs, arrays)
+        self.alpha = attrs['alpha']
+        self.baseline = attrs['baseline']
+        self.preferences = PreferenceState(self._value_estimates)
+        self.preferences.n = attrs['steps']
+        self.preferences.baseline = attrs['average_reward']
+
+    @property
+    def average_reward(self):
+        return self.preferences.baseline
 
 
 class BetaAgent(Agent):
@@ -92,16 +200,16 @@ class BetaAgent(Agent):
     The Beta Agent is a Bayesian approach to a bandit problem with a Bernoulli
      or Binomial likelihood, as these distributions have a Beta distribution as
      a conjugate prior.
+
+    The posterior is sampled with NumPy by default; pass `backend='pymc3'` to
+    draw the samples through PyMC3 instead.
     """
-    def __init__(self, bandit, policy, ts=True):
-        super(BetaAgent, self).__init__(bandit, policy)
+    def __init__(self, bandit, policy, ts=True, backend='numpy', rng=None):
+        super(BetaAgent, self).__init__(bandit, policy, rng=rng)
         self.n = bandit.n
         self.ts = ts
-        self.model = pm.Model()
-        with self.model:
-            self._prior = pm.Beta('prior', alpha=np.ones(self.k),
-                                  beta=np.ones(self.k), shape=(1, self.k),
-                                  transform=None)
+        self.backend = backend
+        self.posterior = beta_posterior(self.k, backend)
         self._value_estimates = np.zeros(self.k)
 
     def __str__(self):
@@ -112,25 +220,741 @@ class BetaAgent(Agent):
 
     def reset(self):
         super(BetaAgent, self).reset()
-        self._prior.distribution.alpha = np.ones(self.k)
-        self._prior.distribution.beta = np.ones(self.k)
+        self.posterior.reset()
+
+    def get_state(self):
+        attrs, arrays = super(BetaAgent, self).get_state()
+        attrs.update(n=self.n, ts=self.ts)
+        arrays.update(alpha=self.posterior.alpha, beta=self.posterior.beta)
+        return attrs, arrays
+
+    def set_state(self, attrs, arrays):
+        super(BetaAgent, self).set_state(attrs, arrays)
+        self.n = attrs['n']
+        self.ts = attrs['ts']
+        self.posterior.alpha = arrays['alpha']
+        self.posterior.beta = arrays['beta']
 
     def observe(self, reward):
         self.action_attempts[self.last_action] += 1
 
-        self.alpha[self.last_action] += reward
-        self.beta[self.last_action] += self.n - reward
+        self.posterior.update(self.last_action, reward, self.n - reward)
 
         if self.ts:
-            self._value_estimates = self._prior.random()
+            self._value_estimates = self.posterior.sample(self.rng)
         else:
-            self._value_estimates = self.alpha / (self.alpha + self.beta)
+            self._value_estimates = self.posterior.mean()
         self.t += 1
 
+    def observe_batch(self, actions, rewards):
+        """
+        Records many (action, reward) events at once. Conjugate updates
+        commute, so the posterior equals that of observing the events one by
+        one; with Thompson sampling a single draw is made after the batch.
+        """
+        index, counts, sums = aggregate(np.asarray(actions),
+                                        np.asarray(rewards, dtype=float),
+                                        self.k)
+        self.action_attempts[index] += counts
+        self.posterior.update(index, sums, self.n*counts - sums)
+
+        if self.ts:
+            self._value_estimates = self.posterior.sample(self.rng)
+        else:
+            self._value_estimates = self.posterior.mean()
+        self.t += len(actions)
+        self.last_action = None
+
+    @property
+    def local_updates(self):
+        # a Thompson draw redraws every arm's estimate
+        return not self.ts
+
     @property
     def alpha(self):
-        return self._prior.distribution.alpha
+        return self.posterior.alpha
 
     @property
     def beta(self):
-        return self._prior.distribution.beta
+        return self.posterior.beta
+
+
+class ConjugateAgent(Agent):
+    """
+    A Bayesian agent with a conjugate posterior over each arm's mean reward,
+    kept as per-arm parameter arrays, so an observation is an O(1) update.
+    With `ts=True` (Thompson sampling) the value estimates are drawn from the
+    posterior when choosing, once per decision however many observations
+    came in between, otherwise the posterior means are used; pair it with
+    `GreedyPolicy` for plain Thompson sampling. Subclasses supply the
+    posterior through `make_posterior`.
+    """
+    label = 'c'
+
+    def __init__(self, bandit, policy, ts=True, rng=None):
+        super(ConjugateAgent, self).__init__(bandit, policy, rng=rng)
+        self.ts = ts
+        self.posterior = self.make_posterior(self.k)
+
+    def __str__(self):
+        if self.ts:
+            return '{}/TS'.format(self.label)
+        return '{}/{}'.format(self.label, str(self.policy))
+
+    def make_posterior(self, shape):
+        """
+        A prior over arrays of arms of the given shape.
+        """
+        raise NotImplementedError
+
+    def reset(self):
+        super(ConjugateAgent, self).reset()
+        self.posterior.reset()
+
+    def _estimate(self):
+        if self.ts:
+            self._value_estimates = self.posterior.sample(self.rng)
+        else:
+            self._value_estimates = self.posterior.mean()
+
+    def choose(self):
+        self._estimate()
+        return super(ConjugateAgent, self).choose()
+
+    def choose_slate(self, m):
+        self._estimate()
+        return super(ConjugateAgent, self).choose_slate(m)
+
+    def observe(self, reward):
+        self.action_attempts[self.last_action] += 1
+        self.posterior.update(self.last_action, 1, reward, reward*reward)
+        self.t += 1
+
+    def observe_batch(self, actions, rewards):
+        """
+        Records many (action, reward) events at once. Conjugate updates
+        commute, so the posterior equals that of observing the events one by
+        one.
+        """
+        actions = np.asarray(actions)
+        rewards = np.asarray(rewards, dtype=float)
+        index, counts, sums = aggregate(actions, rewards, self.k)
+        _, _, squares = aggregate(actions, rewards*rewards, self.k)
+        self.action_attempts[index] += counts
+        self.posterior.update(index, counts, sums, squares)
+        self.t += len(actions)
+        self.last_action = None
+
+    @property
+    def local_updates(self):
+        # a Thompson draw redraws every arm's estimate
+        return not self.ts
+
+    def get_state(self):
+        attrs, arrays = super(ConjugateAgent, self).get_state()
+        attrs.update(ts=self.ts)
+        arrays.update(('posterior_' + name, getattr(self.posterior, name))
+                      for name in self.posterior.PARAMS)
+        return attrs, arrays
+
+    def set_state(self, attrs, arrays):
+        super(ConjugateAgent, self).set_state(attrs, arrays)
+        self.ts = attrs['ts']
+        for name in self.posterior.PARAMS:
+            setattr(self.posterior, name, arrays['posterior_' + name])
+
+
+class NormalAgent(ConjugateAgent):
+    """
+    Thompson sampling for Gaussian rewards. With a known `variance` each
+    arm's mean has a Normal posterior, its N(mu, variance/kappa) prior worth
+    `kappa` rewards. With `variance=None` the variance is learned as well,
+    through a Normal-Gamma posterior whose precision has a Gamma(alpha, beta)
+    prior.
+    """
+    label = 'n'
+
+    def __init__(self, bandit, policy, mu=0, kappa=1, variance=None, alpha=1,
+                 beta=1, ts=True, rng=None):
+        self.mu = mu
+        self.kappa = kappa
+        self.variance = variance
+        self.alpha = alpha
+        self.beta = beta
+        super(NormalAgent, self).__init__(bandit, policy, ts, rng)
+
+    def make_posterior(self, shape):
+        if self.variance is None:
+            return NormalGammaPosterior(shape, self.mu, self.kappa,
+                                        self.alpha, self.beta)
+        return NormalPosterior(shape, self.mu, self.kappa, self.variance)
+
+
+class PoissonAgent(ConjugateAgent):
+    """
+    Thompson sampling for Poisson (count) rewards: each arm's rate has a
+    Gamma posterior, starting from a Gamma(alpha, beta) prior.
+    """
+    label = 'p'
+
+    def __init__(self, bandit, policy, alpha=1, beta=1, ts=True, rng=None):
+        self.alpha = alpha
+        self.beta = beta
+        super(PoissonAgent, self).__init__(bandit, policy, ts, rng)
+
+    def make_posterior(self, shape):
+        return GammaPosterior(shape, self.alpha, self.beta)
+
+
+def _sherman_morrison(a_inv, x):
+    """
+    Updates the inverse of A in place to that of A + x x^T, in O(d^2).
+    """
+    u = a_inv @ x
+    a_inv -= np.outer(u, u) / (1 + x @ u)
+
+
+def _per_arm(matrices, vectors):
+    """
+    Multiplies each arm's matrix, (k, p, q), into that arm's vectors for a
+    batch of contexts, (n, k, q), giving (n, k, p) as one stacked matmul.
+    """
+    if len(vectors) == 1:
+        return (matrices @ vectors[0][..., np.newaxis])[np.newaxis, ..., 0]
+    product = matrices @ vectors.transpose(1, 2, 0)
+    return product.transpose(2, 0, 1)
+
+
+class LinearAgent(Agent):
+    """
+    The Linear Agent models each arm's reward as linear in a context vector,
+    with ridge regression estimates (Li et al.'s LinUCB). `choose(context)`
+    takes the (k, d) features of each arm, or one (d,) vector shown to all
+    arms, and `observe(reward)` updates the chosen arm.
+
+    The first `shared_dims` features have coefficients shared by all arms,
+    the rest have per-arm coefficients: 0 gives disjoint models, d a single
+    shared model, anything in between the hybrid model. Each arm keeps the
+    inverse of its design matrix, updated by Sherman-Morrison in O(d^2) per
+    step; only the hybrid model's small shared block is re-inverted.
+
+    The policy turns the predicted means and variances into scores, see
+    `LinUCBPolicy` and `LinearThompsonPolicy`.
+    """
+    contextual = True
+
+    def __init__(self, bandit, policy, d=None, shared_dims=0, lam=1.0,
+                 rng=None):
+        super(LinearAgent, self).__init__(bandit, policy, rng=rng)
+        self.d = bandit.d if d is None else d
+        self.shared_dims = shared_dims
+        self.lam = lam
+        self.context = None
+        self.reset()
+
+    def __str__(self):
+        return 'lin/{}'.format(str(self.policy))
+
+    def reset(self):
+        super(LinearAgent, self).reset()
+        s, d = self.shared_dims, self.d - self.shared_dims
+        # shared block
+        self.a0 = self.lam*np.eye(s)
+        self.a0_inv = np.eye(s) / self.lam
+        self.b0 = np.zeros(s)
+        # per arm blocks
+        self.a_inv = np.tile(np.eye(d) / self.lam, (self.k, 1, 1))
+        self.b = np.zeros((self.k, d))
+        self.cross = np.zeros((self.k, d, s))
+        self.context = None
+        self._coefficients = None
+
+    def _features(self, contexts, per_arm_ndim):
+        # splits contexts into shared and per-arm features, showing a context
+        # without an arm axis to every arm
+        contexts = np.asarray(contexts, dtype=float)
+        if contexts.ndim < per_arm_ndim:
+            contexts = np.broadcast_to(contexts[..., np.newaxis, :],
+                                       contexts.shape[:-1] + (self.k, self.d))
+        s = self.shared_dims
+        return contexts[..., :s], contexts[..., s:]
+
+    def coefficients(self):
+        """
+        Returns the ridge estimates (beta, theta) of the shared and per-arm
+        coefficients.
+        """
+        if self._coefficients is None:
+            beta = self.a0_inv @ self.b0
+            theta = self.a_inv @ (self.b - self.cross @ beta)[..., np.newaxis]
+            self._coefficients = beta, theta[..., 0]
+        return self._coefficients
+
+    def predict(self, contexts):
+        """
+        Predicted mean and variance factor of every arm's reward for each of
+        a batch of contexts of shape (n, k, d) or (n, d), as (n, k) arrays.
+        """
+        z, x = self._features(contexts, 3)
+        beta, theta = self.coefficients()
+        mean = z @ beta + np.sum(x*theta, axis=-1)
+        u = _per_arm(self.a_inv, x)
+        w = z - _per_arm(np.swapaxes(self.cross, 1, 2), u)
+        variance = (np.sum((w @ self.a0_inv)*w, axis=-1) +
+                    np.sum(x*u, axis=-1))
+        return mean, np.maximum(variance, 0)
+
+    def choose(self, context):
+        self.context = context
+        action = self.policy.choose(self)
+        self.last_action = action
+        return action
+
+    def choose_batch(self, contexts):
+        """
+        Picks an action for each of a batch of contexts, without changing the
+        agent's memory.
+        """
+        return self.policy.choose_batch(self, contexts)
+
+    def observe(self, reward):
+        a = self.last_action
+        z, x = self._features(self.context, 2)
+        z, x = z[a], x[a]
+        self.action_attempts[a] += 1
+        if self.shared_dims == 0:
+            _sherman_morrison(self.a_inv[a], x)
+            self.b[a] += reward*x
+            # only the chosen arm's coefficients change
+            if self._coefficients is not None:
+                self._coefficients[1][a] = self.a_inv[a] @ self.b[a]
+        elif self.shared_dims == self.d:
+            _sherman_morrison(self.a0_inv, z)
+            self.b0 += reward*z
+        else:
+            # Li et al. (2010), algorithm 2
+            a_inv, cross = self.a_inv[a], self.cross[a]
+            self.a0 += cross.T @ a_inv @ cross
+            self.b0 += cross.T @ a_inv @ self.b[a]
+            _sherman_morrison(a_inv, x)
+            cross += np.outer(x, z)
+            self.b[a] += reward*x
+            self.a0 += np.outer(z, z) - cross.T @ a_inv @ cross
+            self.b0 += reward*z - cross.T @ a_inv @ self.b[a]
+            self.a0_inv = np.linalg.inv(self.a0)
+        if self.shared_dims > 0:
+            self._coefficients = None
+        self.t += 1
+
+    def observe_batch(self, actions, rewards, contexts):
+        """
+        Records logged (action, reward) events with the contexts they were
+        chosen in, one rank-one update at a time.
+        """
+        for action, reward, context in zip(actions, rewards, contexts):
+            self.context = context
+            self.last_action = action
+            self.observe(reward)
+
+    def get_state(self):
+        attrs = {'t': self.t, 'lam': self.lam,
+                 'shared_dims': self.shared_dims}
+        arrays = {'action_attempts': self.action_attempts, 'a0': self.a0,
+                  'a0_inv': self.a0_inv, 'b0': self.b0, 'a_inv': self.a_inv,
+                  'b': self.b, 'cross': self.cross}
+        return attrs, arrays
+
+    def set_state(self, attrs, arrays):
+        _check_arms(self, arrays)
+        self.t = attrs['t']
+        self.lam = attrs['lam']
+        self.shared_dims = attrs['shared_dims']
+        for name in ('action_attempts', 'a0', 'a0_inv', 'b0', 'a_inv', 'b',
+                     'cross'):
+            setattr(self, name, arrays[name])
+        self.last_action = None
+        self.context = None
+        self._coefficients = None
+
+    @property
+    def value_estimates(self):
+        if self.context is None:
+            return self._value_estimates
+        mean, _ = self.predict(np.asarray(self.context)[np.newaxis])
+        return mean[0]
+
+
+class SlidingWindowAgent(Agent):
+    """
+    The Sliding Window Agent estimates each arm's value from the rewards of
+    the last `window` steps only, forgetting older ones so that it can track
+    arms whose values change. The window is a fixed ring buffer, so each
+    update is O(1) and memory does not grow with the run.
+
+    `action_attempts` counts pulls within the window and `t` the
+    observations in it, min(steps, window), so `UCBPolicy` becomes
+    sliding-window UCB (Garivier & Moulines, 2011).
+    """
+    # an observation can evict another arm's reward from the window
+    local_updates = False
+
+    def __init__(self, bandit, policy, window=1000, prior=0, rng=None):
+        super(SlidingWindowAgent, self).__init__(bandit, policy, prior,
+                                                 rng=rng)
+        self.window = window
+        self.stats = WindowStats(self.k, window)
+        self.action_attempts = self.stats.counts
+
+    def __str__(self):
+        return 'sw={}/{}'.format(self.window, str(self.policy))
+
+    def reset(self):
+        super(SlidingWindowAgent, self).reset()
+        self.stats.reset()
+
+    def _update(self, action):
+        counts = self.stats.counts[action]
+        self._value_estimates[action] = (self.stats.sums[action] / counts
+                                         if counts else self.prior)
+
+    def observe(self, reward):
+        old = self.stats.add(self.last_action, reward)
+        self._update(self.last_action)
+        if old is not None:
+            self._update(old)
+        self.t = self.stats.n
+
+    def observe_batch(self, actions, rewards):
+        """
+        Records many (action, reward) events in order. Which rewards stay in
+        the window depends on that order, so they are added one at a time.
+        """
+        for action, reward in zip(np.asarray(actions).tolist(),
+                                  np.asarray(rewards, dtype=float).tolist()):
+            self.last_action = action
+            self.observe(reward)
+
+    def get_state(self):
+        stats = self.stats
+        attrs = {'prior': self.prior, 'window': self.window, 'n': stats.n,
+                 'pos': stats._pos}
+        arrays = {'value_estimates': self._value_estimates,
+                  'action_attempts': stats.counts, 'sums': stats.sums,
+                  'actions': stats.actions, 'rewards': stats.rewards}
+        return attrs, arrays
+
+    def set_state(self, attrs, arrays):
+        _check_arms(self, arrays)
+        self.prior = attrs['prior']
+        self.window = attrs['window']
+        self.stats = WindowStats(self.k, self.window)
+        self.stats.n = self.t = attrs['n']
+        self.stats._pos = attrs['pos']
+        for name in ('sums', 'actions', 'rewards'):
+            setattr(self.stats, name, arrays[name])
+        self.stats.counts = self.action_attempts = arrays['action_attempts']
+        self._value_estimates = arrays['value_estimates']
+        self.last_action = None
+
+
+class DiscountedAgent(Agent):
+    """
+    The Discounted Agent weights each past reward by `discount` per step
+    since it was observed, so that its estimates follow arms whose values
+    change. Only the chosen arm's estimate moves at each step and the decay
+    of every other arm is applied lazily, so an update is O(1) amortized.
+
+    `action_attempts` holds the discounted pull counts and `t` their total,
+    so `UCBPolicy` becomes discounted UCB (Kocsis & Szepesvari, 2006).
+    """
+    # every step decays the counts of all arms
+    local_updates = False
+
+    def __init__(self, bandit, policy, discount=0.99, prior=0, rng=None):
+        super(DiscountedAgent, self).__init__(bandit, policy, prior, rng=rng)
+        self.discount = discount
+        self.stats = DiscountedStats(self.k, discount, series=2)
+
+    def __str__(self):
+        return '\u03B3={}/{}'.format(self.discount, str(self.policy))
+
+    def reset(self):
+        super(DiscountedAgent, self).reset()
+        self.stats.reset()
+
+    def observe(self, reward):
+        a = self.last_action
+        self.stats.add(a, (reward, 1))
+        self._value_estimates[a] = self.stats.ratio(a)
+        self.t = self.discount*self.t + 1
+
+    def observe_batch(self, actions, rewards):
+        """
+        Records many (action, reward) events in order, each one step later
+        than the last.
+        """
+        for action, reward in zip(np.asarray(actions).tolist(),
+                                  np.asarray(rewards, dtype=float).tolist()):
+            self.last_action = action
+            self.observe(reward)
+
+    def get_state(self):
+        attrs = {'prior': self.prior, 'discount': self.discount, 't': self.t,
+                 'scale': self.stats._scale}
+        arrays = {'value_estimates': self._value_estimates,
+                  'scaled': self.stats._scaled}
+        return attrs, arrays
+
+    def set_state(self, attrs, arrays):
+        _check_arms(self, arrays, 'value_estimates')
+        self.prior = attrs['prior']
+        self.discount = attrs['discount']
+        self.t = attrs['t']
+        self.stats = DiscountedStats(self.k, self.discount, series=2)
+        self.stats._scale = attrs['scale']
+        self.stats._scaled = arrays['scaled']
+        self._value_estimates = arrays['value_estimates']
+        self.last_action = None
+
+    @property
+    def action_attempts(self):
+        return self.stats.sums(1)
+
+    @action_attempts.setter
+    def action_attempts(self, value):
+        # kept by the discounted statistics
+        pass
+
+
+class DiscountedBetaAgent(DiscountedAgent):
+    """
+    Discounted Thompson sampling (Raj & Kalyani, 2017) for Bernoulli or
+    Binomial rewards out of `n` trials: each arm has a Beta(1+s, 1+f)
+    posterior over discounted successes s and failures f, so evidence fades
+    and the posterior widens again for arms that are not played. With
+    `ts=True` the value estimates are drawn from the posteriors after each
+    observation, otherwise the posterior means are used; pair it with
+    `GreedyPolicy`.
+    """
+    def __init__(self, bandit, policy, discount=0.99, ts=True, rng=None):
+        super(DiscountedBetaAgent, self).__init__(bandit, policy, discount,
+                                                  rng=rng)
+        self.n = bandit.n
+        self.ts = ts
+        self._value_estimates = np.zeros(self.k)
+
+    def __str__(self):
+        if self.ts:
+            return 'b/TS \u03B3={}'.format(self.discount)
+        return 'b/\u03B3={}/{}'.format(self.discount, str(self.policy))
+
+    def observe(self, reward):
+        self.stats.add(self.last_action, (reward, self.n - reward))
+        alpha, beta = self.alpha, self.beta
+        if self.ts:
+            self._value_estimates = self.rng.beta(alpha, beta)
+        else:
+            self._value_estimates = alpha / (alpha + beta)
+        self.t = self.discount*self.t + 1
+
+    def get_state(self):
+        attrs, arrays = super(DiscountedBetaAgent, self).get_state()
+        attrs.update(n=self.n, ts=self.ts)
+        return attrs, arrays
+
+    def set_state(self, attrs, arrays):
+        super(DiscountedBetaAgent, self).set_state(attrs, arrays)
+        self.n = attrs['n']
+        self.ts = attrs['ts']
+
+    @property
+    def action_attempts(self):
+        return (self.stats.sums(0) + self.stats.sums(1)) / self.n
+
+    @action_attempts.setter
+    def action_attempts(self, value):
+        pass
+
+    @property
+    def alpha(self):
+        return 1 + self.stats.sums(0)
+
+    @property
+    def beta(self):
+        return 1 + self.stats.sums(1)
+
+
+class SparseAgent(Agent):
+    """
+    The Sparse Agent is an `Agent` for very large catalogs, where most arms
+    are never played in a run. Untried arms share the implicit `prior` and
+    take no storage: estimates and counts are kept only for arms that have
+    been played, in arrays that grow with them, so memory and the policy's
+    per-step scan scale with the number of arms played rather than with k.
+
+    Untried arms are served from a queue, a pseudo-random order over all k
+    arms drawn at reset: a keyed Feistel permutation of the queue position,
+    so arms near each other in id are not near each other in the queue. The policy sees the queue as one more arm
+    with the prior estimate and no attempts, and choosing it plays the next
+    untried arm. For UCB, whose infinite bonus tries every untried arm
+    first, and for greedy choices with an optimistic prior this is the same
+    as the dense agent; epsilon-greedy exploration and softmax weigh the
+    whole queue as a single arm. `choose` returns the arm id, in [0, k).
+    """
+    FEISTEL_ROUNDS = 4
+
+    def __init__(self, bandit, policy, prior=0, gamma=None, capacity=1024,
+                 rng=None):
+        self.policy = policy
+        self.rng = as_rng(rng)
+        self.k = bandit.k
+        self.prior = prior
+        self.gamma = gamma
+        self.capacity = capacity
+        self.reset()
+
+    def reset(self):
+        self._values = np.full(self.capacity, self.prior, dtype=float)
+        self._attempts = np.zeros(self.capacity)
+        self.arms = np.zeros(self.capacity, dtype=np.int64)
+        self.slots = {}
+        self.n = 0
+        self._open = 1
+        self._queued = 0
+        self._keys = [int(self.rng.next_integer(1 << 30))
+                      for _ in range(self.FEISTEL_ROUNDS)]
+        self.last_action = None
+        self.t = 0
+
+    @property
+    def untried(self):
+        """
+        Number of arms never played.
+        """
+        return self.k - self.n
+
+    def _grow(self, size):
+        if size <= len(self._values):
+            return
+        size = max(size, 2*len(self._values))
+        values = np.full(size, self.prior, dtype=float)
+        attempts = np.zeros(size)
+        arms = np.zeros(size, dtype=np.int64)
+        values[:self.n] = self._values[:self.n]
+        attempts[:self.n] = self._attempts[:self.n]
+        arms[:self.n] = self.arms[:self.n]
+        self._values, self._attempts, self.arms = values, attempts, arms
+
+    def _slot(self, arm):
+        # storage slot of an arm, allocated on first use
+        slot = self.slots.get(arm)
+        if slot is None:
+            slot = self.n
+            self._grow(slot + 1 + self._open)
+            self.arms[slot] = arm
+            self.slots[arm] = slot
+            self.n += 1
+        return slot
+
+    def _permute(self, i):
+        # Feistel rounds over the smallest even number of bits covering k
+        # are a bijection; cycle-walking keeps the result in [0, k)
+        half = max((self.k - 1).bit_length() + 1, 2) // 2
+        mask = (1 << half) - 1
+        x = i
+        while True:
+            left, right = x >> half, x & mask
+            for key in self._keys:
+                h = ((right ^ key)*0x9E3779B1) & 0xFFFFFFFF
+                left, right = right, left ^ ((h ^ (h >> 16)) & mask)
+            x = (left << half) | right
+            if x < self.k:
+                return x
+
+    def _next_untried(self):
+        while True:
+            arm = self._permute(self._queued)
+            self._queued += 1
+            if arm not in self.slots:
+                return arm
+
+    def _arms(self, slots):
+        # arm ids of the chosen slots, playing untried arms for the queue's
+        return [int(self.arms[slot]) if slot < self.n else
+                self._next_untried() for slot in slots]
+
+    def choose(self):
+        slot = self.policy.choose(self)
+        arm = self._arms([slot])[0]
+        self.last_action = self._slot(arm)
+        return arm
+
+    def choose_slate(self, m):
+        # open up to m queue slots so a slate can hold several untried arms
+        self._open = m
+        self._grow(self.n + m)
+        try:
+            slots = self.policy.choose_slate(self, m)
+        finally:
+            self._open = 1
+        arms = self._arms(slots)
+        for arm in arms:
+            self._slot(arm)
+        return np.array(arms)
+
+    def observe_batch(self, actions, rewards):
+        """
+        Records many (arm, reward) events, given by arm id; see
+        `Agent.observe_batch`.
+        """
+        slots = [self._slot(arm) for arm in np.asarray(actions).tolist()]
+        super(SparseAgent, self).observe_batch(np.array(slots, dtype=int),
+                                               rewards)
+
+    def get_state(self):
+        attrs = {'prior': self.prior, 'gamma': self.gamma, 't': self.t,
+                 'k': self.k, 'keys': self._keys, 'queued': self._queued}
+        arrays = {'value_estimates': self._values[:self.n],
+                  'action_attempts': self._attempts[:self.n],
+                  'arms': self.arms[:self.n]}
+        return attrs, arrays
+
+    def set_state(self, attrs, arrays):
+        if attrs['k'] != self.k:
+            raise ValueError('snapshot has {} arms, agent has {}'.format(
+                attrs['k'], self.k))
+        self.prior = attrs['prior']
+        self.gamma = attrs['gamma']
+        self.t = attrs['t']
+        self.n = len(arrays['arms'])
+        self._values = np.full(self.n + 1, self.prior, dtype=float)
+        self._attempts = np.zeros(self.n + 1)
+        self.arms = np.zeros(self.n + 1, dtype=np.int64)
+        self._values[:self.n] = arrays['value_estimates']
+        self._attempts[:self.n] = arrays['action_attempts']
+        self.arms[:self.n] = arrays['arms']
+        self.slots = dict(zip(self.arms[:self.n].tolist(), range(self.n)))
+        self._keys = attrs['keys']
+        self._queued = attrs['queued']
+        self._open = 1
+        self.last_action = None
+
+    @property
+    def _value_estimates(self):
+        return self._values[:self.n + min(self._open, self.untried)]
+
+    @_value_estimates.setter
+    def _value_estimates(self, value):
+        pass
+
+    @property
+    def action_attempts(self):
+        return self._attempts[:self.n + min(self._open, self.untried)]
+
+    @action_attempts.setter
+    def action_attempts(self, value):
+        pass
+
+    @property
+    def nbytes(self):
+        return self._values.nbytes + self._attempts.nbytes + self.arms.nbytes
@@ -1,13 +1,23 @@
 import numpy as np
-import pymc3 as pm
+
+from bandits.rng import as_rng
 
 
 class MultiArmedBandit(object):
     """
-    A Multi-armed Bandit
+    A Multi-armed Bandit. Every bandit draws its randomness from `rng`, a
+    NumPy `Generator` or seed, or NumPy's global state when it is None.
     """
-    def __init__(self, k):
+    # whether the arm values stay fixed between resets; an Environment calls
+    # `step` once per trial on bandits that are not
+    stationary = True
+    # whether the arm values depend on features drawn each trial by
+    # `context()`, which an Environment then shows to contextual agents
+    contextual = False
+
+    def __init__(self, k, rng=None):
         self.k = k
+        self.rng = as_rng(rng)
         self.action_values = np.zeros(k)
         self.optimal = 0
 
@@ -18,26 +28,101 @@ class MultiArmedBandit(object):
     def pull(self, action):
         return 0, True
 
+    def step(self):
+        """
+        Advances the bandit by one trial.
+        """
+        pass
+
+    def sample_action_values(self, experiments):
+        """
+        Draws an (experiments, k) array of arm values, one independent bandit
+        per row, for a batched run.
+        """
+        return np.zeros((experiments, self.k))
+
+    def sample_rewards(self, action_values, actions):
+        """
+        Draws one reward per row of `action_values` for the given arms.
+        """
+        return np.zeros(len(actions))
+
+    def draw_variates(self, shape):
+        """
+        Draws a block of base random variates, independent of the arm values,
+        from which `reward` derives rewards. Reward tapes store these so that
+        a tape stays valid when the bandit is reset.
+        """
+        return np.zeros(shape)
+
+    def reward(self, action, variate):
+        """
+        Maps one base variate to a reward for `action`.
+        """
+        return 0
+
 
 class GaussianBandit(MultiArmedBandit):
     """
     Gaussian bandits model the reward of a given arm as normal distribution with
     provided mean and standard deviation.
     """
-    def __init__(self, k, mu=0, sigma=1):
-        super(GaussianBandit, self).__init__(k)
+    def __init__(self, k, mu=0, sigma=1, rng=None):
+        super(GaussianBandit, self).__init__(k, rng)
         self.mu = mu
         self.sigma = sigma
         self.reset()
 
     def reset(self):
-        self.action_values = np.random.normal(self.mu, self.sigma, self.k)
+        self.action_values = self.rng.normal(self.mu, self.sigma, self.k)
         self.optimal = np.argmax(self.action_values)
 
     def pull(self, action):
-        return (np.random.normal(self.action_values[action]),
+        return (self.action_values[action] + self.rng.next_normal(),
                 action == self.optimal)
 
+    def sample_action_values(self, experiments):
+        return self.rng.normal(self.mu, self.sigma, (experiments, self.k))
+
+    def sample_rewards(self, action_values, actions):
+        noise = self.rng.standard_normal(len(actions))
+        return action_values[np.arange(len(actions)), actions] + noise
+
+    def draw_variates(self, shape):
+        return self.rng.standard_normal(shape)
+
+    def reward(self, action, variate):
+        return self.action_values[action] + variate
+
+
+class DriftingGaussianBandit(GaussianBandit):
+    """
+    A Gaussian bandit whose arm values change over time: each trial they take
+    a Gaussian random walk step of standard deviation `drift`, and every
+    `period` trials they are all redrawn (piecewise-stationary). Either can be
+    used alone. The optimal arm is tracked as the values move.
+    """
+    stationary = False
+
+    def __init__(self, k, mu=0, sigma=1, drift=0.01, period=None, rng=None):
+        self.drift = drift
+        self.period = period
+        super(DriftingGaussianBandit, self).__init__(k, mu, sigma, rng)
+
+    def reset(self):
+        super(DriftingGaussianBandit, self).reset()
+        self.t = 0
+
+    def step(self):
+        self.t += 1
+        if self.period is not None and self.t % self.period == 0:
+            self.action_values = self.rng.normal(self.mu, self.sigma, self.k)
+        elif self.drift:
+            self.action_values += self.rng.normal(0, self.drift, self.k)
+        else:
+            return
+        self.optimal = np.argmax(self.action_values)
+
 
 class BinomialBandit(MultiArmedBandit):
     """
@@ -47,16 +132,21 @@ class BinomialBandit(MultiArmedBandit):
 
     In the bandit scenario, this can be used to approximate a discrete user
     rating or "strength" of response to a single event.
+
+    Rewards are drawn with NumPy by default; pass `backend='pymc3'` to draw
+    them through PyMC3 instead.
     """
-    def __init__(self, k, n, p=None, t=None):
-        super(BinomialBandit, self).__init__(k)
+    def __init__(self, k, n, p=None, t=None, backend='numpy', rng=None):
+        super(BinomialBandit, self).__init__(k, rng)
         self.n = n
         self.p = p
         self.t = t
-        self.model = pm.Model()
-        with self.model:
-            self.bin = pm.Binomial('binomial', n=n*np.ones(k, dtype=np.int),
-                                   p=np.ones(k)/n, shape=(1, k), transform=None)
+        self.backend = backend
+        if backend == 'pymc3':
+            import pymc3 as pm
+            self._pm = pm
+        elif backend != 'numpy':
+            raise ValueError('unknown backend {!r}'.format(backend))
         self._samples = None
         self._cursor = 0
 
@@ -64,12 +154,11 @@ class BinomialBandit(MultiArmedBandit):
 
     def reset(self):
         if self.p is None:
-            self.action_values = np.random.uniform(size=self.k)
+            self.action_values = self.rng.uniform(size=self.k)
         else:
             self.action_values = self.p
-        self.bin.distribution.p = self.action_values
         if self.t is not None:
-            self._samples = self.bin.random(size=self.t).squeeze()
+            self._samples = self._draw(size=self.t)
             self._cursor = 0
 
         self.optimal = np.argmax(self.action_values)
@@ -77,15 +166,43 @@ class BinomialBandit(MultiArmedBandit):
     def pull(self, action):
         return self.sample[action], action == self.optimal
 
+    def sample_action_values(self, experiments):
+        if self.p is None:
+            return self.rng.uniform(size=(experiments, self.k))
+        else:
+            return np.tile(self.p, (experiments, 1))
+
+    def sample_rewards(self, action_values, actions):
+        rows = np.arange(len(actions))
+        return self.rng.binomial(self.n, action_values[rows, actions])
+
+    def draw_variates(self, shape):
+        # one uniform per Bernoulli trial, so rewards follow by inversion
+        return self.rng.random(shape + (self.n,))
+
+    def reward(self, action, variate):
+        return np.count_nonzero(variate < self.action_values[action])
+
     @property
     def sample(self):
         if self._samples is None:
-            return self.bin.random()
+            return self._draw()
         else:
             val = self._samples[self._cursor]
             self._cursor += 1
             return val
 
+    def _draw(self, size=None):
+        """
+        Draws one reward per arm, or a (size, k) block of them.
+        """
+        shape = self.k if size is None else (size, self.k)
+        if self.backend == 'pymc3':
+            dist = self._pm.Binomial.dist(n=self.n, p=self.action_values,
+                                          shape=self.k)
+            return np.reshape(dist.random(size=size), shape)
+        return self.rng.binomial(self.n, self.action_values, size=shape)
+
 
 class BernoulliBandit(BinomialBandit):
     """
@@ -96,5 +213,99 @@ class BernoulliBandit(BinomialBandit):
     In the bandit scenario, this can be used to approximate a hit or miss event,
     such as if a user clicks on a headline, ad, or recommended product.
     """
-    def __init__(self, k, p=None, t=None):
-        super(BernoulliBandit, self).__init__(k, 1, p=p, t=t)
+    def __init__(self, k, p=None, t=None, backend='numpy', rng=None):
+        super(BernoulliBandit, self).__init__(k, 1, p=p, t=t, backend=backend,
+                                              rng=rng)
+
+
+class PoissonBandit(MultiArmedBandit):
+    """
+    Poisson bandits pay a count, such as clicks or purchases per visit, drawn
+    from a Poisson distribution with the arm's rate. Unless `rates` are
+    given they are drawn exponentially with mean `scale`.
+    """
+    def __init__(self, k, rates=None, scale=1, rng=None):
+        super(PoissonBandit, self).__init__(k, rng)
+        self.rates = rates
+        self.scale = scale
+        self.reset()
+
+    def reset(self):
+        if self.rates is None:
+            self.action_values = self.rng.exponential(self.scale, self.k)
+        else:
+            self.action_values = np.asarray(self.rates, dtype=float)
+        self.optimal = np.argmax(self.action_values)
+
+    def pull(self, action):
+        return (self.rng.poisson(self.action_values[action]),
+                action == self.optimal)
+
+    def sample_action_values(self, experiments):
+        if self.rates is None:
+            return self.rng.exponential(self.scale, (experiments, self.k))
+        return np.tile(self.rates, (experiments, 1)).astype(float)
+
+    def sample_rewards(self, action_values, actions):
+        rows = np.arange(len(actions))
+        return self.rng.poisson(action_values[rows, actions])
+
+    def draw_variates(self, shape):
+        return self.rng.random(shape)
+
+    # rates up to which `reward` inverts the CDF by direct search
+    SEARCH_RATE = 30
+
+    def reward(self, action, variate):
+        rate = self.action_values[action]
+        if rate > self.SEARCH_RATE:
+            # scipy's inverse CDF is exact at any rate, but costs more than
+            # a short search; it is only imported for such rates
+            from scipy.stats import poisson
+            return max(int(poisson.ppf(variate, rate)), 0)
+        count = 0
+        p = cdf = np.exp(-rate)
+        while variate > cdf:
+            count += 1
+            p *= rate / count
+            cdf += p
+            if p == 0:
+                break
+        return count
+
+
+class LinearBandit(MultiArmedBandit):
+    """
+    A Linear Bandit shows a feature vector for every arm at each step and
+    pays the dot product of the arm's features with its hidden coefficients,
+    plus Gaussian noise. The first `shared_dims` coefficients are common to
+    all arms, the rest belong to each arm. Call `context()` to draw the next
+    step's features before choosing and pulling; an Environment does this
+    every trial.
+    """
+    contextual = True
+
+    def __init__(self, k, d, shared_dims=0, sigma=0.1, rng=None):
+        super(LinearBandit, self).__init__(k, rng)
+        self.d = d
+        self.shared_dims = shared_dims
+        self.sigma = sigma
+        self.reset()
+
+    def reset(self):
+        self.theta = self.rng.normal(size=(self.k, self.d)) / np.sqrt(self.d)
+        self.theta[:, :self.shared_dims] = self.theta[0, :self.shared_dims]
+        self.context()
+
+    def context(self):
+        """
+        Draws and returns the (k, d) features of the next step.
+        """
+        self.features = self.rng.normal(size=(self.k, self.d))
+        self.action_values = np.einsum('kd,kd->k', self.features, self.theta)
+        self.optimal = np.argmax(self.action_values)
+        return self.features
+
+    def pull(self, action):
+        return (self.action_values[action] + self.sigma*self.rng.next_normal(),
+                action == self.optimal)
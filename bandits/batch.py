@@ -0,0 +1,206 @@
+import numpy as np
+
+from bandits.agent import (Agent, GradientAgent, BetaAgent, NormalAgent,
+                           PoissonAgent)
+from bandits.posterior import beta_posterior
+from bandits.preference import softmax
+from bandits.results import moments
+
+
+class BatchAgent(object):
+    """
+    A Batch Agent runs many independent copies of an Agent in lockstep, one
+    per experiment. Its memory holds (experiments, k) arrays so that a policy
+    can choose an action for every experiment in a single vectorized call.
+    """
+    def __init__(self, agent, experiments):
+        self.agent = agent
+        self.policy = agent.policy
+        self.rng = agent.rng
+        self.k = agent.k
+        self.experiments = experiments
+        self.prior = agent.prior
+        self.gamma = agent.gamma
+        self._value_estimates = self.prior*np.ones((experiments, self.k))
+        self.action_attempts = np.zeros((experiments, self.k))
+        self.t = 0
+        self.last_action = None
+        self._rows = np.arange(experiments)
+
+    def __str__(self):
+        return str(self.agent)
+
+    def choose(self):
+        action = self.policy.choose_batch(self)
+        self.last_action = action
+        return action
+
+    def observe(self, reward):
+        idx = self._rows, self.last_action
+        self.action_attempts[idx] += 1
+
+        if self.gamma is None:
+            g = 1 / self.action_attempts[idx]
+        else:
+            g = self.gamma
+        q = self._value_estimates[idx]
+
+        self._value_estimates[idx] += g*(reward - q)
+        self.t += 1
+
+    @property
+    def value_estimates(self):
+        return self._value_estimates
+
+
+class BatchGradientAgent(BatchAgent):
+    """
+    Batched counterpart of the Gradient Agent.
+    """
+    def __init__(self, agent, experiments):
+        super(BatchGradientAgent, self).__init__(agent, experiments)
+        self.alpha = agent.alpha
+        self.baseline = agent.baseline
+        self.average_reward = np.zeros(experiments)
+
+    def observe(self, reward):
+        idx = self._rows, self.last_action
+        self.action_attempts[idx] += 1
+
+        if self.baseline:
+            diff = reward - self.average_reward
+            # every experiment has made exactly t+1 attempts so far
+            self.average_reward += 1/(self.t+1) * diff
+
+        h = self._value_estimates
+        pi = softmax(h)
+
+        step = self.alpha*(reward - self.average_reward)
+        ht = h[idx] + step*(1-pi[idx])
+        h -= step[:, np.newaxis]*pi
+        h[idx] = ht
+        self.t += 1
+
+
+class BatchBetaAgent(BatchAgent):
+    """
+    Batched counterpart of the Beta Agent, holding one Beta posterior per arm
+    and experiment.
+    """
+    def __init__(self, agent, experiments):
+        super(BatchBetaAgent, self).__init__(agent, experiments)
+        self.n = agent.n
+        self.ts = agent.ts
+        self.posterior = beta_posterior((experiments, self.k), agent.backend)
+        self._value_estimates = np.zeros((experiments, self.k))
+
+    def observe(self, reward):
+        idx = self._rows, self.last_action
+        self.action_attempts[idx] += 1
+
+        self.posterior.update(idx, reward, self.n - reward)
+
+        if self.ts:
+            self._value_estimates = self.posterior.sample(self.rng)
+        else:
+            self._value_estimates = self.posterior.mean()
+        self.t += 1
+
+    @property
+    def alpha(self):
+        return self.posterior.alpha
+
+    @property
+    def beta(self):
+        return self.posterior.beta
+
+
+class BatchConjugateAgent(BatchAgent):
+    """
+    Batched counterpart of the Conjugate Agents (Normal, Poisson), holding
+    the sufficient statistics of every arm and experiment in (experiments, k)
+    arrays, so that each step's Thompson draws for all experiments are made
+    in one vectorized call.
+    """
+    def __init__(self, agent, experiments):
+        super(BatchConjugateAgent, self).__init__(agent, experiments)
+        self.ts = agent.ts
+        self.posterior = agent.make_posterior((experiments, self.k))
+
+    def choose(self):
+        if self.ts:
+            self._value_estimates = self.posterior.sample(self.rng)
+        else:
+            self._value_estimates = self.posterior.mean()
+        return super(BatchConjugateAgent, self).choose()
+
+    def observe(self, reward):
+        idx = self._rows, self.last_action
+        self.action_attempts[idx] += 1
+        self.posterior.update(idx, 1, reward, reward*reward)
+        self.t += 1
+
+
+# matched on the exact type: a subclass may learn differently (a window,
+# discounting, sparse arms), so it is never run as its base class
+_BATCH_AGENTS = {
+    Agent: BatchAgent,
+    GradientAgent: BatchGradientAgent,
+    BetaAgent: BatchBetaAgent,
+    NormalAgent: BatchConjugateAgent,
+    PoissonAgent: BatchConjugateAgent,
+}
+
+
+def batch_agent(agent, experiments):
+    """
+    Builds the batched counterpart of `agent` running `experiments` copies.
+    """
+    batch_type = _BATCH_AGENTS.get(type(agent))
+    if batch_type is None:
+        raise TypeError('no batched counterpart for {}'.format(type(agent)))
+    return batch_type(agent, experiments)
+
+
+def run_batch(bandit, agents, trials=100, experiments=1, results=None):
+    """
+    Runs all experiments at once, returning the same average reward and
+    optimal action arrays as `Environment.run`. If `results` is given, the
+    per-step moments across experiments are folded into it at the end.
+    """
+    scores = np.zeros((trials, len(agents)))
+    optimal = np.zeros_like(scores)
+    if results is not None:
+        fields = ('reward', 'optimal', 'regret')
+        stats = dict((name, (np.zeros_like(scores), np.zeros_like(scores)))
+                     for name in fields)
+        regret = np.zeros((experiments, len(agents)))
+
+    action_values = bandit.sample_action_values(experiments)
+    best = np.argmax(action_values, axis=1)
+    rows = np.arange(experiments)
+    gaps = action_values[rows, best][:, np.newaxis] - action_values
+    batch = [batch_agent(agent, experiments) for agent in agents]
+
+    for t in range(trials):
+        for i, agent in enumerate(batch):
+            action = agent.choose()
+            reward = bandit.sample_rewards(action_values, action)
+            agent.observe(reward)
+
+            hit = action == best
+            scores[t, i] = np.sum(reward)
+            optimal[t, i] = np.count_nonzero(hit)
+
+            if results is not None:
+                regret[:, i] += gaps[rows, action]
+                for name, values in (('reward', reward), ('optimal', hit),
+                                     ('regret', regret[:, i])):
+                    _, mean, m2 = moments(values)
+                    stats[name][0][t, i] = mean
+                    stats[name][1][t, i] = m2
+
+    if results is not None:
+        results.merge_moments(experiments, stats)
+
+    return scores / experiments, optimal / experiments
@@ -1,97 +1,223 @@
-import matplotlib.pyplot as plt
 import numpy as np
-import seaborn as sns
-import scipy.stats as stats
 
-from bandits.agent import BetaAgent
+from bandits.batch import run_batch
+from bandits.parallel import run_parallel
+from bandits.results import ResultAccumulator, run_until
+from bandits.rng import spawn
 
 
 class Environment(object):
-    def __init__(self, bandit, agents, label='Multi-Armed Bandit'):
+    """
+    An Environment runs a set of agents against a bandit. If a `RewardTape`
+    is given, rewards are served from it so that all agents see common random
+    numbers.
+
+    `hooks` is a list of `Hook`s notified of experiment starts and ends and
+    of every pull, at a cost of one trial.
+
+    A bandit that is not `stationary` is stepped after every trial, and
+    regret is measured against its arm values at the time of each pull.
+    A `contextual` bandit draws new features every trial, which are passed
+    to the `choose` of contextual agents such as `LinearAgent`; other agents
+    choose without them.
+
+    With `slate=m` the bandit is multi-play: at each trial every agent plays
+    m distinct arms through `choose_slate` and `observe_slate`. The reward of
+    a trial is then the slate's total, `optimal` the fraction of the slate
+    among the m best arms, and regret is measured against the m best arms.
+    """
+    def __init__(self, bandit, agents, label='Multi-Armed Bandit', tape=None,
+                 hooks=None, slate=None):
         self.bandit = bandit
         self.agents = agents
         self.label = label
+        self.tape = tape
+        if tape is not None and tape.agents != len(agents):
+            tape.resize(len(agents))
+        self.hooks = [] if hooks is None else list(hooks)
+        self.slate = slate
+
+    def seed(self, seed=None):
+        """
+        Gives the bandit and every agent and policy its own `BlockRNG`,
+        spawned from `SeedSequence(seed)`, so that a seed reproduces the
+        whole of the following runs exactly.
+        """
+        rngs = spawn(seed, 1 + 2*len(self.agents))
+        self.bandit.rng = rngs[0]
+        for i, agent in enumerate(self.agents):
+            agent.rng = rngs[1 + 2*i]
+            agent.policy.rng = rngs[2 + 2*i]
 
     def reset(self):
         self.bandit.reset()
+        if self.tape is not None:
+            self.tape.reset()
         for agent in self.agents:
             agent.reset()
 
-    def run(self, trials=100, experiments=1):
+    def pull(self, i, action):
+        """
+        Pulls `action` on behalf of the i-th agent.
+        """
+        if self.tape is None:
+            return self.bandit.pull(action)
+        return self.tape.pull(i, action)
+
+    def accumulator(self, trials, path=None, flush_every=1):
+        """
+        Builds a `ResultAccumulator` for `run`, tracking per step and agent
+        the reward, whether the optimal action was taken and the cumulative
+        regret, measured against the bandit's action values.
+        """
+        shape = (trials, len(self.agents))
+        fields = [('reward', shape), ('optimal', shape), ('regret', shape)]
+        return ResultAccumulator(fields, path, flush_every)
+
+    def run(self, trials=100, experiments=1, batch=False, workers=None,
+            seed=None, results=None):
+        """
+        Runs `experiments` independent episodes of `trials` steps each and
+        returns the average reward and fraction of optimal actions per step.
+        With `batch=True` all experiments advance together as arrays, which
+        is far faster for large experiment counts.
+
+        Passing `workers` or `seed` splits the experiments over a process pool
+        with reproducible per-block random streams; see `run_parallel`.
+
+        An accumulator from `accumulator(trials)` passed as `results` also
+        receives per-experiment statistics as experiments complete.
+        """
+        if workers is not None or seed is not None:
+            return run_parallel(self, (trials,), {'batch': batch},
+                                experiments, workers, seed, results=results)
+        if batch:
+            if self.tape is not None:
+                raise ValueError('reward tapes are not supported in batch '
+                                 'mode')
+            if self.hooks:
+                raise ValueError('hooks are not supported in batch mode')
+            if not self.bandit.stationary:
+                raise ValueError('non-stationary bandits are not supported '
+                                 'in batch mode')
+            if self.slate is not None:
+                raise ValueError('slates are not supported in batch mode')
+            if self.bandit.contextual:
+                raise ValueError('contextual bandits are not supported in '
+                                 'batch mode')
+            return run_batch(self.bandit, self.agents, trials, experiments,
+                             results)
+
+        contextual = self.bandit.contextual
+        if contextual and self.slate is not None:
+            raise ValueError('slates are not supported with contextual '
+                             'bandits')
+        if not contextual and any(agent.contextual for agent in self.agents):
+            raise ValueError('contextual agents need a contextual bandit')
         scores = np.zeros((trials, len(self.agents)))
         optimal = np.zeros_like(scores)
+        on_step = [hook.on_step for hook in self.hooks]
 
-        for _ in range(experiments):
+        for e in range(experiments):
             self.reset()
+            for hook in self.hooks:
+                hook.on_experiment_start(self, e)
+            rewards = np.zeros_like(scores)
+            hits = np.zeros_like(scores)
+            gaps = np.zeros_like(scores)
+            values = self.bandit.action_values
+            best, top = self._best(values)
             for t in range(trials):
+                if contextual:
+                    context = self.bandit.context()
+                    values = self.bandit.action_values
+                    best, top = self._best(values)
                 for i, agent in enumerate(self.agents):
-                    action = agent.choose()
-                    reward, is_optimal = self.bandit.pull(action)
+                    if self.slate is not None:
+                        rewards[t, i], hits[t, i], gaps[t, i] = \
+                            self._play_slate(i, agent, on_step, values, best,
+                                             top)
+                        continue
+                    if agent.contextual:
+                        action = agent.choose(context)
+                    else:
+                        action = agent.choose()
+                    reward, is_optimal = self.pull(i, action)
                     agent.observe(reward)
+                    for f in on_step:
+                        f(action, reward, 1)
+
+                    rewards[t, i] = reward
+                    hits[t, i] = is_optimal
+                    gaps[t, i] = best - values[action]
 
-                    scores[t, i] += reward
-                    if is_optimal:
-                        optimal[t, i] += 1
+                if not self.bandit.stationary:
+                    self.bandit.step()
+                    values = self.bandit.action_values
+                    best, top = self._best(values)
+
+            regret = np.cumsum(gaps, axis=0)
+            for hook in self.hooks:
+                hook.on_experiment_end(self, e, regret[-1])
+
+            scores += rewards
+            optimal += hits
+            if results is not None:
+                results.add(reward=rewards, optimal=hits, regret=regret)
 
         return scores / experiments, optimal / experiments
 
-    def plot_results(self, scores, optimal):
-        sns.set_style('white')
-        sns.set_context('talk')
-        plt.subplot(2, 1, 1)
-        plt.title(self.label)
-        plt.plot(scores)
-        plt.ylabel('Average Reward')
-        plt.legend(self.agents, loc=4)
-        plt.subplot(2, 1, 2)
-        plt.plot(optimal * 100)
-        plt.ylim(0, 100)
-        plt.ylabel('% Optimal Action')
-        plt.xlabel('Time Step')
-        plt.legend(self.agents, loc=4)
-        sns.despine()
-        plt.show()
+    def run_until(self, trials=100, half_width=0.05, target='reward',
+                  max_experiments=10000, block_size=50, batch=False,
+                  workers=None, seed=None, z=1.96, results=None):
+        """
+        Runs experiments in blocks until the `z` confidence interval on each
+        agent's `target` at the last trial, 'reward' or cumulative 'regret',
+        has a half-width of at most `half_width`, or `max_experiments` have
+        run. See `run_until` in `bandits.results` for how blocks are sized.
 
-    def plot_beliefs(self):
-        sns.set_context('talk')
-        pal = sns.color_palette("cubehelix", n_colors=len(self.agents))
-        plt.title(self.label + ' - Agent Beliefs')
+        Returns the average reward and fraction of optimal actions per step,
+        as `run` does, and a report of the experiments run and the achieved
+        half-width. With a `seed`, each block is run in parallel under its
+        own child seed, so the whole run is reproducible.
+        """
+        if results is None:
+            results = self.accumulator(trials)
+        seeds = None if seed is None else np.random.SeedSequence(seed)
 
-        rows = 2
-        cols = int(self.bandit.k / 2)
+        def run(n):
+            block_seed = None
+            if seeds is not None:
+                block_seed = seeds.spawn(1)[0].generate_state(4)
+            self.run(trials, n, batch=batch, workers=workers,
+                     seed=block_seed, results=results)
 
-        axes = [plt.subplot(rows, cols, i+1) for i in range(self.bandit.k)]
-        for i, val in enumerate(self.bandit.action_values):
-            color = 'r' if i == self.bandit.optimal else 'k'
-            axes[i].vlines(val, 0, 1, colors=color)
+        report = run_until(run, results, target, half_width, max_experiments,
+                           block_size, z, index=-1)
+        return results['reward'].mean, results['optimal'].mean, report
 
-        for i, agent in enumerate(self.agents):
-            if type(agent) is not BetaAgent:
-                for j, val in enumerate(agent.value_estimates):
-                    axes[j].vlines(val, 0, 0.75, colors=pal[i], alpha=0.8)
-            else:
-                x = np.arange(0, 1, 0.001)
-                y = np.array([stats.beta.pdf(x, a, b) for a, b in
-                             zip(agent.alpha, agent.beta)])
-                y /= np.max(y)
-                for j, _y in enumerate(y):
-                    axes[j].plot(x, _y, color=pal[i], alpha=0.8)
-
-        min_p = np.argmin(self.bandit.action_values)
-        for i, ax in enumerate(axes):
-            ax.set_xlim(0, 1)
-            if i % cols != 0:
-                ax.set_yticklabels([])
-            if i < cols:
-                ax.set_xticklabels([])
-            else:
-                ax.set_xticks([0, 0.25, 0.5, 0.75, 1.0])
-                ax.set_xticklabels(['0', '', '0.5', '', '1'])
-            if i == int(cols/2):
-                title = '{}-arm Bandit - Agent Estimators'.format(self.bandit.k)
-                ax.set_title(title)
-            if i == min_p:
-                ax.legend(self.agents)
-
-        sns.despine()
-        plt.show()
+    def _best(self, values):
+        # value of the best play, a single arm or a slate, and a mask of the
+        # arms in it
+        m = 1 if self.slate is None else self.slate
+        top = np.zeros(len(values), dtype=bool)
+        top[np.argpartition(values, len(values)-m)[len(values)-m:]] = True
+        return np.sum(values[top]), top
+
+    def _play_slate(self, i, agent, on_step, values, best, top):
+        actions = agent.choose_slate(self.slate)
+        rewards = [self.pull(i, action)[0] for action in actions]
+        agent.observe_slate(actions, rewards)
+        for f in on_step:
+            for action, reward in zip(actions, rewards):
+                f(action, reward, 1)
+        return (np.sum(rewards), np.mean(top[actions]),
+                best - np.sum(values[actions]))
+
+    def plot_results(self, scores, optimal):
+        from bandits import plotting
+        plotting.plot_results(self, scores, optimal)
+
+    def plot_beliefs(self):
+        from bandits import plotting
+        plotting.plot_beliefs(self)
@@ -0,0 +1,88 @@
+import sys
+
+
+class Hook(object):
+    """
+    A Hook receives the events of an Environment run. Subclasses override
+    the events they care about; the rest do nothing.
+
+    Hooks are called from the scalar simulation loop only, so the loop does
+    no I/O unless a hook asks for it. With no hooks registered the only cost
+    per step is iterating over an empty list.
+    """
+    def on_experiment_start(self, env, experiment):
+        pass
+
+    def on_step(self, action, reward, cost):
+        pass
+
+    def on_budget_exhausted(self, env, action):
+        """
+        Called once per experiment when the next pull, `action`, no longer
+        fits the cost budget of a multi-fidelity run. Runs of a fixed number
+        of trials have no budget and never call it.
+        """
+        pass
+
+    def on_experiment_end(self, env, experiment, regret):
+        pass
+
+
+class ProgressHook(Hook):
+    """
+    Reports the number of completed experiments every `every` experiments,
+    on a single updating line of `stream`. The count runs over the hook's
+    lifetime, so it also covers the blocks of a run with `workers=1`.
+    """
+    def __init__(self, experiments=None, every=1, stream=None):
+        self.experiments = experiments
+        self.every = every
+        self.stream = sys.stderr if stream is None else stream
+        self.completed = 0
+
+    def on_experiment_end(self, env, experiment, regret):
+        self.completed += 1
+        if self.completed % self.every != 0 and \
+                self.completed != self.experiments:
+            return
+        total = '' if self.experiments is None else '/{}'.format(
+            self.experiments)
+        self.stream.write('\r{}: experiment {}{}'.format(
+            env.label, self.completed, total))
+        if self.completed == self.experiments:
+            self.stream.write('\n')
+        self.stream.flush()
+
+
+class SampledLogHook(Hook):
+    """
+    Logs one step in every `every`, plus budget exhaustion and the regret at
+    the end of each experiment, to `logger` (the 'bandits' logger by
+    default) at `level`, DEBUG by default.
+    """
+    def __init__(self, every=1000, logger=None, level=None):
+        # logging is only imported once a log hook is used, keeping it out
+        # of `import bandits`
+        import logging
+        self.every = every
+        self.logger = logging.getLogger('bandits') if logger is None \
+            else logger
+        self.level = logging.DEBUG if level is None else level
+        self.steps = 0
+
+    def on_experiment_start(self, env, experiment):
+        self.steps = 0
+
+    def on_step(self, action, reward, cost):
+        self.steps += 1
+        if self.steps % self.every == 0:
+            self.logger.log(self.level, 'step %d: action=%s reward=%s '
+                            'cost=%s', self.steps, action, reward, cost)
+
+    def on_budget_exhausted(self, env, action):
+        self.logger.log(self.level, 'budget exhausted after %d steps, '
+                        'action %s unaffordable', self.steps, action)
+
+    def on_experiment_end(self, env, experiment, regret):
+        self.logger.log(self.level, 'experiment %d: regret=%s', experiment,
+                        regret)
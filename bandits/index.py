@@ -0,0 +1,113 @@
+import heapq
+import math
+
+import numpy as np
+
+
+class UCBIndex(object):
+    """
+    An incrementally maintained UCB1 index over the arms of a single agent.
+
+    Arm scores Q_i + (L/N_i)^(1/c) are kept in a lazy max-heap. Only the arm
+    played since the last call is rescored, in O(log k). The log term L is
+    frozen at L0 = log(t0+1) and the heap is rebuilt from scratch once the
+    true log(t+1) exceeds L0*(1+tolerance)^c, so every exploration bonus is
+    understated by at most a factor (1+tolerance). Consequently the chosen
+    arm a satisfies
+
+        U_a >= max_i U_i - tolerance * max_i B_i
+
+    where U and B are the exact UCB1 index and bonus at the current step.
+    Rebuilds happen O(log log t) times, so choosing is O(log k) amortized.
+    """
+    def __init__(self, c, tolerance=0.05):
+        self.c = c
+        self.tolerance = tolerance
+        self.t = None
+        self.pending = None
+        self._heap = []
+        self._scores = None
+        self._log_t = 0
+        self._rebuild_log_t = 0
+
+    def _bonus(self, attempts):
+        return np.power(self._log_t / attempts, 1/self.c)
+
+    def rebuild(self, agent):
+        """
+        Rescores every arm against the agent's current memory, O(k log k).
+        """
+        self._log_t = math.log(agent.t+1)
+        self._rebuild_log_t = self._log_t*(1+self.tolerance)**self.c
+        attempts = agent.action_attempts
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = agent.value_estimates + self._bonus(attempts)
+        scores[attempts == 0] = np.inf
+        self._scores = scores
+
+        # a list sorted on (-score, arm) is already a valid heap
+        order = np.lexsort((np.arange(len(scores)), -scores))
+        self._heap = list(zip((-scores[order]).tolist(), order.tolist()))
+        self.t = agent.t
+
+    def update(self, agent, arm):
+        """
+        Rescores a single arm after its estimate or count changed, O(log k).
+        """
+        n = agent.action_attempts[arm]
+        if n == 0:
+            score = math.inf
+        else:
+            score = (agent.value_estimates[arm] +
+                     (self._log_t / n)**(1/self.c))
+        self._scores[arm] = score
+        heapq.heappush(self._heap, (-score, arm))
+
+    def extend(self, agent):
+        """
+        Scores the arms appended to the agent since the index last saw it,
+        such as the queue slot a `SparseAgent` opens after playing an untried
+        arm, O(log k) each.
+        """
+        old, new = len(self._scores), len(agent.value_estimates)
+        if new > old:
+            self._scores = np.concatenate((self._scores,
+                                           np.full(new - old, np.nan)))
+            for arm in range(old, new):
+                self.update(agent, arm)
+
+    def sync(self, agent):
+        """
+        Brings the index up to date with the agent. A single observation of
+        the pending arm, along with any arms it appended, is applied
+        incrementally; anything else, such as a reset or bulk update,
+        triggers a full rebuild.
+        """
+        if self.t == agent.t:
+            pass
+        elif (self.t is not None and agent.t == self.t+1 and
+                agent.last_action == self.pending):
+            self.t = agent.t
+            if math.log(agent.t+1) > self._rebuild_log_t or \
+                    len(self._heap) > 2*len(self._scores) + 64:
+                self.rebuild(agent)
+            else:
+                self.update(agent, self.pending)
+                self.extend(agent)
+        else:
+            self.rebuild(agent)
+
+    def top(self):
+        """
+        Returns the arm with the highest indexed score, dropping heap entries
+        made stale by later updates.
+        """
+        heap = self._heap
+        while -heap[0][0] != self._scores[heap[0][1]]:
+            heapq.heappop(heap)
+        return heap[0][1]
+
+    def choose(self, agent):
+        self.sync(agent)
+        self.pending = self.top()
+        return self.pending
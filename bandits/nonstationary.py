@@ -0,0 +1,91 @@
+import numpy as np
+
+
+class WindowStats(object):
+    """
+    Per-arm reward sums and counts over the last `window` observations. The
+    observations sit in a fixed ring buffer and the one falling out of the
+    window is subtracted as the new one is added, so each update is O(1)
+    and memory is bounded by the window whatever the run length.
+    """
+    def __init__(self, k, window):
+        self.k = k
+        self.window = window
+        self.actions = np.zeros(window, dtype=int)
+        self.rewards = np.zeros(window)
+        self.sums = np.zeros(k)
+        self.counts = np.zeros(k)
+        self.n = 0
+        self._pos = 0
+
+    def reset(self):
+        self.sums[:] = 0
+        self.counts[:] = 0
+        self.n = 0
+        self._pos = 0
+
+    def add(self, action, reward):
+        """
+        Adds one observation, returning the arm of the one it pushed out of
+        the window, or None while the window is filling.
+        """
+        pos = self._pos
+        old = None
+        if self.n == self.window:
+            old = int(self.actions[pos])
+            self.sums[old] -= self.rewards[pos]
+            self.counts[old] -= 1
+            # fresh sum once an arm leaves the window, so rounding errors
+            # from the subtractions cannot accumulate
+            if self.counts[old] == 0:
+                self.sums[old] = 0
+        else:
+            self.n += 1
+        self.actions[pos] = action
+        self.rewards[pos] = reward
+        self.sums[action] += reward
+        self.counts[action] += 1
+        self._pos = (pos + 1) % self.window
+        return old
+
+
+class DiscountedStats(object):
+    """
+    Per-arm sums of one or more series, each past observation weighted by
+    `discount` per step since it was made. Rather than decaying every arm at
+    every step, the arrays are stored divided by discount^t and only
+    rescaled when that factor grows large, so an update is O(1) amortized.
+    """
+    RESCALE = 1e100
+
+    def __init__(self, k, discount, series=1):
+        self.k = k
+        self.discount = discount
+        self._scaled = np.zeros((series, k))
+        self._scale = 1.0
+
+    def reset(self):
+        self._scaled[:] = 0
+        self._scale = 1.0
+
+    def add(self, action, values):
+        """
+        Moves on one step and adds `values`, one per series, to `action`.
+        """
+        self._scale /= self.discount
+        if self._scale > self.RESCALE:
+            self._scaled /= self._scale
+            self._scale = 1.0
+        self._scaled[:, action] += np.multiply(values, self._scale)
+
+    def sums(self, series=0):
+        return self._scaled[series] / self._scale
+
+    def ratio(self, index=slice(None), numerator=0, denominator=1):
+        """
+        Ratio of two series for the arms in `index`, which the common scale
+        cancels out of, so it costs nothing to keep up to date.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (self._scaled[numerator, index] /
+                    self._scaled[denominator, index])
@@ -0,0 +1,88 @@
+import multiprocessing as mp
+from functools import reduce
+
+import numpy as np
+
+# environment shared with the pool workers, set once per process
+_env = None
+
+
+def _init_worker(env):
+    global _env
+    _env = env
+
+
+def _run_block(task):
+    """
+    Runs one block of experiments under its own seed and returns the summed,
+    rather than averaged, results so blocks can be combined exactly.
+    """
+    seed, start, experiments, args, kwargs, results = task
+    np.random.seed(seed)
+    _env.seed(seed)
+    # a file-backed reward tape replays the slices of the block's own
+    # experiments, not those of the worker's previous blocks
+    tape = getattr(_env, 'tape', None)
+    if tape is not None:
+        tape.seek(start)
+    if results is not None:
+        kwargs = dict(kwargs, results=results)
+    means = _env.run(*args, experiments=experiments, **kwargs)
+    return [np.asarray(m) * experiments for m in means], results
+
+
+def _collect(block, results):
+    sums, block_results = block
+    if results is not None:
+        results.merge(block_results)
+    return sums
+
+
+def split_experiments(experiments, block_size):
+    """
+    Splits `experiments` into consecutive blocks of at most `block_size`.
+    """
+    n_blocks = -(-experiments // block_size)
+    return [min(block_size, experiments - i*block_size)
+            for i in range(n_blocks)]
+
+
+def run_parallel(env, args=(), kwargs=None, experiments=1, workers=None,
+                 seed=None, block_size=50, results=None):
+    """
+    Runs `env.run(*args, experiments=..., **kwargs)` over a process pool.
+
+    Experiments are split into fixed blocks, each seeded by a child of
+    `SeedSequence(seed)`, which seeds both NumPy's global state and, through
+    `env.seed`, the environment's generators, and replaying its own slices
+    of a file-backed reward tape. The per-block sums are combined in block
+    order.
+    Since neither the blocks nor their seeds depend on `workers`, a fixed seed
+    gives identical results for any worker count.
+
+    If a result accumulator is given, each block's statistics are merged into
+    it, again in block order, as soon as the block completes.
+    """
+    kwargs = {} if kwargs is None else kwargs
+    blocks = split_experiments(experiments, block_size)
+    children = np.random.SeedSequence(seed).spawn(len(blocks))
+    starts = np.cumsum([0] + blocks[:-1])
+    tasks = [(child.generate_state(4), int(start), n, args, kwargs,
+              None if results is None else results.empty_like())
+             for child, start, n in zip(children, starts, blocks)]
+
+    partials = []
+    if workers == 1:
+        _init_worker(env)
+        for task in tasks:
+            partials.append(_collect(_run_block(task), results))
+    else:
+        # fork lets the pool inherit env without pickling its policies
+        methods = mp.get_all_start_methods()
+        ctx = mp.get_context('fork' if 'fork' in methods else None)
+        with ctx.Pool(workers, _init_worker, (env,)) as pool:
+            for block in pool.imap(_run_block, tasks):
+                partials.append(_collect(block, results))
+
+    totals = reduce(lambda a, b: [x + y for x, y in zip(a, b)], partials)
+    return tuple(total / experiments for total in totals)
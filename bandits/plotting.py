@@ -0,0 +1,73 @@
+"""
+Plotting helpers for Environment results. Kept apart from the environment so
+that matplotlib, seaborn and scipy are only imported when a plot is drawn.
+"""
+import matplotlib.pyplot as plt
+import numpy as np
+import seaborn as sns
+import scipy.stats as stats
+
+from bandits.agent import BetaAgent
+
+
+def plot_results(env, scores, optimal):
+    sns.set_style('white')
+    sns.set_context('talk')
+    plt.subplot(2, 1, 1)
+    plt.title(env.label)
+    plt.plot(scores)
+    plt.ylabel('Average Reward')
+    plt.legend(env.agents, loc=4)
+    plt.subplot(2, 1, 2)
+    plt.plot(optimal * 100)
+    plt.ylim(0, 100)
+    plt.ylabel('% Optimal Action')
+    plt.xlabel('Time Step')
+    plt.legend(env.agents, loc=4)
+    sns.despine()
+    plt.show()
+
+
+def plot_beliefs(env):
+    sns.set_context('talk')
+    pal = sns.color_palette("cubehelix", n_colors=len(env.agents))
+    plt.title(env.label + ' - Agent Beliefs')
+
+    rows = 2
+    cols = int(env.bandit.k / 2)
+
+    axes = [plt.subplot(rows, cols, i+1) for i in range(env.bandit.k)]
+    for i, val in enumerate(env.bandit.action_values):
+        color = 'r' if i == env.bandit.optimal else 'k'
+        axes[i].vlines(val, 0, 1, colors=color)
+
+    for i, agent in enumerate(env.agents):
+        if type(agent) is not BetaAgent:
+            for j, val in enumerate(agent.value_estimates):
+                axes[j].vlines(val, 0, 0.75, colors=pal[i], alpha=0.8)
+        else:
+            x = np.arange(0, 1, 0.001)
+            y = np.array([stats.beta.pdf(x, a, b) for a, b in
+                         zip(agent.alpha, agent.beta)])
+            y /= np.max(y)
+            for j, _y in enumerate(y):
+                axes[j].plot(x, _y, color=pal[i], alpha=0.8)
+
+    min_p = np.argmin(env.bandit.action_values)
+    for i, ax in enumerate(axes):
+        ax.set_xlim(0, 1)
+        if i % cols != 0:
+            ax.set_yticklabels([])
+        if i < cols:
+            ax.set_xticklabels([])
+        else:
+            ax.set_xticks([0, 0.25, 0.5, 0.75, 1.0])
+            ax.set_xticklabels(['0', '', '0.5', '', '1'])
+        if i == int(cols/2):
+            title = '{}-arm Bandit - Agent Estimators'.format(env.bandit.k)
+            ax.set_title(title)
+        if i == min_p:
+            ax.legend(env.agents)
+
+    sns.despine()
+    plt.show()
@@ -1,16 +1,71 @@
+import weakref
+
 import numpy as np
 
+from bandits.index import UCBIndex
+from bandits.preference import softmax
+from bandits.rng import as_rng
+
+
+def random_argmax(q, rng=None):
+    """
+    Row-wise argmax of a 2-D array with ties broken uniformly at random.
+    """
+    ties = q == np.max(q, axis=1, keepdims=True)
+    action = np.argmax(ties, axis=1)
+    tied = np.flatnonzero(np.count_nonzero(ties, axis=1) > 1)
+    if len(tied) > 0:
+        noise = as_rng(rng).random((len(tied), q.shape[1]))
+        action[tied] = np.argmax(np.where(ties[tied], noise, -1), axis=1)
+    return action
+
+
+def top_m(q, m, rng=None):
+    """
+    Indices of the `m` largest entries of a 1-D array, best first. The top m
+    are found with argpartition in O(k), and only they are sorted; ties at
+    the cut-off are broken uniformly at random.
+    """
+    k = len(q)
+    m = min(m, k)
+    part = np.argpartition(q, k-m)[k-m:]
+    cut = q[part[0]]
+    top = part[q[part] > cut]
+    tied = np.flatnonzero(q == cut)
+    top = np.concatenate((top, as_rng(rng).choice(tied, m - len(top),
+                                                  replace=False)))
+    return top[np.argsort(-q[top], kind='stable')]
+
 
 class Policy(object):
     """
     A policy prescribes an action to be taken based on the memory of an agent.
+    Its random choices are drawn from `rng`, a NumPy `Generator` or seed, or
+    NumPy's global state when it is None.
     """
+    def __init__(self, rng=None):
+        self.rng = as_rng(rng)
+
     def __str__(self):
         return 'generic policy'
 
     def choose(self, agent):
         return 0
 
+    def choose_batch(self, agent):
+        """
+        Vectorized counterpart of `choose` for a `BatchAgent`, returning one
+        action per experiment.
+        """
+        return np.zeros(agent.experiments, dtype=int)
+
+    def choose_slate(self, agent, m):
+        """
+        Slate counterpart of `choose`, returning `m` distinct actions with the
+        most preferred first.
+        """
+        return np.arange(m)
+
 
 class EpsilonGreedyPolicy(Policy):
     """
@@ -19,22 +74,47 @@ class EpsilonGreedyPolicy(Policy):
     multiple actions are tied for best choice, then a random action from that
     subset is selected.
     """
-    def __init__(self, epsilon):
+    def __init__(self, epsilon, rng=None):
+        super(EpsilonGreedyPolicy, self).__init__(rng)
         self.epsilon = epsilon
 
     def __str__(self):
         return '\u03B5-greedy (\u03B5={})'.format(self.epsilon)
 
     def choose(self, agent):
-        if np.random.random() < self.epsilon:
-            return np.random.choice(len(agent.value_estimates))
+        if self.rng.next_uniform() < self.epsilon:
+            return self.rng.next_integer(len(agent.value_estimates))
         else:
-            action = np.argmax(agent.value_estimates)
-            check = np.where(agent.value_estimates == action)[0]
-            if len(check) == 0:
+            q = agent.value_estimates
+            action = np.argmax(q)
+            ties = np.flatnonzero(q == q[action])
+            if len(ties) == 1:
                 return action
             else:
-                return np.random.choice(check)
+                return ties[self.rng.next_integer(len(ties))]
+
+    def choose_batch(self, agent):
+        action = random_argmax(agent.value_estimates, self.rng)
+        explore = self.rng.random(agent.experiments) < self.epsilon
+        n = np.count_nonzero(explore)
+        if n > 0:
+            action[explore] = self.rng.integers(agent.k, size=n)
+        return action
+
+    def choose_slate(self, agent, m):
+        """
+        The top m arms, each slot replaced with probability epsilon by a
+        random arm not otherwise in the slate.
+        """
+        slate = top_m(agent.value_estimates, m, self.rng)
+        explore = self.rng.random(len(slate)) < self.epsilon
+        n = np.count_nonzero(explore)
+        if n > 0:
+            others = np.ones(len(agent.value_estimates), dtype=bool)
+            others[slate[~explore]] = False
+            slate[explore] = self.rng.choice(np.flatnonzero(others), n,
+                                             replace=False)
+        return slate
 
 
 class GreedyPolicy(EpsilonGreedyPolicy):
@@ -43,8 +123,8 @@ class GreedyPolicy(EpsilonGreedyPolicy):
     random selection. This can be seen as a special case of EpsilonGreedy where
     epsilon = 0 i.e. always exploit.
     """
-    def __init__(self):
-        super(GreedyPolicy, self).__init__(0)
+    def __init__(self, rng=None):
+        super(GreedyPolicy, self).__init__(0, rng)
 
     def __str__(self):
         return 'greedy'
@@ -56,8 +136,8 @@ class RandomPolicy(EpsilonGreedyPolicy):
     consideration to which is apparently best. This can be seen as a special
     case of EpsilonGreedy where epsilon = 1 i.e. always explore.
     """
-    def __init__(self):
-        super(RandomPolicy, self).__init__(1)
+    def __init__(self, rng=None):
+        super(RandomPolicy, self).__init__(1, rng)
 
     def __str__(self):
         return 'random'
@@ -69,7 +149,8 @@ class UCBPolicy(Policy):
     factor to the expected value of each arm which can influence a greedy
     selection strategy to more intelligently explore less confident options.
     """
-    def __init__(self, c):
+    def __init__(self, c, rng=None):
+        super(UCBPolicy, self).__init__(rng)
         self.c = c
 
     def __str__(self):
@@ -82,11 +163,59 @@ class UCBPolicy(Policy):
 
         q = agent.value_estimates + exploration
         action = np.argmax(q)
-        check = np.where(q == action)[0]
-        if len(check) == 0:
+        ties = np.flatnonzero(q == q[action])
+        if len(ties) == 1:
             return action
         else:
-            return np.random.choice(check)
+            return ties[self.rng.next_integer(len(ties))]
+
+    def choose_batch(self, agent):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            exploration = np.log(agent.t+1) / agent.action_attempts
+        exploration[np.isnan(exploration)] = 0
+        exploration = np.power(exploration, 1/self.c)
+
+        return random_argmax(agent.value_estimates + exploration, self.rng)
+
+    def choose_slate(self, agent, m):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            exploration = np.log(agent.t+1) / agent.action_attempts
+        exploration[np.isnan(exploration)] = 0
+        exploration = np.power(exploration, 1/self.c)
+
+        return top_m(agent.value_estimates + exploration, m, self.rng)
+
+
+class IncrementalUCBPolicy(UCBPolicy):
+    """
+    UCB1 backed by an incrementally maintained index, making each choice
+    O(log k) amortized instead of O(k). Choices match exact UCB1 up to the
+    documented `tolerance` on the exploration bonus; see `UCBIndex`.
+
+    The index assumes each observation only changes the estimate and count of
+    the arm just played, as with the sample-average and constant step-size
+    `Agent`. A reset or bulk update is detected from the step count and
+    handled with a full rebuild. Agents whose observations also move other
+    arms, such as the windowed, discounted, gradient and Thompson sampling
+    agents, declare `local_updates = False` and are rejected.
+    """
+    def __init__(self, c, tolerance=0.05, rng=None):
+        super(IncrementalUCBPolicy, self).__init__(c, rng)
+        self.tolerance = tolerance
+        self._indexes = weakref.WeakKeyDictionary()
+
+    def __str__(self):
+        return 'UCB (c={}, incremental)'.format(self.c)
+
+    def choose(self, agent):
+        index = self._indexes.get(agent)
+        if index is None:
+            if not agent.local_updates:
+                raise TypeError('{} updates more than the played arm; use '
+                                'UCBPolicy'.format(type(agent).__name__))
+            index = UCBIndex(self.c, self.tolerance)
+            self._indexes[agent] = index
+        return index.choose(agent)
 
 
 class SoftmaxPolicy(Policy):
@@ -99,8 +228,67 @@ class SoftmaxPolicy(Policy):
         return 'SM'
 
     def choose(self, agent):
-        a = agent.value_estimates
-        pi = np.exp(a) / np.sum(np.exp(a))
-        cdf = np.cumsum(pi)
-        s = np.random.random()
+        preferences = getattr(agent, 'preferences', None)
+        if preferences is not None:
+            return preferences.sample(self.rng)
+
+        cdf = np.cumsum(softmax(agent.value_estimates))
+        s = self.rng.next_uniform()
         return np.where(s < cdf)[0][0]
+
+    def choose_batch(self, agent):
+        cdf = np.cumsum(softmax(agent.value_estimates), axis=1)
+        s = self.rng.random((agent.experiments, 1))
+        return np.minimum(np.sum(cdf <= s, axis=1), agent.k-1)
+
+    def choose_slate(self, agent, m):
+        """
+        Samples m arms without replacement from the softmax distribution,
+        as the top m of the value estimates perturbed by Gumbel noise
+        (Gumbel-top-k).
+        """
+        q = np.asarray(agent.value_estimates)
+        return top_m(q + self.rng.gumbel(size=q.shape), m, self.rng)
+
+
+class LinUCBPolicy(Policy):
+    """
+    The LinUCB policy for a `LinearAgent` picks the arm with the highest
+    upper confidence bound mean + alpha*std on its predicted reward, with
+    ties broken at random.
+    """
+    def __init__(self, alpha=1.0, rng=None):
+        super(LinUCBPolicy, self).__init__(rng)
+        self.alpha = alpha
+
+    def __str__(self):
+        return 'LinUCB (\u03B1={})'.format(self.alpha)
+
+    def scores(self, mean, variance):
+        return mean + self.alpha*np.sqrt(variance)
+
+    def choose(self, agent):
+        context = np.asarray(agent.context)[np.newaxis]
+        return random_argmax(self.scores(*agent.predict(context)),
+                             self.rng)[0]
+
+    def choose_batch(self, agent, contexts):
+        return random_argmax(self.scores(*agent.predict(contexts)), self.rng)
+
+
+class LinearThompsonPolicy(LinUCBPolicy):
+    """
+    Linear Thompson sampling for a `LinearAgent`: each arm's reward is drawn
+    from its Gaussian posterior predictive, scaled by `v`, and the best draw
+    wins. Arms are drawn independently, which is exact for disjoint models
+    and ignores the correlation the shared coefficients induce otherwise.
+    """
+    def __init__(self, v=1.0, rng=None):
+        super(LinearThompsonPolicy, self).__init__(v, rng)
+
+    def __str__(self):
+        return 'LinTS (v={})'.format(self.alpha)
+
+    def scores(self, mean, variance):
+        noise = self.rng.standard_normal(mean.shape)
+        return mean + self.alpha*np.sqrt(variance)*noise
@@ -0,0 +1,232 @@
+import numpy as np
+
+from bandits.rng import as_rng
+from bandits.snapshot import Snapshotable
+
+
+def aggregate(index, rewards, size):
+    """
+    Groups rewards by flat `index` into (indices, counts, sums) over the
+    distinct indices present, out of `size` possible ones.
+    """
+    if len(index) > 0.5 * size:
+        counts = np.bincount(index, minlength=size)
+        sums = np.bincount(index, weights=rewards, minlength=size)
+        indices = np.flatnonzero(counts)
+        return indices, counts[indices], sums[indices]
+    indices, inverse = np.unique(index, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(indices))
+    sums = np.bincount(inverse, weights=rewards, minlength=len(indices))
+    return indices, counts, sums
+
+
+def _check_shape(pool, t, counts):
+    if counts.shape != (len(t), pool.k):
+        raise ValueError('snapshot has shape {}, pool has {} arms'.format(
+            counts.shape, pool.k))
+    pool.size = len(t)
+
+
+class PoolView(object):
+    """
+    The memory of a subset of the agents in a pool, laid out like a
+    `BatchAgent` so that a policy's `choose_batch` picks one action per user.
+    """
+    def __init__(self, k, value_estimates, action_attempts, t):
+        self.k = k
+        self.experiments = len(value_estimates)
+        self.value_estimates = value_estimates
+        self.action_attempts = action_attempts
+        self.t = t[:, np.newaxis]
+
+
+class AgentPool(Snapshotable):
+    """
+    An Agent Pool holds `size` independent Agents that share a policy, such
+    as one bandit per user, as contiguous (size, k) arrays instead of one
+    Python object per agent. Estimates and counts are stored with the given
+    dtypes, so float32 estimates and int32 counts take 8 bytes per arm, half
+    the 16 of a list of float64 Agents, before their per-object overhead.
+    `load(path, mmap_mode='r+')` maps a saved pool straight from disk, so a
+    restarted worker is warm at once and its updates persist to the file.
+
+    `choose(user_ids)` and `observe(user_ids, actions, rewards)` act on many
+    users at once through the policy's `choose_batch`, which covers the
+    epsilon-greedy, UCB and softmax policies. A user id may appear several
+    times in one observe call; see `observe` for how its updates combine.
+    """
+    def __init__(self, k, size, policy, prior=0, gamma=None,
+                 value_dtype=np.float32, count_dtype=np.int32):
+        self.k = k
+        self.size = size
+        self.policy = policy
+        self.prior = prior
+        self.gamma = gamma
+        self._value_estimates = np.full((size, k), prior, dtype=value_dtype)
+        self.action_attempts = np.zeros((size, k), dtype=count_dtype)
+        self.t = np.zeros(size, dtype=count_dtype)
+
+    def __str__(self):
+        return 'f/{}'.format(str(self.policy))
+
+    def __len__(self):
+        return self.size
+
+    def reset(self, user_ids=None):
+        """
+        Resets the memory of the given users, or of every user.
+        """
+        rows = slice(None) if user_ids is None else np.asarray(user_ids)
+        self._value_estimates[rows] = self.prior
+        self.action_attempts[rows] = 0
+        self.t[rows] = 0
+
+    def view(self, user_ids):
+        user_ids = np.asarray(user_ids)
+        return PoolView(self.k, self._value_estimates[user_ids],
+                        self.action_attempts[user_ids], self.t[user_ids])
+
+    def choose(self, user_ids):
+        """
+        Picks one action for each of `user_ids`.
+        """
+        return self.policy.choose_batch(self.view(user_ids))
+
+    def observe(self, user_ids, actions, rewards):
+        """
+        Records that each of `user_ids` took the matching action and received
+        the matching reward.
+
+        Repeated (user, action) pairs are combined: with sample averages the
+        result is exactly that of observing them one by one; with a constant
+        step size `gamma` they count as that many rewards equal to their mean.
+        """
+        user_ids = np.asarray(user_ids)
+        index = user_ids * self.k + np.asarray(actions)
+        rewards = np.asarray(rewards, dtype=float)
+        index, counts, sums = aggregate(index, rewards, self.size * self.k)
+
+        attempts = self.action_attempts.reshape(-1)
+        values = self._value_estimates.reshape(-1)
+        attempts[index] += counts.astype(attempts.dtype)
+        q = values[index]
+        if self.gamma is None:
+            q += (sums - counts*q) / attempts[index]
+        else:
+            decay = (1 - self.gamma)**counts
+            q = decay*q + (1 - decay)*sums/counts
+        values[index] = q
+        np.add.at(self.t, user_ids, 1)
+
+    def get_state(self):
+        attrs = {'prior': self.prior, 'gamma': self.gamma}
+        arrays = {'value_estimates': self._value_estimates,
+                  'action_attempts': self.action_attempts, 't': self.t}
+        return attrs, arrays
+
+    def set_state(self, attrs, arrays):
+        _check_shape(self, arrays['t'], arrays['action_attempts'])
+        self.prior = attrs['prior']
+        self.gamma = attrs['gamma']
+        self._value_estimates = arrays['value_estimates']
+        self.action_attempts = arrays['action_attempts']
+        self.t = arrays['t']
+
+    @property
+    def value_estimates(self):
+        return self._value_estimates
+
+    @property
+    def nbytes(self):
+        return (self._value_estimates.nbytes + self.action_attempts.nbytes +
+                self.t.nbytes)
+
+
+class BetaAgentPool(AgentPool):
+    """
+    A pool of Beta Agents for binary or binomial rewards out of `n` trials.
+    Each user keeps success and failure counts per arm, i.e. a Beta(1+s, 1+f)
+    posterior. With `ts=True` (Thompson sampling) the value estimates of the
+    chosen users are drawn from their posteriors at `choose` time, so only
+    the users deciding pay for the draws; otherwise the posterior means are
+    used. Pair it with `GreedyPolicy` for plain Beta-Thompson sampling. The
+    draws come from `rng`, as for an `Agent`.
+    """
+    def __init__(self, k, size, policy, n=1, ts=True,
+                 count_dtype=np.int32, rng=None):
+        self.k = k
+        self.rng = as_rng(rng)
+        self.size = size
+        self.policy = policy
+        self.n = n
+        self.ts = ts
+        self.successes = np.zeros((size, k), dtype=count_dtype)
+        self.failures = np.zeros((size, k), dtype=count_dtype)
+        self.t = np.zeros(size, dtype=count_dtype)
+
+    def reset(self, user_ids=None):
+        rows = slice(None) if user_ids is None else np.asarray(user_ids)
+        self.successes[rows] = 0
+        self.failures[rows] = 0
+        self.t[rows] = 0
+
+    def view(self, user_ids):
+        user_ids = np.asarray(user_ids)
+        alpha = 1 + self.successes[user_ids]
+        beta = 1 + self.failures[user_ids]
+        if self.ts:
+            values = self.rng.beta(alpha, beta)
+        else:
+            values = alpha / (alpha + beta)
+        attempts = (self.successes[user_ids] + self.failures[user_ids]) // \
+            self.n
+        return PoolView(self.k, values, attempts, self.t[user_ids])
+
+    def observe(self, user_ids, actions, rewards):
+        """
+        Adds each reward to the successes, and its shortfall from `n` to the
+        failures, of the user's chosen arm. Repeated pairs simply add up.
+        """
+        user_ids = np.asarray(user_ids)
+        index = user_ids * self.k + np.asarray(actions)
+        rewards = np.asarray(rewards, dtype=float)
+        index, counts, sums = aggregate(index, rewards, self.size * self.k)
+
+        dtype = self.successes.dtype
+        self.successes.reshape(-1)[index] += sums.astype(dtype)
+        self.failures.reshape(-1)[index] += (self.n*counts - sums).astype(dtype)
+        np.add.at(self.t, user_ids, 1)
+
+    def get_state(self):
+        attrs = {'n': self.n, 'ts': self.ts}
+        arrays = {'successes': self.successes, 'failures': self.failures,
+                  't': self.t}
+        return attrs, arrays
+
+    def set_state(self, attrs, arrays):
+        _check_shape(self, arrays['t'], arrays['successes'])
+        self.n = attrs['n']
+        self.ts = attrs['ts']
+        self.successes = arrays['successes']
+        self.failures = arrays['failures']
+        self.t = arrays['t']
+
+    @property
+    def action_attempts(self):
+        return (self.successes + self.failures) // self.n
+
+    @property
+    def alpha(self):
+        return 1 + self.successes
+
+    @property
+    def beta(self):
+        return 1 + self.failures
+
+    @property
+    def value_estimates(self):
+        return self.alpha / (self.alpha + self.beta)
+
+    @property
+    def nbytes(self):
+        return self.successes.nbytes + self.failures.nbytes + self.t.nbytes
@@ -0,0 +1,176 @@
+import numpy as np
+
+from bandits.rng import as_rng
+
+
+class BetaPosterior(object):
+    """
+    A Beta posterior over the success probability of each arm. The Beta is the
+    conjugate prior of the Bernoulli and Binomial likelihoods, so observing
+    rewards reduces to adding successes to alpha and failures to beta.
+
+    The parameters are plain arrays of any shape, e.g. (k,) for a single agent
+    or (experiments, k) for a batched run.
+    """
+    def __init__(self, shape, alpha=1, beta=1):
+        self.shape = shape
+        self.alpha_prior = alpha
+        self.beta_prior = beta
+        self.alpha = alpha*np.ones(shape)
+        self.beta = beta*np.ones(shape)
+
+    def reset(self):
+        self.alpha[...] = self.alpha_prior
+        self.beta[...] = self.beta_prior
+
+    def update(self, index, successes, failures):
+        self.alpha[index] += successes
+        self.beta[index] += failures
+
+    def mean(self):
+        return self.alpha / (self.alpha + self.beta)
+
+    def sample(self, rng=None):
+        return as_rng(rng).beta(self.alpha, self.beta)
+
+
+class PyMC3BetaPosterior(BetaPosterior):
+    """
+    A Beta posterior which draws its samples through PyMC3. The posterior
+    arithmetic is identical to `BetaPosterior`; only sampling is delegated.
+    """
+    def __init__(self, shape, alpha=1, beta=1):
+        super(PyMC3BetaPosterior, self).__init__(shape, alpha, beta)
+        import pymc3 as pm
+        self._pm = pm
+
+    def sample(self, rng=None):
+        dist = self._pm.Beta.dist(alpha=self.alpha, beta=self.beta,
+                                  shape=self.alpha.shape)
+        return np.reshape(dist.random(), self.alpha.shape)
+
+
+class NormalPosterior(object):
+    """
+    A Normal posterior over the mean reward of each arm, for Gaussian rewards
+    of known `variance`. The prior on a mean is N(mu, variance/kappa), worth
+    `kappa` observations, and the posterior is N(mu, variance/kappa) again
+    with both parameters updated, so they are all that is kept.
+
+    The parameters are plain arrays of any shape, e.g. (k,) for a single
+    agent or (experiments, k) for a batched run.
+    """
+    PARAMS = ('mu', 'kappa')
+
+    def __init__(self, shape, mu=0, kappa=1, variance=1):
+        self.shape = shape
+        self.mu_prior = mu
+        self.kappa_prior = kappa
+        self.variance = variance
+        self.mu = mu*np.ones(shape)
+        self.kappa = kappa*np.ones(shape)
+
+    def reset(self):
+        self.mu[...] = self.mu_prior
+        self.kappa[...] = self.kappa_prior
+
+    def update(self, index, counts, sums, squares=None):
+        """
+        Adds `counts` rewards summing to `sums` to the arms at `index`, which
+        must not repeat; the sum of their `squares` is only needed when the
+        variance is unknown.
+        """
+        kappa = self.kappa[index]
+        self.mu[index] = (kappa*self.mu[index] + sums) / (kappa + counts)
+        self.kappa[index] = kappa + counts
+
+    def mean(self):
+        return self.mu.copy()
+
+    def sample(self, rng=None):
+        scale = np.sqrt(self.variance / self.kappa)
+        return self.mu + scale*as_rng(rng).standard_normal(self.shape)
+
+
+class NormalGammaPosterior(NormalPosterior):
+    """
+    A Normal-Gamma posterior over the mean and precision of each arm, for
+    Gaussian rewards of unknown variance. The precision tau has a Gamma(alpha,
+    beta) prior and, given tau, the mean a N(mu, 1/(kappa*tau)) one. beta
+    absorbs the rewards' squared deviations as they come in, the numerically
+    stable form of the update.
+    """
+    PARAMS = ('mu', 'kappa', 'alpha', 'beta')
+
+    def __init__(self, shape, mu=0, kappa=1, alpha=1, beta=1):
+        super(NormalGammaPosterior, self).__init__(shape, mu, kappa)
+        self.alpha_prior = alpha
+        self.beta_prior = beta
+        self.alpha = alpha*np.ones(shape)
+        self.beta = beta*np.ones(shape)
+
+    def reset(self):
+        super(NormalGammaPosterior, self).reset()
+        self.alpha[...] = self.alpha_prior
+        self.beta[...] = self.beta_prior
+
+    def update(self, index, counts, sums, squares=None):
+        kappa = self.kappa[index]
+        mean = sums / counts
+        deviation = mean - self.mu[index]
+        self.beta[index] += 0.5*(squares - sums*mean +
+                                 kappa*counts*deviation**2 / (kappa + counts))
+        self.alpha[index] += 0.5*counts
+        super(NormalGammaPosterior, self).update(index, counts, sums)
+
+    def sample(self, rng=None):
+        rng = as_rng(rng)
+        # a standard Gamma scaled down is the cheaper draw from numpy
+        precision = rng.standard_gamma(self.alpha) / self.beta
+        return self.mu + (rng.standard_normal(self.shape) /
+                          np.sqrt(self.kappa*precision))
+
+
+class GammaPosterior(object):
+    """
+    A Gamma posterior over the rate of each arm, for Poisson rewards. The
+    Gamma(alpha, beta) prior is conjugate, so observing rewards reduces to
+    adding their sum to alpha and their count to beta.
+    """
+    PARAMS = ('alpha', 'beta')
+
+    def __init__(self, shape, alpha=1, beta=1):
+        self.shape = shape
+        self.alpha_prior = alpha
+        self.beta_prior = beta
+        self.alpha = alpha*np.ones(shape)
+        self.beta = beta*np.ones(shape)
+
+    def reset(self):
+        self.alpha[...] = self.alpha_prior
+        self.beta[...] = self.beta_prior
+
+    def update(self, index, counts, sums, squares=None):
+        self.alpha[index] += sums
+        self.beta[index] += counts
+
+    def mean(self):
+        return self.alpha / self.beta
+
+    def sample(self, rng=None):
+        return as_rng(rng).standard_gamma(self.alpha) / self.beta
+
+
+BACKENDS = {
+    'numpy': BetaPosterior,
+    'pymc3': PyMC3BetaPosterior,
+}
+
+
+def beta_posterior(shape, backend='numpy'):
+    """
+    Builds a uniform Beta(1, 1) posterior using the requested sampling backend.
+    """
+    if backend not in BACKENDS:
+        raise ValueError('unknown backend {!r}'.format(backend))
+    return BACKENDS[backend](shape)
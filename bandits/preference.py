@@ -0,0 +1,91 @@
+import numpy as np
+
+from bandits.rng import as_rng
+
+
+def softmax(h, axis=-1):
+    """
+    Numerically stable softmax: the largest preference is subtracted before
+    exponentiating so that large preferences cannot overflow.
+    """
+    e = np.exp(h - np.max(h, axis=axis, keepdims=True))
+    return e / np.sum(e, axis=axis, keepdims=True)
+
+
+class PreferenceState(object):
+    """
+    The learned preferences of a Gradient Agent together with the softmax
+    distribution they induce. The distribution and its cumulative sum are
+    cached and only rebuilt after an update, so the policy and the next update
+    share a single exponential pass per step. The step count and reward
+    baseline are maintained incrementally.
+
+    `h` is updated in place; changing it from outside requires a call to
+    `invalidate`.
+    """
+    def __init__(self, h):
+        self.h = h
+        self.n = 0
+        self.baseline = 0
+        self._pi = None
+        self._cdf = None
+
+    def reset(self):
+        self.n = 0
+        self.baseline = 0
+        self.invalidate()
+
+    def invalidate(self):
+        self._pi = None
+        self._cdf = None
+
+    @property
+    def pi(self):
+        if self._pi is None:
+            self._pi = softmax(self.h)
+        return self._pi
+
+    @property
+    def cdf(self):
+        if self._cdf is None:
+            self._cdf = np.cumsum(self.pi)
+        return self._cdf
+
+    def update(self, action, reward, alpha, baseline=True):
+        """
+        Applies one stochastic gradient ascent step for the reward received
+        from `action`.
+        """
+        self.n += 1
+        if baseline:
+            self.baseline += (reward - self.baseline) / self.n
+
+        step = alpha*(reward - self.baseline)
+        self.h -= step*self.pi
+        self.h[action] += step
+        self.invalidate()
+
+    def update_batch(self, actions, counts, sums, alpha, baseline=True):
+        """
+        Applies the summed gradient step of a batch of rewards, given per
+        distinct action as counts and reward sums, with the baseline updated
+        by the whole batch first.
+        """
+        n = np.sum(counts)
+        self.n += n
+        if baseline:
+            self.baseline += (np.sum(sums) - n*self.baseline) / self.n
+
+        steps = alpha*(sums - counts*self.baseline)
+        self.h -= np.sum(steps)*self.pi
+        self.h[actions] += steps
+        self.invalidate()
+
+    def sample(self, rng=None):
+        """
+        Draws an action from the cached softmax distribution.
+        """
+        cdf = self.cdf
+        u = as_rng(rng).next_uniform()
+        action = np.searchsorted(cdf, u*cdf[-1], 'right')
+        return min(action, len(cdf)-1)
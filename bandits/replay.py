@@ -0,0 +1,148 @@
+import numpy as np
+
+LOG_FIELDS = ('arm', 'reward', 'propensity')
+
+
+def save_log(path, arms, rewards, propensities=None):
+    """
+    Writes logged events as a structured .npy file that `read_log` can
+    memory-map.
+    """
+    fields = [('arm', np.int64), ('reward', np.float64)]
+    if propensities is not None:
+        fields.append(('propensity', np.float64))
+    log = np.zeros(len(arms), dtype=fields)
+    log['arm'] = arms
+    log['reward'] = rewards
+    if propensities is not None:
+        log['propensity'] = propensities
+    np.save(path, log)
+
+
+def _columns(chunk):
+    if isinstance(chunk, tuple):
+        arms, rewards = chunk[:2]
+        propensities = chunk[2] if len(chunk) > 2 else None
+    else:
+        arms, rewards = chunk['arm'], chunk['reward']
+        names = chunk.dtype.names
+        propensities = chunk['propensity'] if 'propensity' in names else None
+    return arms, rewards, propensities
+
+
+def _read_csv(path, chunk_size):
+    with open(path) as f:
+        names = [name.strip() for name in f.readline().split(',')]
+        columns = [names.index(field) for field in LOG_FIELDS
+                   if field in names]
+        while True:
+            chunk = np.loadtxt(f, delimiter=',', usecols=columns, ndmin=2,
+                               max_rows=chunk_size)
+            if len(chunk) == 0:
+                return
+            yield tuple(chunk[:, i] for i in range(chunk.shape[1]))
+            if len(chunk) < chunk_size:
+                return
+
+
+def read_log(source, chunk_size=2**20):
+    """
+    Streams a log of (arm, reward[, propensity]) events as chunks of
+    (arms, rewards, propensities) arrays, propensities being None when the
+    log has none. `source` is a structured .npy file (memory-mapped, so only
+    the chunk being replayed is in memory), a .csv file with a header row
+    naming the columns (read `chunk_size` rows at a time), a structured
+    array, or an iterable of such arrays or of (arms, rewards[,
+    propensities]) tuples.
+    """
+    if isinstance(source, str) and source.endswith('.csv'):
+        for chunk in _read_csv(source, chunk_size):
+            yield _columns(chunk)
+        return
+    if isinstance(source, str):
+        source = np.load(source, mmap_mode='r')
+    if isinstance(source, np.ndarray):
+        for start in range(0, len(source), chunk_size):
+            yield _columns(source[start:start+chunk_size])
+        return
+    for chunk in source:
+        yield _columns(chunk)
+
+
+class ReplayEvaluator(object):
+    """
+    A Replay Evaluator scores agents offline on logged bandit data, reading
+    the log once however many agents it evaluates.
+
+    At each logged event every agent chooses an action. If it matches the
+    logged arm the agent observes the logged reward, otherwise the event is
+    skipped for that agent (Li et al. rejection replay). The average reward
+    over matched events is an unbiased estimate of the agent's online reward
+    when the log was collected with uniformly random arms. When the log has
+    propensities, the inverse propensity score, the average over all events
+    of reward/propensity on matches, is reported as well, along with its
+    self-normalized variant, which also corrects non-uniform logging
+    policies.
+    """
+    def __init__(self, agents, label='Replay'):
+        self.agents = agents
+        self.label = label
+
+    def reset(self):
+        for agent in self.agents:
+            agent.reset()
+
+    def run(self, source, chunk_size=2**20, max_events=None):
+        """
+        Replays the log in `source` (see `read_log`) and returns one dict of
+        estimates per agent.
+        """
+        self.reset()
+        n = len(self.agents)
+        events = 0
+        matches = np.zeros(n, dtype=int)
+        rewards = np.zeros(n)
+        ips = np.zeros(n)
+        weights = np.zeros(n)
+        logged_propensities = True
+
+        for arms, chunk_rewards, propensities in read_log(source,
+                                                          chunk_size):
+            if max_events is not None:
+                arms = arms[:max_events - events]
+            if len(arms) == 0:
+                break
+            if propensities is None:
+                logged_propensities = False
+                inverse = np.zeros(len(arms))
+            else:
+                inverse = 1 / np.asarray(propensities[:len(arms)], dtype=float)
+
+            # python scalars are much cheaper to compare and pass around
+            for arm, reward, w in zip(np.asarray(arms).tolist(),
+                                      np.asarray(chunk_rewards[:len(arms)],
+                                                 dtype=float).tolist(),
+                                      inverse.tolist()):
+                for i, agent in enumerate(self.agents):
+                    if agent.choose() != arm:
+                        continue
+                    agent.observe(reward)
+                    matches[i] += 1
+                    rewards[i] += reward
+                    ips[i] += w*reward
+                    weights[i] += w
+            events += len(arms)
+
+        results = []
+        for i, agent in enumerate(self.agents):
+            result = {'agent': str(agent),
+                      'events': events,
+                      'matches': int(matches[i]),
+                      'replay_reward': (float(rewards[i] / matches[i])
+                                        if matches[i] else np.nan)}
+            if logged_propensities:
+                result['ips'] = float(ips[i] / events) if events else np.nan
+                result['snips'] = (float(ips[i] / weights[i]) if weights[i]
+                                   else np.nan)
+            results.append(result)
+        return results
@@ -0,0 +1,174 @@
+import os
+
+import numpy as np
+
+
+class RunningStats(object):
+    """
+    Streaming mean and variance of an array-valued quantity over experiments,
+    using Welford's update for single experiments and Chan et al.'s pairwise
+    merge for blocks of them. Memory is that of two arrays of the quantity's
+    shape, whatever the number of experiments.
+    """
+    def __init__(self, shape):
+        self.n = 0
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def merge(self, n, mean, m2):
+        """
+        Folds in the moments of `n` further experiments.
+        """
+        if n == 0:
+            return
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean = self.mean + delta * n / total
+        self.m2 = self.m2 + m2 + delta**2 * self.n * n / total
+        self.n = total
+
+    @property
+    def variance(self):
+        if self.n < 2:
+            return np.full_like(self.mean, np.nan)
+        return self.m2 / (self.n - 1)
+
+    def half_width(self, z=1.96):
+        """
+        Half-width of the normal confidence interval on the mean.
+        """
+        return z * np.sqrt(self.variance / self.n)
+
+
+class ResultAccumulator(object):
+    """
+    Collects per-experiment results as running statistics, one `RunningStats`
+    per named field, and optionally flushes them to an .npz file every
+    `flush_every` experiments. The file is replaced atomically, so it can be
+    read with `load_results` while a run is still going.
+    """
+    def __init__(self, fields, path=None, flush_every=1):
+        self.fields = dict(fields)
+        self.path = path
+        self.flush_every = flush_every
+        self.stats = dict((name, RunningStats(shape))
+                          for name, shape in self.fields.items())
+        self._unflushed = 0
+
+    @property
+    def n(self):
+        return min(s.n for s in self.stats.values())
+
+    def __getitem__(self, name):
+        return self.stats[name]
+
+    def empty_like(self):
+        """
+        A fresh accumulator with the same fields that does not write to disk.
+        """
+        return ResultAccumulator(self.fields)
+
+    def add(self, **values):
+        """
+        Records the results of one experiment.
+        """
+        for name, value in values.items():
+            self.stats[name].add(value)
+        self._completed(1)
+
+    def merge(self, other):
+        """
+        Folds in the experiments recorded by another accumulator.
+        """
+        for name, stats in other.stats.items():
+            self.stats[name].merge(stats.n, stats.mean, stats.m2)
+        self._completed(other.n)
+
+    def merge_moments(self, n, moments):
+        """
+        Folds in `n` experiments summarised as {name: (mean, m2)}.
+        """
+        for name, (mean, m2) in moments.items():
+            self.stats[name].merge(n, mean, m2)
+        self._completed(n)
+
+    def _completed(self, n):
+        self._unflushed += n
+        if self.path is not None and self._unflushed >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self.path is None:
+            return
+        arrays = {}
+        for name, stats in self.stats.items():
+            arrays[name + '/n'] = stats.n
+            arrays[name + '/mean'] = stats.mean
+            arrays[name + '/m2'] = stats.m2
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, self.path)
+        self._unflushed = 0
+
+
+def load_results(path):
+    """
+    Reads an accumulator written by `ResultAccumulator.flush`.
+    """
+    with np.load(path) as data:
+        names = sorted(set(key.split('/')[0] for key in data.files))
+        results = ResultAccumulator((name, data[name + '/mean'].shape)
+                                    for name in names)
+        for name in names:
+            stats = results.stats[name]
+            stats.n = int(data[name + '/n'])
+            stats.mean = data[name + '/mean']
+            stats.m2 = data[name + '/m2']
+    return results
+
+
+def moments(values, axis=0):
+    """
+    Count, mean and sum of squared deviations of `values` along `axis`.
+    """
+    mean = np.mean(values, axis=axis)
+    m2 = np.sum((values - np.expand_dims(mean, axis))**2, axis=axis)
+    return values.shape[axis], mean, m2
+
+
+def run_until(run, results, field, half_width, max_experiments,
+              block_size=50, z=1.96, index=Ellipsis):
+    """
+    Runs experiments in blocks until the confidence interval on the mean of
+    `results[field][index]` has a half-width of at most `half_width` in every
+    entry, or `max_experiments` have been recorded.
+
+    `run(n)` must run n more experiments and record them into `results`. The
+    first block has `block_size` experiments; after that the block size is
+    estimated from the achieved half-width, which shrinks as 1/sqrt(n),
+    but never more than doubles the experiments so far.
+
+    Returns a report of the experiments run, the achieved (worst entry)
+    half-width, the target and whether it was met.
+    """
+    achieved = np.inf
+    n = block_size
+    while results.n < max_experiments:
+        run(min(n, max_experiments - results.n))
+        if results.n < 2:
+            n = block_size
+            continue
+        achieved = float(np.max(results[field].half_width(z)[index]))
+        if achieved <= half_width:
+            break
+        needed = results.n * ((achieved / half_width)**2 - 1)
+        n = int(min(max(np.ceil(needed), block_size), results.n))
+    return {'experiments': results.n, 'half_width': achieved,
+            'target': half_width, 'converged': achieved <= half_width}
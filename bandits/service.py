@@ -0,0 +1,164 @@
+"""
+An asyncio front end that serves choose/observe requests for an AgentPool.
+
+Not imported by `bandits` itself, to keep asyncio out of the package import.
+"""
+import asyncio
+import itertools
+import time
+from collections import deque
+
+import numpy as np
+
+
+class ServiceStats(object):
+    """
+    Request counts, batch sizes and the latencies of the last `size`
+    requests of each kind, from arrival to reply.
+    """
+    KINDS = ('choose', 'observe')
+
+    def __init__(self, size=10000):
+        self.started = time.perf_counter()
+        self.counts = dict((kind, 0) for kind in self.KINDS)
+        self.batches = 0
+        self.batched = 0
+        self.latencies = dict((kind, deque(maxlen=size))
+                              for kind in self.KINDS)
+
+    def record(self, kind, starts, now):
+        self.counts[kind] += len(starts)
+        self.latencies[kind].extend(now - start for start in starts)
+
+    def batch(self, size):
+        self.batches += 1
+        self.batched += size
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        summary = {'elapsed': elapsed,
+                   'batches': self.batches,
+                   'mean_batch': self.batched / max(self.batches, 1)}
+        for kind in self.KINDS:
+            latencies = np.asarray(self.latencies[kind])
+            p50, p99 = (1000 * np.percentile(latencies, [50, 99])
+                        if len(latencies) else (np.nan, np.nan))
+            summary[kind] = {'count': self.counts[kind],
+                             'per_sec': self.counts[kind] / elapsed,
+                             'p50_ms': p50,
+                             'p99_ms': p99}
+        return summary
+
+
+class DecisionService(object):
+    """
+    A Decision Service accepts concurrent choose and observe requests for the
+    users of an `AgentPool` (a pool of size 1 serves a single agent).
+
+    Every choice is returned with a ticket, and the reward is reported
+    against that ticket, so interleaved requests never mix up their actions
+    the way a shared `last_action` would. Requests arriving within `window`
+    seconds of the first pending one are answered together: pending
+    observations are applied in one vectorized `observe`, then pending
+    choices are made in one vectorized `choose`. A batch is also sent as
+    soon as `max_batch` requests are pending.
+    """
+    def __init__(self, pool, window=0.001, max_batch=4096, stats=None):
+        self.pool = pool
+        self.window = window
+        self.max_batch = max_batch
+        self.stats = ServiceStats() if stats is None else stats
+        self._tickets = {}
+        self._ticket_ids = itertools.count()
+        self._choices = []
+        self._observations = []
+        self._flush_handle = None
+
+    @property
+    def open_tickets(self):
+        return len(self._tickets)
+
+    async def choose(self, user_id=0):
+        """
+        Returns a (ticket, action) pair for `user_id`.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._choices.append((user_id, future, time.perf_counter()))
+        self._schedule()
+        return await future
+
+    async def observe(self, ticket, reward):
+        """
+        Reports the reward of the decision behind `ticket`. Each ticket can be
+        observed once; unknown or reused tickets raise KeyError.
+        """
+        user_id, action = self._tickets.pop(ticket)
+        future = asyncio.get_running_loop().create_future()
+        self._observations.append((user_id, action, reward, future,
+                                   time.perf_counter()))
+        self._schedule()
+        await future
+
+    def discard(self, ticket):
+        """
+        Forgets a decision whose reward will never be reported.
+        """
+        self._tickets.pop(ticket, None)
+
+    def _schedule(self):
+        if len(self._choices) + len(self._observations) >= self.max_batch:
+            self.flush()
+        elif self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.window, self.flush)
+
+    def flush(self):
+        """
+        Answers every pending request now.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        observations, self._observations = self._observations, []
+        choices, self._choices = self._choices, []
+        if observations:
+            self._observe(observations)
+        if choices:
+            self._choose(choices)
+
+    def _observe(self, observations):
+        user_ids, actions, rewards, futures, starts = zip(*observations)
+        try:
+            self.pool.observe(np.array(user_ids), np.array(actions),
+                              np.array(rewards, dtype=float))
+        except Exception as e:
+            _fail(futures, e)
+            return
+        for future in futures:
+            if not future.done():
+                future.set_result(None)
+        self.stats.batch(len(observations))
+        self.stats.record('observe', starts, time.perf_counter())
+
+    def _choose(self, choices):
+        user_ids, futures, starts = zip(*choices)
+        try:
+            actions = self.pool.choose(np.array(user_ids))
+        except Exception as e:
+            _fail(futures, e)
+            return
+        for user_id, action, future in zip(user_ids, actions.tolist(),
+                                           futures):
+            if future.done():
+                continue
+            ticket = next(self._ticket_ids)
+            self._tickets[ticket] = (user_id, action)
+            future.set_result((ticket, action))
+        self.stats.batch(len(choices))
+        self.stats.record('choose', starts, time.perf_counter())
+
+
+def _fail(futures, error):
+    for future in futures:
+        if not future.done():
+            future.set_exception(error)
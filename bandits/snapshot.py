@@ -0,0 +1,120 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b'BANDITS\x00'
+FORMAT_VERSION = 1
+ALIGN = 64
+
+
+def _aligned(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+
+def _plain(value):
+    # numpy scalars are not JSON serializable
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def save_state(path, kind, attrs, arrays):
+    """
+    Writes the state of an object of type `kind` as a snapshot file: a JSON
+    header with the scalar `attrs` and the layout of `arrays`, followed by
+    the raw array data, each array aligned to 64 bytes so it can be
+    memory-mapped in place. The file is replaced atomically.
+    """
+    layout = []
+    header = {'kind': kind,
+              'attrs': dict((name, _plain(value))
+                            for name, value in attrs.items()),
+              'arrays': layout}
+    arrays = [(name, np.ascontiguousarray(array))
+              for name, array in arrays.items()]
+    for name, array in arrays:
+        layout.append([name, array.dtype.str, list(array.shape), 0])
+
+    # the header size depends on the offsets it records, so lay the data out
+    # after a header written with generous placeholders
+    text = json.dumps(header).encode('utf-8')
+    offset = _aligned(len(MAGIC) + 8 + len(text) + 32*len(layout))
+    for entry, (name, array) in zip(layout, arrays):
+        entry[3] = offset
+        offset = _aligned(offset + array.nbytes)
+    text = json.dumps(header).encode('utf-8')
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<II', FORMAT_VERSION, len(text)))
+        f.write(text)
+        for entry, (name, array) in zip(layout, arrays):
+            f.seek(entry[3])
+            f.write(array.tobytes())
+    os.replace(tmp, path)
+
+
+def load_state(path, kind=None, mmap_mode=None):
+    """
+    Reads a snapshot written by `save_state`, returning its (attrs, arrays).
+    If `kind` is given the snapshot must have been saved from that type.
+
+    With `mmap_mode` ('r', 'r+' or 'c', as for `np.load`) arrays are
+    memory-mapped instead of read, so even very large states load at once.
+    'r+' writes later updates through to the file, 'c' keeps them private.
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError('{} is not a bandits snapshot'.format(path))
+        version, length = struct.unpack('<II', f.read(8))
+        if version > FORMAT_VERSION:
+            raise ValueError('snapshot format version {} is newer than the '
+                             'supported version {}'.format(version,
+                                                           FORMAT_VERSION))
+        header = json.loads(f.read(length).decode('utf-8'))
+        if kind is not None and header['kind'] != kind:
+            raise ValueError('snapshot was saved from {}, not {}'.format(
+                header['kind'], kind))
+
+        arrays = {}
+        for name, dtype, shape, offset in header['arrays']:
+            dtype, shape = np.dtype(dtype), tuple(shape)
+            count = int(np.prod(shape))
+            if mmap_mode is not None and count > 0:
+                arrays[name] = np.memmap(path, dtype, mmap_mode, offset,
+                                         shape)
+            else:
+                f.seek(offset)
+                arrays[name] = np.fromfile(f, dtype, count).reshape(shape)
+    return header['attrs'], arrays
+
+
+class Snapshotable(object):
+    """
+    Mixin giving an object `save` and `load` through `get_state` and
+    `set_state`, which return and accept its scalar attributes and arrays.
+    """
+    def get_state(self):
+        raise NotImplementedError
+
+    def set_state(self, attrs, arrays):
+        raise NotImplementedError
+
+    def save(self, path):
+        """
+        Saves the object's learned state to a snapshot file. Policies and
+        bandits are not saved; `load` restores into an object built with them.
+        """
+        save_state(path, type(self).__name__, *self.get_state())
+
+    def load(self, path, mmap_mode=None):
+        """
+        Restores the state saved by `save` from an object of the same type;
+        see `load_state` for `mmap_mode`.
+        """
+        attrs, arrays = load_state(path, type(self).__name__, mmap_mode)
+        self.set_state(attrs, arrays)
+        return self
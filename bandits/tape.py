@@ -0,0 +1,98 @@
+import os
+
+import numpy as np
+
+
+class RewardTape(object):
+    """
+    A Reward Tape pre-draws the randomness of a bandit in blocks, one tape per
+    arm, and gives every agent its own cursor into each arm's tape. The n-th
+    pull of an arm therefore returns the same reward to every agent, so agents
+    are compared on common random numbers (CRN), which removes most of the
+    reward noise from the difference between them.
+
+    The tape holds the bandit's base variates rather than rewards, so it is
+    unaffected by `bandit.reset()`. It is drawn lazily in chunks of `length`
+    per arm, or, when `path` is given, read from a memory-mapped .npy file of
+    shape (experiments, k, length) that is created on first use. Experiment e
+    replays slice e of the file, so repeated runs and other processes opening
+    the same file see exactly the same draws; in a parallel run e counts from
+    the start of the run whichever worker runs it. Arms pulled more than
+    `length` times in an experiment continue with fresh in-memory draws.
+
+    `agents` is the number of cursors, which an `Environment` sets to its
+    number of agents.
+    """
+    def __init__(self, bandit, agents=1, length=1024, path=None,
+                 experiments=1):
+        self.bandit = bandit
+        self.agents = agents
+        self.length = length
+        self.path = path
+        self._file = None
+        if path is not None:
+            self._file = self._open(path, experiments)
+        self._resets = 0
+        self._load(0)
+
+    def _open(self, path, experiments):
+        if not os.path.exists(path):
+            shape = (experiments, self.bandit.k, self.length)
+            block = self.bandit.draw_variates(shape[1:])
+            tape = np.lib.format.open_memmap(path, mode='w+',
+                                             dtype=block.dtype,
+                                             shape=shape + block.shape[2:])
+            tape[0] = block
+            for e in range(1, experiments):
+                tape[e] = self.bandit.draw_variates(shape[1:])
+            tape.flush()
+            del tape
+        return np.load(path, mmap_mode='r')
+
+    def _load(self, experiment):
+        self.cursors = np.zeros((self.agents, self.bandit.k), dtype=int)
+        if self._file is None:
+            self._tapes = [None] * self.bandit.k
+        else:
+            self._tapes = list(self._file[experiment % len(self._file)])
+
+    def resize(self, agents):
+        """
+        Gives the tape one cursor per arm for each of `agents` agents.
+        """
+        self.agents = agents
+        self.cursors = np.zeros((agents, self.bandit.k), dtype=int)
+
+    def seek(self, experiment):
+        """
+        Makes the next `reset` load the draws of `experiment`.
+        """
+        self._resets = experiment
+
+    def reset(self):
+        """
+        Rewinds every cursor and moves on to the next experiment's draws.
+        """
+        self._load(self._resets)
+        self._resets += 1
+
+    def _extend(self, action):
+        tape = self._tapes[action]
+        size = self.length if tape is None else max(self.length, len(tape))
+        block = self.bandit.draw_variates((size,))
+        if tape is not None:
+            block = np.concatenate((tape, block))
+        self._tapes[action] = block
+        return block
+
+    def pull(self, agent, action):
+        """
+        Pulls `action` on behalf of the agent with index `agent`.
+        """
+        n = self.cursors[agent, action]
+        tape = self._tapes[action]
+        if tape is None or n >= len(tape):
+            tape = self._extend(action)
+        self.cursors[agent, action] = n + 1
+        return (self.bandit.reward(action, tape[n]),
+                action == self.bandit.optimal)
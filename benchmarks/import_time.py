@@ -0,0 +1,64 @@
+"""
+Guards the cold-start cost of `import bandits`.
+
+Each measurement imports the package in a fresh interpreter. The reported
+overhead is the median time above a bare `import numpy`, which every
+configuration pays anyway. The run fails if the overhead exceeds the budget
+or if any heavy optional backend was loaded as a side effect.
+
+    python -m benchmarks.import_time [--repeat N] [--budget MS]
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ['matplotlib', 'seaborn', 'scipy', 'pandas', 'pymc3',
+                 'theano']
+
+
+def time_import(statement, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.check_call([sys.executable, '-c', statement])
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2]
+
+
+def loaded_heavy_modules():
+    check = ('import sys, bandits; '
+             'print(" ".join(m for m in {!r} if m in sys.modules))')
+    out = subprocess.check_output([sys.executable, '-c',
+                                   check.format(HEAVY_MODULES)])
+    return out.decode().split()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--budget', type=float, default=50,
+                        help='allowed overhead over numpy in milliseconds')
+    args = parser.parse_args(argv)
+
+    base = time_import('import numpy', args.repeat)
+    full = time_import('import bandits', args.repeat)
+    overhead = 1000 * (full - base)
+    print('import numpy:   {:8.1f} ms'.format(1000 * base))
+    print('import bandits: {:8.1f} ms'.format(1000 * full))
+    print('overhead:       {:8.1f} ms (budget {:.0f} ms)'.format(
+        overhead, args.budget))
+
+    failed = False
+    heavy = loaded_heavy_modules()
+    if heavy:
+        print('FAIL: import bandits loaded {}'.format(', '.join(heavy)))
+        failed = True
+    if overhead > args.budget:
+        print('FAIL: import overhead over budget')
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Times the LinUCB agent for context dimensions d = 10 to 500.
+
+For each d it reports the per-step latency of choose + observe with
+Sherman-Morrison updates, the same with the design matrix re-inverted at
+every step, and the per-context cost of scoring a batch of contexts at once
+with `choose_batch`.
+
+    python -m benchmarks.linear [--k K] [--steps N] [--batch B]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from bandits.agent import LinearAgent
+from bandits.bandit import LinearBandit
+from bandits.policy import LinUCBPolicy
+
+DIMENSIONS = [10, 20, 50, 100, 200, 500]
+
+
+class InvertingLinearAgent(LinearAgent):
+    """
+    Disjoint LinUCB that re-inverts the updated design matrix every step, the
+    O(d^3) baseline for the rank-one updates.
+    """
+    def reset(self):
+        super(InvertingLinearAgent, self).reset()
+        self.a = np.tile(self.lam*np.eye(self.d), (self.k, 1, 1))
+
+    def observe(self, reward):
+        a = self.last_action
+        x = np.asarray(self.context, dtype=float)[a]
+        self.action_attempts[a] += 1
+        self.a[a] += np.outer(x, x)
+        self.a_inv[a] = np.linalg.inv(self.a[a])
+        self.b[a] += reward*x
+        self._coefficients = None
+        self.t += 1
+
+
+def time_steps(bandit, agent, steps):
+    contexts = [bandit.context() for _ in range(steps)]
+    agent.choose(contexts[0])
+    start = time.perf_counter()
+    for context in contexts:
+        action = agent.choose(context)
+        reward, _ = bandit.pull(action)
+        agent.observe(reward)
+    return (time.perf_counter() - start) / steps
+
+
+def time_batch(bandit, agent, size):
+    contexts = np.random.normal(size=(size, bandit.k, bandit.d))
+    start = time.perf_counter()
+    agent.choose_batch(contexts)
+    return (time.perf_counter() - start) / size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--steps', type=int, default=200)
+    parser.add_argument('--batch', type=int, default=256)
+    args = parser.parse_args(argv)
+
+    print('{:>5} {:>14} {:>14} {:>8} {:>14}'.format(
+        'd', 'rank-one (us)', 'inverse (us)', 'speedup', 'batched (us)'))
+    for d in DIMENSIONS:
+        bandit = LinearBandit(args.k, d)
+        fast = time_steps(bandit, LinearAgent(bandit, LinUCBPolicy()),
+                          args.steps)
+        slow = time_steps(bandit, InvertingLinearAgent(bandit,
+                                                       LinUCBPolicy()),
+                          max(args.steps // 4, 10))
+        batched = time_batch(bandit, LinearAgent(bandit, LinUCBPolicy()),
+                             args.batch)
+        print('{:>5} {:>14.1f} {:>14.1f} {:>7.1f}x {:>14.1f}'.format(
+            d, 1e6*fast, 1e6*slow, slow/fast, 1e6*batched))
+
+
+if __name__ == '__main__':
+    main()
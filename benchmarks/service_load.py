@@ -0,0 +1,74 @@
+"""
+Drives a DecisionService with a local open-loop load at a target rate.
+
+Clients arrive as a Poisson process at --qps per second for --duration
+seconds. Each one asks for a decision for a random user, pulls the chosen
+arm of a Gaussian bandit and reports the reward. The run prints the achieved
+throughput, the mean batch size and the p50/p99 latency of choose and
+observe, for each micro-batching window given.
+
+    python -m benchmarks.service_load [--qps Q] [--duration S]
+                                      [--window MS [MS ...]]
+"""
+import argparse
+import asyncio
+
+import numpy as np
+
+from bandits.bandit import GaussianBandit
+from bandits.policy import UCBPolicy
+from bandits.pool import AgentPool
+from bandits.service import DecisionService
+
+
+async def client(service, bandit, user_id):
+    ticket, action = await service.choose(user_id)
+    reward, _ = bandit.pull(action)
+    await service.observe(ticket, reward)
+
+
+async def generate(service, bandit, users, qps, duration):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    arrival = start
+    tasks = []
+    while arrival < start + duration:
+        arrival += np.random.exponential(1 / qps)
+        delay = arrival - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        user_id = np.random.randint(users)
+        tasks.append(loop.create_task(client(service, bandit, user_id)))
+    await asyncio.gather(*tasks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--qps', type=float, default=5000)
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--window', type=float, nargs='+',
+                        default=[0, 1, 5], help='batching windows in ms')
+    parser.add_argument('--users', type=int, default=10**5)
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    bandit = GaussianBandit(args.k)
+    print('{:>10} {:>10} {:>10} {:>10} {:>10} {:>10} {:>10}'.format(
+        'window ms', 'req/s', 'batch', 'choose p50', 'choose p99',
+        'obs p50', 'obs p99'))
+    for window in args.window:
+        pool = AgentPool(args.k, args.users, UCBPolicy(2))
+        service = DecisionService(pool, window=window / 1000)
+        asyncio.run(generate(service, bandit, args.users, args.qps,
+                             args.duration))
+        summary = service.stats.summary()
+        choose, observe = summary['choose'], summary['observe']
+        print('{:>10g} {:>10.0f} {:>10.1f} {:>10.2f} {:>10.2f} {:>10.2f} '
+              '{:>10.2f}'.format(window, choose['per_sec'],
+                                 summary['mean_batch'], choose['p50_ms'],
+                                 choose['p99_ms'], observe['p50_ms'],
+                                 observe['p99_ms']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+"""
+Measures simulation throughput across agents, policies, bandits and arm counts.
+
+Every combination of agent, policy and bandit in the bandits package is
+timed for k = 10 up to --max-k arms, followed by MF-UCB against UCB on a
+multi-fidelity Gaussian bandit for several fidelity counts. Each
+configuration runs --warmup untimed steps, then --repeat rounds of --steps
+timed choose/pull/observe steps, and reports steps per second and the median
+latency of each call for the fastest round. Above 1000 arms the step count
+shrinks in proportion to k, down to --min-steps, so that the largest arm
+counts finish in reasonable time. Results are written as JSON.
+--compare reads a stored baseline and flags configurations whose throughput
+dropped by more than --threshold; the run then exits with status 1.
+
+    python -m benchmarks.throughput [--steps N] [--max-k K] [--filter TEXT]
+                                    [--output FILE] [--compare BASELINE]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+from bandits.agent import (Agent, GradientAgent, BetaAgent, NormalAgent,
+                           PoissonAgent)
+from bandits.bandit import (GaussianBandit, BernoulliBandit, BinomialBandit,
+                            PoissonBandit)
+from bandits.policy import (EpsilonGreedyPolicy, GreedyPolicy, RandomPolicy,
+                            UCBPolicy, IncrementalUCBPolicy, SoftmaxPolicy)
+
+AGENTS = [Agent, GradientAgent, BetaAgent, NormalAgent, PoissonAgent]
+TS_AGENTS = (BetaAgent, NormalAgent, PoissonAgent)
+POLICIES = [lambda: EpsilonGreedyPolicy(0.1), GreedyPolicy, RandomPolicy,
+            lambda: UCBPolicy(2), lambda: IncrementalUCBPolicy(2),
+            SoftmaxPolicy]
+BANDITS = [GaussianBandit, BernoulliBandit, lambda k: BinomialBandit(k, 10),
+           PoissonBandit]
+MF_FIDELITIES = [1, 2, 3, 4]
+MF_ARMS = 500
+
+MF_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'mf_bandits')
+
+
+def time_steps(bandit, agent, steps, warmup):
+    """
+    Times `steps` choose/pull/observe steps, returning per-call latencies in
+    seconds as a (steps, 3) array.
+    """
+    clock = time.perf_counter
+    for _ in range(warmup):
+        action = agent.choose()
+        reward, _ = bandit.pull(action)
+        agent.observe(reward)
+
+    times = np.zeros((steps, 3))
+    for i in range(steps):
+        t0 = clock()
+        action = agent.choose()
+        t1 = clock()
+        reward, _ = bandit.pull(action)
+        t2 = clock()
+        agent.observe(reward)
+        t3 = clock()
+        times[i] = t1 - t0, t2 - t1, t3 - t2
+    return times
+
+
+def summarize(times):
+    median = np.median(times, axis=0)
+    return {'steps_per_sec': len(times) / np.sum(times),
+            'choose_us': 1e6 * median[0],
+            'pull_us': 1e6 * median[1],
+            'observe_us': 1e6 * median[2]}
+
+
+def arm_counts(max_k):
+    k = 10
+    while k <= max_k:
+        yield k
+        k *= 10
+
+
+def bandit_configs(max_k):
+    for k in arm_counts(max_k):
+        for make_bandit in BANDITS:
+            bandit = make_bandit(k)
+            for agent_cls in AGENTS:
+                # the Beta agent needs a binary or binomial reward count
+                if agent_cls is BetaAgent and not hasattr(bandit, 'n'):
+                    continue
+                # the conjugate agents only run on their own reward model
+                if agent_cls is NormalAgent and \
+                        not isinstance(bandit, GaussianBandit):
+                    continue
+                if agent_cls is PoissonAgent and \
+                        not isinstance(bandit, PoissonBandit):
+                    continue
+                for make_policy in POLICIES:
+                    policy = make_policy()
+                    # Thompson sampling agents act greedily on their draws;
+                    # UCB or exploring policies on top are not a real config
+                    if agent_cls in TS_AGENTS and \
+                            not isinstance(policy, GreedyPolicy):
+                        continue
+                    # the UCB index needs updates local to the played arm
+                    if agent_cls is GradientAgent and \
+                            isinstance(policy, IncrementalUCBPolicy):
+                        continue
+                    name = '{}/{}/{}/k={}'.format(
+                        agent_cls.__name__, type(policy).__name__,
+                        type(bandit).__name__, k)
+                    yield (name, bandit, (lambda: agent_cls(bandit, policy)),
+                           k)
+
+
+def mf_configs(k=MF_ARMS):
+    if MF_DIR not in sys.path:
+        sys.path.insert(0, MF_DIR)
+    from mf_agent import Agent as MFAgent
+    from mf_bandits import MF_GaussianBandit
+    from mf_policy import (MF_UCBPolicy, IncrementalMF_UCBPolicy,
+                           UCBPolicy as MFUCBPolicy)
+
+    psi_inv = lambda x: np.power(x, 0.5)
+    rs = np.random.RandomState(0)
+    for m in MF_FIDELITIES:
+        mu = np.c_[rs.uniform(size=(k, m-1)), rs.uniform(size=k)]
+        zeta = np.broadcast_to(np.linspace(0.2, 0, m), (k, m))
+        costs = list(np.geomspace(1, 10**(m-1), m))
+        bandit = MF_GaussianBandit(k, m, mu=mu, sigma=0.5, zeta=zeta,
+                                   costs=costs)
+        for policy_cls in [MF_UCBPolicy, IncrementalMF_UCBPolicy,
+                           MFUCBPolicy]:
+            policy = policy_cls(2, psi_inv)
+            name = 'mf/{}/MF_GaussianBandit/k={},m={}'.format(
+                policy_cls.__name__, k, m)
+            yield (name, bandit,
+                   (lambda: prime_mf(MFAgent(bandit, policy))), k*m)
+
+
+def prime_mf(agent):
+    # one play of every arm at every fidelity, as Environment.pull_all_arms
+    agent.action_attempts[:] = 1
+    agent._value_estimates[:] = np.random.normal(size=(agent.k, agent.m))
+    agent.t = agent.k * agent.m
+    agent.Lambda = agent.k * np.sum(agent.costs)
+    return agent
+
+
+def scaled_steps(steps, size, min_steps):
+    return max(min_steps, min(steps, steps * 1000 // size))
+
+
+def run(configs, steps, warmup, repeat=1, pattern=None, min_steps=50):
+    results = {}
+    for name, bandit, make_agent, size in configs:
+        if pattern is not None and pattern not in name:
+            continue
+        n = scaled_steps(steps, size, min_steps)
+        try:
+            agent = make_agent()
+            times = min((time_steps(bandit, agent, n, warmup if r == 0
+                                    else 0) for r in range(repeat)),
+                        key=np.sum)
+        except Exception as e:
+            results[name] = {'error': '{}: {}'.format(type(e).__name__, e)}
+            print('{:<60} {}'.format(name, results[name]['error']))
+            continue
+        results[name] = summarize(times)
+        print('{:<60} {:>10.0f} {:>9.1f} {:>9.1f} {:>9.1f}'.format(
+            name, results[name]['steps_per_sec'], results[name]['choose_us'],
+            results[name]['pull_us'], results[name]['observe_us']))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Prints the throughput ratio of every configuration present in both runs
+    and returns the names of those that slowed down by more than `threshold`.
+    """
+    regressions = []
+    print('\n{:<60} {:>10} {:>10} {:>7}'.format(
+        'configuration', 'baseline', 'current', 'ratio'))
+    for name, current in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None or 'error' in base or 'error' in current:
+            continue
+        ratio = current['steps_per_sec'] / base['steps_per_sec']
+        flag = ''
+        if ratio < 1 - threshold:
+            regressions.append(name)
+            flag = ' REGRESSION'
+        print('{:<60} {:>10.0f} {:>10.0f} {:>6.2f}x{}'.format(
+            name, base['steps_per_sec'], current['steps_per_sec'], ratio,
+            flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--steps', type=int, default=500)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--min-steps', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-k', type=int, default=10**5)
+    parser.add_argument('--no-mf', action='store_true',
+                        help='skip the multi-fidelity configurations')
+    parser.add_argument('--filter', default=None,
+                        help='only run configurations containing this text')
+    parser.add_argument('--output', default=None,
+                        help='write the results to this JSON file')
+    parser.add_argument('--compare', default=None,
+                        help='baseline JSON file to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed fractional drop in steps per second')
+    args = parser.parse_args(argv)
+
+    np.random.seed(0)
+    print('{:<60} {:>10} {:>9} {:>9} {:>9}'.format(
+        'configuration', 'steps/s', 'choose', 'pull', 'observe'))
+    results = run(bandit_configs(args.max_k), args.steps, args.warmup,
+                  args.repeat, args.filter, args.min_steps)
+    if not args.no_mf:
+        results.update(run(mf_configs(), args.steps, args.warmup,
+                           args.repeat, args.filter, args.min_steps))
+
+    report = {'meta': {'python': platform.python_version(),
+                       'numpy': np.__version__,
+                       'machine': platform.machine(),
+                       'steps': args.steps,
+                       'min_steps': args.min_steps,
+                       'warmup': args.warmup,
+                       'repeat': args.repeat},
+              'results': results}
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print('FAIL: {} configuration(s) slower than baseline'.format(
+                len(regressions)))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
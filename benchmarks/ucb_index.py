@@ -0,0 +1,84 @@
+"""
+Compares per-step choice latency of exact UCB1 against the incremental index.
+
+Each agent is primed with a random history so that every arm has been tried,
+then both policies are timed over the same number of choose/observe steps.
+The agreement column reports how often the incremental choice equals the
+exact one and the worst index shortfall relative to the largest bonus.
+
+    python -m benchmarks.ucb_index [--steps N] [--max-k K]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from bandits.agent import Agent
+from bandits.bandit import GaussianBandit
+from bandits.policy import UCBPolicy, IncrementalUCBPolicy
+
+
+def primed_agent(bandit, policy, history=10):
+    agent = Agent(bandit, policy)
+    agent.action_attempts[:] = np.random.randint(1, history, bandit.k)
+    agent._value_estimates[:] = (bandit.action_values +
+                                 np.random.normal(size=bandit.k) /
+                                 np.sqrt(agent.action_attempts))
+    agent.t = int(np.sum(agent.action_attempts))
+    return agent
+
+
+def time_policy(bandit, agent, steps):
+    start = time.perf_counter()
+    for _ in range(steps):
+        action = agent.choose()
+        reward, _ = bandit.pull(action)
+        agent.observe(reward)
+    return (time.perf_counter() - start) / steps
+
+
+def agreement(bandit, c, tolerance, steps):
+    agent = primed_agent(bandit, UCBPolicy(c))
+    incremental = IncrementalUCBPolicy(c, tolerance)
+    matches, shortfall = 0, 0.0
+    for _ in range(steps):
+        exact = agent.policy.choose(agent)
+        fast = incremental.choose(agent)
+        if exact == fast:
+            matches += 1
+        else:
+            bonus = np.power(np.log(agent.t+1) / agent.action_attempts, 1/c)
+            q = agent.value_estimates + bonus
+            shortfall = max(shortfall, (q[exact] - q[fast]) / np.max(bonus))
+        agent.last_action = exact
+        reward, _ = bandit.pull(exact)
+        agent.observe(reward)
+    return matches / steps, shortfall
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--steps', type=int, default=2000)
+    parser.add_argument('--max-k', type=int, default=10**6)
+    parser.add_argument('--c', type=float, default=2)
+    parser.add_argument('--tolerance', type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    print('{:>9} {:>12} {:>12} {:>8} {:>8} {:>10}'.format(
+        'k', 'exact (us)', 'index (us)', 'speedup', 'agree', 'shortfall'))
+    k = 10
+    while k <= args.max_k:
+        bandit = GaussianBandit(k)
+        exact = time_policy(bandit, primed_agent(bandit, UCBPolicy(args.c)),
+                            args.steps)
+        policy = IncrementalUCBPolicy(args.c, args.tolerance)
+        fast = time_policy(bandit, primed_agent(bandit, policy), args.steps)
+        agree, shortfall = agreement(bandit, args.c, args.tolerance,
+                                     min(args.steps, 500))
+        print('{:>9} {:>12.1f} {:>12.1f} {:>7.1f}x {:>8.3f} {:>10.4f}'.format(
+            k, 1e6*exact, 1e6*fast, exact/fast, agree, shortfall))
+        k *= 10
+
+
+if __name__ == '__main__':
+    main()
@@ -37,6 +37,10 @@ if __name__ == '__main__':
     # example = BinomialExample()
 
     env = Environment(example.bandit, example.agents, example.label)
-    scores, optimal = env.run(trials, experiments)
+    scores, optimal = env.run(trials, experiments, workers=4)
     env.plot_results(scores, optimal)
+
+    # the workers trained their own copies of the agents, so train these
+    # on one serial experiment before plotting what they believe
+    env.run(trials, 1)
     env.plot_beliefs()
@@ -59,5 +59,5 @@ if __name__ == '__main__':
     # example = GradientExample
 
     env = Environment(example.bandit, example.agents, example.label)
-    scores, optimal = env.run(trials, experiments)
+    scores, optimal = env.run(trials, experiments, batch=True)
     env.plot_results(scores, optimal)
@@ -5,10 +5,11 @@
 
 
 import numpy as np
-import pymc3 as pm
 
+from mf_shared import Snapshotable
 
-class Agent(object):
+
+class Agent(Snapshotable):
     """
     An Agent is able to take one of a set of actions at each time step. The
     action is chosen using a strategy based on the history of prior actions
@@ -93,6 +94,24 @@ class Agent(object):
         self.Lambda += self.costs[self.last_action[1]]
 
 
+    def get_state(self):
+        #costs, zeta and gamma_fn come from the bandit the agent is built with
+        attrs = {'t': self.t, 'Lambda': self.Lambda}
+        arrays = {'value_estimates': self._value_estimates,
+                  'action_attempts': self.action_attempts}
+        return attrs, arrays
+
+    def set_state(self, attrs, arrays):
+        if arrays['action_attempts'].shape != (self.k, self.m):
+            raise ValueError('snapshot has shape {}, agent has {} arms and {} '
+                             'fidelities'.format(arrays['action_attempts'].shape,
+                                                 self.k, self.m))
+        self.t = attrs['t']
+        self.Lambda = attrs['Lambda']
+        self._value_estimates = arrays['value_estimates']
+        self.action_attempts = arrays['action_attempts']
+        self.last_action = None
+
     @property
     def value_estimates(self):
         return self._value_estimates
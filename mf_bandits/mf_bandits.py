@@ -5,17 +5,21 @@
 #source: https://github.com/bgalbraith/bandits/blob/master/bandits/bandit.py
 
 import numpy as np
-import pymc3 as pm
 import matplotlib.pyplot as plt
 
+from mf_shared import as_rng
+
 class MF_MultiArmedBandit(object):
 	"""
 	A Multi-fidelity Multi-armed Bandit
 	with k arms and m fidelities (per each arm)
 	and associated costs
+	rewards are drawn from rng (a numpy Generator or seed, or numpy's
+	global state if None)
 	"""
-	def __init__(self, k, m, costs):
+	def __init__(self, k, m, costs, rng=None):
 		self.k = k #number of bandit arms
+		self.rng = as_rng(rng) #source of reward noise
 		self.m = m #number of fidelities per arm
 		self.costs = costs #costs(k,m) cost of playing arm k at fidelity m
 		self.action_values = np.zeros((k,m)) #expected rewards of each arm
@@ -39,8 +43,8 @@ class MF_GaussianBandit(MF_MultiArmedBandit):
 	zeta(k, m) is the bound on the interval about which fidelity m over/undershoots 
 	the mean of the highest fidelity - identical across arms k
 	"""
-	def __init__(self, k, m, mu=0, sigma=1, zeta=0, costs=0):
-		super(MF_GaussianBandit, self).__init__(k,m, costs)
+	def __init__(self, k, m, mu=0, sigma=1, zeta=0, costs=0, rng=None):
+		super(MF_GaussianBandit, self).__init__(k,m, costs, rng)
 		self.mu = mu #mu(k,m) is the mean gaussian reward from arm k at fidelity m
 		self.sigma = sigma #sigma(k,m) is the std dev of gaussian rewards
 		self.zeta = zeta #zeta(k,m) bound on mean over/undershoot by fidelity m
@@ -55,7 +59,11 @@ class MF_GaussianBandit(MF_MultiArmedBandit):
 
 	def pull(self, action):
 		#pulls the bandit arm action[0] at fidelity action[1]
-		return np.random.normal(self.action_values[action[0], action[1]], self.sigma), action==self.optimal
+		#scalar noise comes from the rng's prefetched block of normals
+		sigma = np.asarray(self.sigma)
+		if sigma.ndim > 0:
+			sigma = sigma[action[0], action[1]]
+		return self.action_values[action[0], action[1]] + sigma*self.rng.next_normal(), action==self.optimal
 	
 	def plot_rewards(self):
 		fig, ax = plt.subplots()
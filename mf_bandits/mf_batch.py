@@ -0,0 +1,201 @@
+#mf_batch.py
+#vectorized multi-experiment engine for the multifidelity Environment
+#based on
+#the bandits package batched engine (bandits/batch.py)
+
+#advances many cost-budgeted experiments in lockstep as (experiments,k,m)
+#arrays; experiments whose budget is spent drop out of the computation
+
+import numpy as np
+
+from mf_shared import moments
+
+
+class BatchAgent(object):
+    """
+    Holds the memory of many independent copies of an MF Agent,
+    one row per experiment, so a policy's choose_batch can pick
+    an arm+fidelity for every experiment in one vectorized call
+    """
+    def __init__(self, agent, experiments):
+        self.policy = agent.policy
+        self.k = agent.k
+        self.m = agent.m
+        self.zeta = agent.zeta
+        self.costs = np.asarray(agent.costs, dtype=float)
+        self.gamma_fn = agent.gamma_fn
+        self.experiments = experiments
+        self._value_estimates = np.zeros((experiments, self.k, self.m))
+        self.action_attempts = np.zeros((experiments, self.k, self.m))
+        self.t = np.zeros(experiments)
+        self.Lambda = np.zeros(experiments)
+
+    def choose(self):
+        return self.policy.choose_batch(self)
+
+    def observe(self, rows, arms, fids, rewards):
+        """
+        updates the experiments in rows with the rewards of their pulls
+        """
+        self.action_attempts[rows, arms, fids] += 1
+        g = 1 / self.action_attempts[rows, arms, fids]
+        q = self._value_estimates[rows, arms, fids]
+        self._value_estimates[rows, arms, fids] += g*(rewards - q)
+        self.t[rows] += 1
+        self.Lambda[rows] += self.costs[fids]
+
+    def keep(self, rows):
+        """
+        drops every experiment not in rows
+        """
+        self._value_estimates = self._value_estimates[rows]
+        self.action_attempts = self.action_attempts[rows]
+        self.t = self.t[rows]
+        self.Lambda = self.Lambda[rows]
+        self.experiments = len(rows)
+
+    @property
+    def value_estimates(self):
+        return self._value_estimates
+
+
+def _rewards(bandit, arms, fids):
+    #gaussian rewards w/ scalar or per arm+fidelity std dev
+    sigma = np.asarray(bandit.sigma)
+    if sigma.ndim > 0:
+        sigma = sigma[arms, fids]
+    return bandit.rng.normal(bandit.action_values[arms, fids], sigma)
+
+
+def _affordable_pulls(budget_left, cost):
+    #number of pulls at cost that fit in the remaining budget, guarding
+    #against rounding at the boundary
+    n = np.floor(budget_left / cost)
+    n = np.where(n*cost > budget_left, n-1, n)
+    n = np.where((n+1)*cost <= budget_left, n+1, n)
+    return np.maximum(n, 0)
+
+
+def run_batch(bandit, agent, budgets, experiments=1, results=None,
+              anytime=True, compact=0.25):
+    """
+    Runs all experiments of Environment.run at once, up to the largest of
+    the sorted budgets, and returns the same (plays, regret, optimal_pulls)
+    averages w/ one entry per budget. When a pull would overrun a budget,
+    that budget is snapshot as if the rest of it were spent on the lower
+    fidelities of the chosen arm. Experiments drop out once their largest
+    budget is spent, and the arrays are compacted once a `compact`
+    fraction of the remaining rows has finished.
+    """
+    k, m = bandit.k, bandit.m
+    budgets = np.atleast_1d(np.asarray(budgets, dtype=float))
+    no_budgets = len(budgets)
+    costs = np.asarray(bandit.costs, dtype=float)
+    high_fid_means = bandit.action_values[:, m-1]
+    opt_arm, opt_fid = bandit.optimal
+    optimal_mean_reward = bandit.action_values[opt_arm, opt_fid]
+
+    batch = BatchAgent(agent, experiments)
+    #regret net of the budget term budget*optimal mean
+    regret = np.zeros(experiments)
+    optimal_pulls = np.zeros(experiments)
+    #original experiment of each row, kept through compaction
+    ids = np.arange(experiments)
+    #index of the next budget to snapshot for each experiment
+    next_budget = np.zeros(experiments, dtype=int)
+
+    #per budget snapshots; plays only as sums and sums of squares so
+    #memory does not grow w/ the number of experiments
+    snap_regret = np.zeros((experiments, no_budgets))
+    snap_optimal = np.zeros((experiments, no_budgets))
+    plays_sum = np.zeros((no_budgets, k, m))
+    plays_sq = np.zeros((no_budgets, k, m))
+
+    def snapshot(rows, arms, fids, j):
+        plays = batch.action_attempts[rows]
+        value = np.zeros(len(rows))
+        budget_left = budgets[j] - batch.Lambda[rows]
+        for fid in range(m-2, -1, -1):
+            tail = np.flatnonzero(fids > fid)
+            n = _affordable_pulls(budget_left[tail], costs[fid])
+            plays[tail, arms[tail], fid] += n
+            budget_left[tail] -= n*costs[fid]
+            value[tail] += n*costs[fid]*high_fid_means[arms[tail]]
+        plays_sum[j] += np.sum(plays, axis=0)
+        plays_sq[j] += np.sum(plays**2, axis=0)
+        snap_regret[ids[rows], j] = (budgets[j]*optimal_mean_reward +
+                                     regret[rows] - value)
+        snap_optimal[ids[rows], j] = optimal_pulls[rows]
+        next_budget[rows] += 1
+
+    #pull each arm once at each fidelity (only the highest for UCB)
+    if agent.policy.__str__() == 'MF_UCB':
+        init_fids = np.arange(m)
+    else:
+        init_fids = np.array([m-1])
+    mean = bandit.action_values[:, init_fids]
+    sigma = np.asarray(bandit.sigma)
+    if sigma.ndim > 0:
+        sigma = sigma[:, init_fids]
+    noise = bandit.rng.standard_normal((experiments, k, len(init_fids)))
+    batch.action_attempts[:, :, init_fids] = 1
+    batch._value_estimates[:, :, init_fids] = mean + sigma*noise
+    batch.t[:] = k*len(init_fids)
+    batch.Lambda[:] = k*np.sum(costs[init_fids])
+    regret -= np.sum(costs[init_fids])*np.sum(high_fid_means)
+
+    #budgets already spent by the initial pulls end w/ no tail
+    no_tail = np.zeros(experiments, dtype=int)
+    for j in range(no_budgets):
+        rows = np.flatnonzero((next_budget == j) & (batch.Lambda > budgets[j]))
+        snapshot(rows, no_tail[rows], no_tail[rows], j)
+    live = next_budget < no_budgets
+
+    while np.any(live):
+        arms, fids = batch.choose()
+        rows = np.flatnonzero(live)
+        arms, fids = arms[rows], fids[rows]
+        optimal_pulls[rows] += (arms == opt_arm) & (fids == opt_fid)
+
+        #snapshot every budget that this pull would overrun
+        overrun = batch.Lambda[rows] + costs[fids]
+        for j in range(no_budgets):
+            hit = (next_budget[rows] == j) & (overrun > budgets[j])
+            if np.any(hit):
+                snapshot(rows[hit], arms[hit], fids[hit], j)
+
+        #pulls that fit the largest budget are played as chosen
+        affordable = next_budget[rows] < no_budgets
+        a_rows, a_arms, a_fids = rows[affordable], arms[affordable], \
+            fids[affordable]
+        rewards = _rewards(bandit, a_arms, a_fids)
+        batch.observe(a_rows, a_arms, a_fids, rewards)
+        regret[a_rows] -= costs[a_fids]*high_fid_means[a_arms]
+        live[rows[~affordable]] = False
+
+        #drop finished experiments once enough of them have accumulated
+        done = np.count_nonzero(~live)
+        if done > 0 and done >= compact*len(live):
+            keep = np.flatnonzero(live)
+            batch.keep(keep)
+            regret = regret[keep]
+            optimal_pulls = optimal_pulls[keep]
+            ids = ids[keep]
+            next_budget = next_budget[keep]
+            live = live[keep]
+
+    plays = plays_sum / experiments
+    if results is not None:
+        plays_m2 = np.maximum(plays_sq - experiments*plays**2, 0)
+        _, regret_mean, regret_m2 = moments(snap_regret)
+        _, optimal_mean, optimal_m2 = moments(snap_optimal)
+        stats = {'regret': (regret_mean, regret_m2),
+                 'plays': (plays, plays_m2),
+                 'optimal_pulls': (optimal_mean, optimal_m2)}
+        if not anytime:
+            stats = dict((name, (mean[0], m2[0]))
+                         for name, (mean, m2) in stats.items())
+        results.merge_moments(experiments, stats)
+
+    return (plays, np.mean(snap_regret, axis=0),
+            np.mean(snap_optimal, axis=0))
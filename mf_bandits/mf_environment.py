@@ -14,13 +14,25 @@ import scipy.stats as stats
 from tqdm import tqdm
 
 from mf_agent import Agent
+from mf_batch import run_batch
+from mf_shared import ResultAccumulator, run_parallel, run_until, spawn
 
 
 class Environment(object):
-    def __init__(self, bandit, agent, label='Multi-Armed Bandit'):
+    #hooks is a list of bandits.hooks.Hook notified of experiment starts and
+    #ends, every pull w/ its cost and the pull that exhausts the budget
+    def __init__(self, bandit, agent, label='Multi-Armed Bandit', hooks=None):
         self.bandit = bandit
         self.agent = agent
         self.label = label
+        self.hooks = [] if hooks is None else list(hooks)
+
+    def seed(self, seed=None):
+        #gives the bandit and the agent's policy their own BlockRNG, spawned
+        #from SeedSequence(seed), so a seed reproduces the following runs
+        rngs = spawn(seed, 2)
+        self.bandit.rng = rngs[0]
+        self.agent.policy.rng = rngs[1]
 
     def reset(self):
         self.bandit.reset()
@@ -33,6 +45,7 @@ class Environment(object):
             no_fids = self.bandit.m
         else:
             no_fids=1
+        on_step = [hook.on_step for hook in self.hooks]
 
         #loop over all arms
         for k in range(self.bandit.k):
@@ -52,27 +65,152 @@ class Environment(object):
                 self.agent.observe(reward)
                 plays[k,m] +=1
                 regret -= pull_cost*high_fid_mean_reward
+                for f in on_step:
+                    f(action, reward, pull_cost)
                 if no_fids==1:
                     break
         #return play count, regret      
-        print("regret = ", regret)
         return plays, regret        
 
-    def run(self, COST_CONSTRAINT, experiments=1):
-        #keep track of plays at each arm+fidelity across experiments
-        plays = np.zeros((self.agent.k, self.agent.m))
-        ave_regret = 0
-        optimal_pulls = 0
+    def tail_pulls(self, arm, fidelity_index, budget_left):
+        """
+        closed form of the budget-exhaustion tail: how many pulls of each
+        lower fidelity of arm fit into budget_left, highest fidelity first
+        returns a list of (fidelity, pulls)
+        """
+        pulls = []
+        for fid in range(fidelity_index-1, -1, -1):
+            cost = self.bandit.costs[fid]
+            n = max(int(np.floor(budget_left/cost)), 0)
+            #guard against rounding at the boundary
+            while n > 0 and n*cost > budget_left:
+                n -= 1
+            while (n+1)*cost <= budget_left:
+                n += 1
+            budget_left -= n*cost
+            pulls.append((fid, n))
+        return pulls
+
+    def accumulator(self, path=None, flush_every=1, budgets=None):
+        """
+        makes a result accumulator for run, tracking per experiment
+        the final regret, plays at each arm+fidelity and optimal pulls
+        (mean/variance over experiments, optionally flushed to an npz file)
+        pass the list of budgets when running several budgets at once
+        """
+        lead = () if budgets is None else (len(budgets),)
+        fields = [('regret', lead), ('plays', lead+(self.agent.k, self.agent.m)),
+                  ('optimal_pulls', lead)]
+        return ResultAccumulator(fields, path, flush_every)
+
+    def run(self, COST_CONSTRAINT, experiments=1, workers=None, seed=None,
+            results=None, batch=False):
+        #COST_CONSTRAINT may be a single budget or a sorted list of budgets
+        #a list is run once up to the largest budget, taking a snapshot of
+        #plays, regret and optimal pulls as each smaller budget is crossed,
+        #and returns arrays w/ one entry per budget
+        budgets = np.atleast_1d(np.asarray(COST_CONSTRAINT, dtype=float))
+        if np.any(np.diff(budgets) < 0):
+            raise ValueError('budgets must be sorted in increasing order')
+        anytime = np.ndim(COST_CONSTRAINT) > 0
 
-        for _ in range(experiments):
+        #split experiments over a process pool w/ reproducible seeds
+        #results are identical for a fixed seed whatever the worker count
+        if workers is not None or seed is not None:
+            return run_parallel(self, (COST_CONSTRAINT,), {'batch': batch},
+                                experiments, workers, seed, results=results)
+
+        #advance all experiments in lockstep as (experiments,k,m) arrays
+        if batch:
+            if self.hooks:
+                raise ValueError('hooks are not supported in batch mode')
             self.reset()
-            #initialize regret
+            plays, regrets, optimal = run_batch(self.bandit, self.agent,
+                                                budgets, experiments, results,
+                                                anytime)
+        else:
+            plays, regrets, optimal = self._run(budgets, experiments, results,
+                                                anytime)
+
+        if not anytime:
+            return plays[0], regrets[0], optimal[0]
+        return plays, regrets, optimal
+
+    def run_until(self, COST_CONSTRAINT, half_width, max_experiments=10000,
+                  block_size=50, workers=None, seed=None, batch=False,
+                  z=1.96, results=None):
+        #runs blocks of experiments until the z confidence interval on the
+        #mean regret (at every budget, for a list) has half-width at most
+        #half_width, or max_experiments have run; block sizes as in
+        #bandits.results.run_until
+        #returns plays, regret and optimal pulls like run, plus a report of
+        #the experiments run and the achieved half-width
+        if results is None:
+            budgets = None if np.ndim(COST_CONSTRAINT) == 0 else COST_CONSTRAINT
+            results = self.accumulator(budgets=budgets)
+        seeds = None if seed is None else np.random.SeedSequence(seed)
+
+        def run(n):
+            #each block gets its own child seed, so a seeded run is reproducible
+            block_seed = None
+            if seeds is not None:
+                block_seed = seeds.spawn(1)[0].generate_state(4)
+            self.run(COST_CONSTRAINT, n, workers=workers, seed=block_seed,
+                     results=results, batch=batch)
+
+        report = run_until(run, results, 'regret', half_width, max_experiments,
+                           block_size, z)
+        return (results['plays'].mean, results['regret'].mean,
+                results['optimal_pulls'].mean, report)
+
+    def _run(self, budgets, experiments, results, anytime):
+        COST_CONSTRAINT = budgets[-1]
+        no_budgets = len(budgets)
+        #keep track of plays at each arm+fidelity across experiments,
+        #one snapshot per budget
+        plays = np.zeros((no_budgets, self.agent.k, self.agent.m))
+        ave_regret = np.zeros(no_budgets)
+        optimal_pulls = np.zeros(no_budgets)
+        on_step = [hook.on_step for hook in self.hooks]
+
+        for e in range(experiments):
+            self.reset()
+            for hook in self.hooks:
+                hook.on_experiment_start(self, e)
+            exp_plays = np.zeros((self.agent.k, self.agent.m))
+            exp_optimal_pulls = 0
+            #snapshots of this experiment for each budget
+            snap_plays = np.zeros_like(plays)
+            snap_regret = np.zeros(no_budgets)
+            snap_optimal = np.zeros(no_budgets)
+
+            #regret is tracked net of the budget term budget*optimal mean,
+            #which differs per budget and is added at each snapshot
             optimal_mean_reward = self.bandit.action_values[self.bandit.optimal[0], self.bandit.optimal[1]]
-            regret = COST_CONSTRAINT*optimal_mean_reward
-            print("regret=",regret)
+            regret = 0
+
+            def snapshot(j, arm_index=None, fidelity_index=0):
+                #record budget j as if its tail were spent on lower
+                #fidelities of the arm chosen when it ran out
+                snap_plays[j] = exp_plays
+                snap_regret[j] = budgets[j]*optimal_mean_reward + regret
+                snap_optimal[j] = exp_optimal_pulls
+                if arm_index is None:
+                    return
+                high_fid_mean_reward = self.bandit.action_values[arm_index, self.bandit.m-1]
+                budget_left = budgets[j] - self.agent.Lambda
+                for fid, n in self.tail_pulls(arm_index, fidelity_index, budget_left):
+                    snap_plays[j, arm_index, fid] += n
+                    snap_regret[j] -= n*self.bandit.costs[fid]*high_fid_mean_reward
 
             #pull each arm once at each fidelity to intialize
-            plays, regret = self.pull_all_arms(plays, regret)
+            exp_plays, regret = self.pull_all_arms(exp_plays, regret)
+
+            #smaller budgets already spent by the initial pulls
+            j = 0
+            while j < no_budgets-1 and self.agent.Lambda > budgets[j]:
+                snapshot(j)
+                j += 1
 
             #print("opt arm is arm %d" %self.bandit.optimal[0])
             while  self.agent.Lambda <= COST_CONSTRAINT:
@@ -85,17 +223,24 @@ class Environment(object):
                 # print("arm= %d" %arm_index)
                 # print("fidelity = %d" %fidelity_index)
                 pull_cost = self.bandit.costs[fidelity_index]
-                optimal_pulls += optimal_pull
+                exp_optimal_pulls += optimal_pull
+
+                #snapshot smaller budgets that this pull would overrun
+                while j < no_budgets-1 and self.agent.Lambda+pull_cost > budgets[j]:
+                    snapshot(j, arm_index, fidelity_index)
+                    j += 1
 
                 #check to see if pull is affordable
                 if self.agent.Lambda+pull_cost <= COST_CONSTRAINT:
                     self.agent.observe(reward)
-                    plays[arm_index, fidelity_index]+=1
+                    exp_plays[arm_index, fidelity_index]+=1
                     regret -= pull_cost*high_fid_mean_reward
-                    # print("regret=",regret)
+                    for f in on_step:
+                        f(action, reward, pull_cost)
                 #otherwise, pull lower fidelities of this arm    
                 else: 
-                    print("high fid pulls unaffordable")
+                    for hook in self.hooks:
+                        hook.on_budget_exhausted(self, action)
                     fidelity_index-=1
                     while fidelity_index >= 0:
                         #pull next highest fidelity until unaffordable
@@ -103,19 +248,34 @@ class Environment(object):
                             action = [arm_index,fidelity_index]
                             reward, optimal_pull = self.bandit.pull(action)
                             pull_cost = self.bandit.costs[fidelity_index]
+                            #charge the lower fidelity pull, not the chosen one
+                            self.agent.last_action = action
                             self.agent.observe(reward)
-                            plays[arm_index, fidelity_index] +=1
+                            exp_plays[arm_index, fidelity_index] +=1
                             regret-=pull_cost*high_fid_mean_reward
-                            print("regret=",regret)
-                        print("next fid pulls unaffordable")
+                            for f in on_step:
+                                f(action, reward, pull_cost)
                         #pull lower fidelity    
                         fidelity_index-=1
-                    print("all fidelity pulls unaffordable")
                     break    
 
-                    
-            ave_regret+= regret             
-                   
+            #largest budget, after its tail was actually pulled
+            while j < no_budgets:
+                snapshot(j)
+                j += 1
+            for hook in self.hooks:
+                hook.on_experiment_end(self, e, snap_regret[-1])
+
+            plays += snap_plays
+            ave_regret += snap_regret
+            optimal_pulls += snap_optimal
+            if results is not None and anytime:
+                results.add(regret=snap_regret, plays=snap_plays,
+                            optimal_pulls=snap_optimal)
+            elif results is not None:
+                results.add(regret=snap_regret[0], plays=snap_plays[0],
+                            optimal_pulls=snap_optimal[0])
+
         return plays / experiments, ave_regret / experiments, optimal_pulls / experiments
 
     def plot_plays(self, plays):
@@ -0,0 +1,135 @@
+#mf_index.py
+#incrementally maintained MF-UCB index for the multifidelity policies
+#based on
+#the bandits package UCB index (bandits/index.py)
+
+import heapq
+
+import numpy as np
+
+
+class MF_UCBIndex(object):
+    """
+    An incrementally maintained MF-UCB index over the arms of a single agent.
+
+    An arm's bound is its minimum over fidelities of Q + psi_inv(rho*L/N) +
+    zeta, where L = log(t+1) grows every step. Arms sit in a lazy max-heap
+    keyed by their bound at a frozen L1 = L0*(1+tolerance), which is an upper
+    bound on the current one while L <= L1, for an increasing psi_inv.
+    Choosing pops arms in key order, scoring each exactly at the current L
+    in O(m), until the best exact bound is above every remaining key, so the
+    chosen arm is the one a full scan would pick, ties going to the lowest
+    arm. The keys are rebuilt once L passes L1.
+
+    Only the arm just played is rekeyed after an observation, in O(m + log
+    k), so a step costs O(m + log k) times the few arms whose keys reach the
+    best bound, against O(k*m) for the scan. The gain grows with k; with few
+    arms or a single fidelity the vectorized scan is as fast or faster.
+    """
+    def __init__(self, rho, psi_inv, tolerance=1e-4, min_steps=32):
+        self.rho = rho
+        self.psi_inv = psi_inv
+        self.tolerance = tolerance
+        self.min_steps = min_steps
+        self.t = None
+        self._heap = []
+        self._keys = None
+        self._log_t1 = 0
+
+    def bounds(self, agent, arms, log_t):
+        """
+        Exploration terms and bounds of the given arms at log_t, computed as
+        MF_UCBPolicy.choose does.
+        """
+        attempts = agent.action_attempts[arms]
+        if attempts.all():
+            #the usual case, without the cost of an errstate block
+            exploration = self.rho*log_t/attempts
+        else:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                exploration = self.rho*log_t/attempts
+            exploration[np.isnan(exploration)] = 0
+        exploration = self.psi_inv(exploration)
+        q = agent.value_estimates[arms] + exploration + agent.zeta[arms]
+        return exploration, q
+
+    def rebuild(self, agent):
+        """
+        Rekeys every arm against the agent's current memory, O(k*m + k log k).
+        """
+        #frozen for at least `min_steps` plays, as early in a run log(t+1)
+        #grows by more than the tolerance every step
+        self._log_t1 = max(np.log(agent.t+1)*(1+self.tolerance),
+                           np.log(agent.t+1+self.min_steps))
+        _, q = self.bounds(agent, slice(None), self._log_t1)
+        keys = np.amin(q, axis=1)
+        self._keys = keys
+
+        #a list sorted on (-key, arm) is already a valid heap
+        order = np.lexsort((np.arange(len(keys)), -keys))
+        self._heap = list(zip((-keys[order]).tolist(), order.tolist()))
+        self.t = agent.t
+
+    def update(self, agent, arm):
+        """
+        Rekeys a single arm after one of its cells changed, O(m + log k).
+        """
+        _, q = self.bounds(agent, arm, self._log_t1)
+        key = float(q.min())
+        self._keys[arm] = key
+        heapq.heappush(self._heap, (-key, arm))
+
+    def sync(self, agent):
+        """
+        Brings the index up to date with the agent. A single observation,
+        which changes only the cell of agent.last_action, is applied
+        incrementally; anything else, such as a reset or the initial pulls
+        of every arm, triggers a full rebuild.
+        """
+        if self.t == agent.t:
+            return
+        if (self.t is not None and agent.t == self.t+1 and
+                agent.last_action is not None and
+                np.log(agent.t+1) <= self._log_t1 and
+                len(self._heap) <= 2*len(self._keys) + 64):
+            self.t = agent.t
+            self.update(agent, int(agent.last_action[0]))
+        else:
+            self.rebuild(agent)
+
+    def choose(self, agent, batch=4):
+        """
+        Returns the arm with the highest bound and its exploration terms.
+        Candidates are popped and scored `batch` at a time, which costs
+        about as much as scoring one.
+        """
+        self.sync(agent)
+        log_t = np.log(agent.t+1)
+        heap = self._heap
+        keys = self._keys
+        popped = []
+        best, best_bound, best_exploration = None, None, None
+        while heap:
+            arms = []
+            while heap and len(arms) < batch:
+                key, arm = -heap[0][0], heap[0][1]
+                if key != keys[arm]:
+                    #stale entry from an earlier key of this arm
+                    heapq.heappop(heap)
+                    continue
+                if best is not None and key < best_bound:
+                    break
+                popped.append(heapq.heappop(heap))
+                arms.append(arm)
+            if not arms:
+                break
+            exploration, q = self.bounds(agent, arms, log_t)
+            for i, bound in enumerate(q.min(axis=1).tolist()):
+                arm = arms[i]
+                if (best is None or bound > best_bound or
+                        (bound == best_bound and arm < best)):
+                    best, best_bound = arm, bound
+                    best_exploration = exploration[i]
+        for entry in popped:
+            heapq.heappush(heap, entry)
+        return best, best_exploration
@@ -4,13 +4,23 @@
 #source: https://github.com/bgalbraith/bandits/blob/master/bandits/policy.py
 
 
+import weakref
+
 import numpy as np
 
+from mf_index import MF_UCBIndex
+from mf_shared import as_rng, random_argmax
+
 
 class Policy(object):
     """
     A policy prescribes an action to be taken based on the memory of an agent.
+    random choices are drawn from rng (a numpy Generator or seed, or numpy's
+    global state if None)
     """
+    def __init__(self, rng=None):
+        self.rng = as_rng(rng)
+
     def __str__(self):
         return 'generic policy'
 
@@ -26,7 +36,8 @@ class UCBPolicy(Policy):
 
     ONLY LOOKS AT HIGHEST FIDELITY
     """
-    def __init__(self, rho, psi_inv):
+    def __init__(self, rho, psi_inv, rng=None):
+        super(UCBPolicy, self).__init__(rng)
         self.psi_inv = psi_inv
         self.rho = rho
     
@@ -49,15 +60,30 @@ class UCBPolicy(Policy):
         max_arm_index = np.argmax(q_arms)
         #print(max_arm_index)
         
+        #break ties between best arms at random
+        ties = np.flatnonzero(q_arms == q_arms[max_arm_index])
+        if len(ties) > 1:
+            max_arm_index = ties[self.rng.next_integer(len(ties))]
+
         #play best arm at highest fidelity
-        action=[max_arm_index,agent.m-1]
-        check = np.where(q == action)[0]
-        if check.shape[0] == 0:
-            return action
-        else:
-            return np.random.choice(check)
+        return [max_arm_index,agent.m-1]
+
+    def choose_batch(self, agent):
+        """
+        vectorized choose for a BatchAgent holding (experiments,k,m) arrays
+        returns arrays of arms and fidelities, one per experiment
+        """
+        #only the highest fidelity column matters
+        log_t = np.log(agent.t+1)[:, np.newaxis]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            exploration = self.rho*log_t/agent.action_attempts[:, :, agent.m-1]
+        exploration[np.isinf(exploration)] = 0
+        exploration = self.psi_inv(exploration)
 
-        #return action
+        q_arms = agent.value_estimates[:, :, agent.m-1] + exploration
+        #break ties between best arms at random, as choose does
+        arms = random_argmax(q_arms, self.rng)
+        return arms, np.full_like(arms, agent.m-1)
 
 class MF_UCBPolicy(Policy):
     """
@@ -65,7 +91,8 @@ class MF_UCBPolicy(Policy):
     factor to the expected value of each arm which can influence a greedy
     selection strategy to more intelligently explore less confident options.
     """
-    def __init__(self, rho, psi_inv):
+    def __init__(self, rho, psi_inv, rng=None):
+        super(MF_UCBPolicy, self).__init__(rng)
         self.rho = rho
         self.psi_inv = psi_inv
 
@@ -104,4 +131,73 @@ class MF_UCBPolicy(Policy):
             #if low fidelities all certain, play at highest fidelity
             action=[max_arm_index,agent.m-1]
 
-        return action
\ No newline at end of file
+        return action
+
+    def choose_batch(self, agent):
+        """
+        vectorized choose for a BatchAgent holding (experiments,k,m) arrays
+        returns arrays of arms and fidelities, one per experiment
+        """
+        log_t = self.rho*np.log(agent.t+1)[:, np.newaxis, np.newaxis]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            exploration = log_t/agent.action_attempts
+        exploration[np.isnan(exploration)] = 0
+        exploration = self.psi_inv(exploration)
+
+        #min q bound across fidelities, then best arm per experiment
+        #(built in place, and a running minimum over the few fidelity
+        #columns is much faster than reducing along the short last axis)
+        q = exploration
+        q += agent.value_estimates
+        q += agent.zeta
+        min_arm_bounds = q[:, :, 0].copy()
+        for m in range(1, agent.m):
+            np.minimum(min_arm_bounds, q[:, :, m], out=min_arm_bounds)
+        arms = np.argmax(min_arm_bounds, axis=1)
+
+        #lowest fidelity whose exploration term still exceeds gamma,
+        #otherwise the highest fidelity
+        rows = np.arange(len(arms))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            arm_exploration = (log_t[:, 0] /
+                               agent.action_attempts[rows, arms, :agent.m-1])
+        arm_exploration[np.isnan(arm_exploration)] = 0
+        arm_exploration = self.psi_inv(arm_exploration)
+        uncertain = arm_exploration >= agent.gamma_fn
+        fids = np.where(np.any(uncertain, axis=1),
+                        np.argmax(uncertain, axis=1), agent.m-1)
+        return arms, fids
+
+
+class IncrementalMF_UCBPolicy(MF_UCBPolicy):
+    """
+    MF-UCB backed by an incrementally maintained index over the arms (see
+    MF_UCBIndex), making each choice O(m + log k) instead of O(k*m) while
+    choosing exactly the same actions as MF_UCBPolicy.
+
+    The index assumes each observation only changes the cell of the agent's
+    last action, as with the MF Agent; any other change to the agent's
+    memory, such as a reset, is detected from its play count and handled
+    with a full rebuild. psi_inv must be increasing.
+    """
+    def __init__(self, rho, psi_inv, tolerance=1e-4, rng=None):
+        super(IncrementalMF_UCBPolicy, self).__init__(rho, psi_inv, rng)
+        self.tolerance = tolerance
+        self._indexes = weakref.WeakKeyDictionary()
+
+    def __str__(self):
+        #same algorithm, so the environment initializes it as MF-UCB
+        return 'MF_UCB'
+
+    def choose(self, agent):
+        index = self._indexes.get(agent)
+        if index is None:
+            index = MF_UCBIndex(self.rho, self.psi_inv, self.tolerance)
+            self._indexes[agent] = index
+        arm, exploration = index.choose(agent)
+
+        #lowest fidelity still uncertain, otherwise the highest
+        for m in range(agent.m-1):
+            if exploration[m] >= agent.gamma_fn[m]:
+                return [arm, m]
+        return [arm, agent.m-1]
@@ -0,0 +1,19 @@
+#mf_shared.py
+#the helpers the multifidelity classes share with the bandits package:
+#random number sources, tie-breaking, snapshots, result accumulators, hooks
+#and the parallel runner. The scripts in this directory import each other by
+#name, so the repository root is put on the path to reach the bandits package.
+
+import os
+import sys
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+from bandits.hooks import Hook, ProgressHook, SampledLogHook
+from bandits.parallel import run_parallel
+from bandits.policy import random_argmax
+from bandits.results import ResultAccumulator, moments, run_until
+from bandits.rng import BlockRNG, LegacyRNG, as_rng, spawn
+from bandits.snapshot import Snapshotable, load_state, save_state
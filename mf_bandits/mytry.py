@@ -94,14 +94,11 @@ if __name__ == '__main__':
 
     #regret vs cost increases 
     cost_constraints = np.linspace(0.5*(10**5), 5*(10**5), num=10)
-    regrets = np.zeros_like(cost_constraints)
-    regrets2= np.zeros_like(cost_constraints)
-
-    for k in tqdm(range(len(cost_constraints))):
-        plays, regrets[k] = env1.run(cost_constraints[k], experiments)
-        plays2, regrets2[k] = env1_single.run(cost_constraints[k], experiments)
-        #plot arm+fidelity plays
-        #env1.plot_plays(plays)
+    #one run per bandit, w/ a snapshot as each budget is crossed
+    plays, regrets, optimal_pulls = env1.run(cost_constraints, experiments)
+    plays2, regrets2, optimal_pulls2 = env1_single.run(cost_constraints, experiments)
+    #plot arm+fidelity plays at budget k
+    #env1.plot_plays(plays[k])
 
     #plot regret vs cost
     env1.plot_cost_vs_regret(cost_constraints, regrets)
@@ -119,14 +116,11 @@ if __name__ == '__main__':
 
     #regret vs cost increases 
     cost_constraints = np.linspace(0.5*(10**5), 5*(10**5), num=10)
-    regrets = np.zeros_like(cost_constraints)
-    regrets2= np.zeros_like(cost_constraints)
-
-    for k in tqdm(range(len(cost_constraints))):
-        plays, regrets[k] = env2.run(cost_constraints[k], experiments)
-        plays, regrets2[k] = env2_single.run(cost_constraints[k], experiments)
-        #plot arm+fidelity plays
-        #env2.plot_plays(plays)
+    #one run per bandit, w/ a snapshot as each budget is crossed
+    plays, regrets, optimal_pulls = env2.run(cost_constraints, experiments)
+    plays2, regrets2, optimal_pulls2 = env2_single.run(cost_constraints, experiments)
+    #plot arm+fidelity plays at budget k
+    #env2.plot_plays(plays[k])
 
    # env2.plot_cost_vs_regret(cost_constraints, regrets)
     #plot regret vs cost
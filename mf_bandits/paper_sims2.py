@@ -81,14 +81,13 @@ if __name__ == '__main__':
 	cost_constraints = [0.25*(10**5), 0.5*(10**5), 1*(10**5), 1.5*(10**5), 2*(10**5), 2.5*(10**5),
 						 3*(10**5), 3.5*(10**5), 4*(10**5), 4.5*(10**5), 5*(10**5)]
 	print(cost_constraints)
-	regrets = np.zeros_like(cost_constraints)
-	regrets2 = np.zeros_like(regrets)
 
-	for k in tqdm(range(len(cost_constraints))):
-		plays, regrets[k], optimal_pulls = env_mf.run(cost_constraints[k], experiments)
-		plays2, regrets2[k], optimal_pulls2 = env_single.run(cost_constraints[k], experiments)
-		print("optimal pulls w/ MF = %d" %optimal_pulls)
-		print("opt pulls w/ single fid = %d" %optimal_pulls2)
+	#one run per bandit, w/ a snapshot as each budget is crossed
+	plays, regrets, optimal_pulls = env_mf.run(cost_constraints, experiments)
+	plays2, regrets2, optimal_pulls2 = env_single.run(cost_constraints, experiments)
+	for k in range(len(cost_constraints)):
+		print("optimal pulls w/ MF = %d" %optimal_pulls[k])
+		print("opt pulls w/ single fid = %d" %optimal_pulls2[k])
 
 	#plot regret vs cost
 	plt.plot(cost_constraints, regrets, color='b', label='MF-UCB')
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# the multi-fidelity modules are flat scripts importing each other by name
+MF_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'mf_bandits')
+if MF_DIR not in sys.path:
+    sys.path.append(MF_DIR)
@@ -0,0 +1,112 @@
+"""
+Batch mode against the scalar agents and policies it vectorizes.
+"""
+import numpy as np
+import pytest
+
+from bandits.agent import (Agent, GradientAgent, SlidingWindowAgent,
+                           DiscountedAgent, DiscountedBetaAgent, SparseAgent)
+from bandits.bandit import BernoulliBandit, GaussianBandit
+from bandits.batch import batch_agent
+from bandits.environment import Environment
+from bandits.policy import GreedyPolicy, SoftmaxPolicy, UCBPolicy
+
+
+def scalar_copies(batch, make_agent):
+    agents = []
+    for e in range(batch.experiments):
+        agent = make_agent()
+        agent._value_estimates = batch.value_estimates[e].copy()
+        agent.action_attempts = batch.action_attempts[e].copy()
+        agent.t = batch.t
+        agents.append(agent)
+    return agents
+
+
+@pytest.mark.parametrize('make_policy', [GreedyPolicy,
+                                         lambda: UCBPolicy(2)])
+def test_choose_batch_matches_choose(make_policy):
+    bandit = GaussianBandit(10, rng=0)
+    policy = make_policy()
+    batch = batch_agent(Agent(bandit, policy), 20)
+    rng = np.random.default_rng(1)
+    batch._value_estimates = rng.normal(size=(20, 10))
+    batch.action_attempts = rng.integers(1, 10, size=(20, 10)).astype(float)
+    batch.t = 50
+
+    agents = scalar_copies(batch, lambda: Agent(bandit, policy))
+    expected = [agent.choose() for agent in agents]
+    np.testing.assert_array_equal(batch.choose(), expected)
+
+
+@pytest.mark.parametrize('gamma', [None, 0.1])
+def test_batch_observe_matches_observe(gamma):
+    bandit = GaussianBandit(5, rng=0)
+    batch = batch_agent(Agent(bandit, GreedyPolicy(), gamma=gamma), 8)
+    agents = scalar_copies(
+        batch, lambda: Agent(bandit, GreedyPolicy(), gamma=gamma))
+    rng = np.random.default_rng(2)
+    for _ in range(30):
+        actions = rng.integers(5, size=8)
+        rewards = rng.normal(size=8)
+        batch.last_action = actions
+        batch.observe(rewards)
+        for agent, action, reward in zip(agents, actions, rewards):
+            agent.last_action = action
+            agent.observe(reward)
+
+    for e, agent in enumerate(agents):
+        np.testing.assert_allclose(batch.value_estimates[e],
+                                   agent.value_estimates)
+        np.testing.assert_array_equal(batch.action_attempts[e],
+                                      agent.action_attempts)
+
+
+def test_batch_gradient_observe_matches_observe():
+    bandit = GaussianBandit(5, rng=0)
+    batch = batch_agent(GradientAgent(bandit, SoftmaxPolicy()), 4)
+    agents = [GradientAgent(bandit, SoftmaxPolicy()) for _ in range(4)]
+    rng = np.random.default_rng(3)
+    for _ in range(30):
+        actions = rng.integers(5, size=4)
+        rewards = rng.normal(size=4)
+        batch.last_action = actions
+        batch.observe(rewards)
+        for agent, action, reward in zip(agents, actions, rewards):
+            agent.last_action = action
+            agent.observe(reward)
+
+    for e, agent in enumerate(agents):
+        np.testing.assert_allclose(batch.value_estimates[e],
+                                   agent.value_estimates)
+        np.testing.assert_allclose(batch.average_reward[e],
+                                   agent.average_reward)
+
+
+def test_batch_run_agrees_with_scalar_run():
+    p = np.array([0.2, 0.4, 0.5, 0.7, 0.8])
+    bandit = BernoulliBandit(5, p=p)
+    env = Environment(bandit, [Agent(bandit, UCBPolicy(2)),
+                               Agent(bandit, GreedyPolicy())])
+    env.seed(0)
+    scores, optimal = env.run(100, 400)
+    batch_scores, batch_optimal = env.run(100, 400, batch=True)
+
+    # averages over 400 experiments and the last 50 trials
+    np.testing.assert_allclose(batch_scores[50:].mean(axis=0),
+                               scores[50:].mean(axis=0), atol=0.03)
+    np.testing.assert_allclose(batch_optimal[50:].mean(axis=0),
+                               optimal[50:].mean(axis=0), atol=0.08)
+
+
+@pytest.mark.parametrize('make_agent', [
+    lambda b: SlidingWindowAgent(b, GreedyPolicy(), window=20),
+    lambda b: DiscountedAgent(b, GreedyPolicy()),
+    lambda b: DiscountedBetaAgent(b, GreedyPolicy()),
+    lambda b: SparseAgent(b, UCBPolicy(2)),
+])
+def test_batch_mode_rejects_agents_without_a_batched_counterpart(make_agent):
+    bandit = BernoulliBandit(5)
+    env = Environment(bandit, [make_agent(bandit)])
+    with pytest.raises(TypeError):
+        env.run(10, 4, batch=True)
@@ -0,0 +1,43 @@
+"""
+Contextual agents run by an Environment.
+"""
+import pytest
+
+from bandits.agent import Agent, LinearAgent
+from bandits.bandit import GaussianBandit, LinearBandit
+from bandits.environment import Environment
+from bandits.policy import LinUCBPolicy, RandomPolicy
+
+
+def test_environment_draws_contexts_for_linear_agents():
+    bandit = LinearBandit(5, 3, rng=0)
+    env = Environment(bandit, [LinearAgent(bandit, LinUCBPolicy()),
+                               Agent(bandit, RandomPolicy())])
+    env.seed(0)
+    _, optimal = env.run(300, 2)
+
+    # LinUCB learns the coefficients, random play stays at 1/k
+    assert optimal[-100:, 0].mean() > 0.8
+    assert optimal[-100:, 1].mean() < 0.4
+
+
+def test_contextual_batch_mode_is_rejected():
+    bandit = LinearBandit(5, 3, rng=0)
+    env = Environment(bandit, [LinearAgent(bandit, LinUCBPolicy())])
+    with pytest.raises(ValueError):
+        env.run(10, 2, batch=True)
+
+
+def test_contextual_slates_are_rejected():
+    bandit = LinearBandit(5, 3, rng=0)
+    env = Environment(bandit, [LinearAgent(bandit, LinUCBPolicy())],
+                      slate=2)
+    with pytest.raises(ValueError):
+        env.run(10)
+
+
+def test_contextual_agent_needs_contextual_bandit():
+    bandit = GaussianBandit(5, rng=0)
+    linear = LinearAgent(LinearBandit(5, 3), LinUCBPolicy())
+    with pytest.raises(ValueError):
+        Environment(bandit, [linear]).run(10)
@@ -0,0 +1,88 @@
+"""
+Simulation event hooks and cost-budget signalling.
+"""
+import io
+import logging
+
+import numpy as np
+
+from bandits.agent import Agent
+from bandits.bandit import GaussianBandit
+from bandits.environment import Environment
+from bandits.hooks import Hook, ProgressHook, SampledLogHook
+from bandits.policy import EpsilonGreedyPolicy
+from mf_agent import Agent as MFAgent
+from mf_bandits import MF_GaussianBandit
+from mf_environment import Environment as MFEnvironment
+from mf_policy import MF_UCBPolicy
+
+
+class Record(Hook):
+    def __init__(self):
+        self.starts = 0
+        self.ends = 0
+        self.exhausted = 0
+        self.costs = []
+
+    def on_experiment_start(self, env, experiment):
+        self.starts += 1
+        self.costs.append(0)
+
+    def on_step(self, action, reward, cost):
+        self.costs[-1] += cost
+
+    def on_budget_exhausted(self, env, action):
+        self.exhausted += 1
+
+    def on_experiment_end(self, env, experiment, regret):
+        self.ends += 1
+
+
+def test_trial_runs_have_no_budget():
+    bandit = GaussianBandit(5, rng=0)
+    record = Record()
+    env = Environment(bandit, [Agent(bandit, EpsilonGreedyPolicy(0.1)),
+                               Agent(bandit, EpsilonGreedyPolicy(0.2))],
+                      hooks=[record])
+    env.run(30, 3)
+    assert (record.starts, record.ends, record.exhausted) == (3, 3, 0)
+    # one unit of cost per pull of every agent
+    assert record.costs == [60, 60, 60]
+
+
+def test_mf_budget_is_signalled_once_per_experiment():
+    k = 8
+    means = np.tile(np.linspace(0, 1, k)[:, np.newaxis], (1, 2))
+    bandit = MF_GaussianBandit(k, 2, mu=means, sigma=0.2,
+                               zeta=np.zeros((k, 2)), costs=[1, 10])
+    record = Record()
+    env = MFEnvironment(bandit, MFAgent(bandit, MF_UCBPolicy(2, np.sqrt)),
+                        hooks=[record])
+    env.seed(0)
+    env.run(500, 4)
+    assert (record.starts, record.ends, record.exhausted) == (4, 4, 4)
+    # the tail spends the budget down to less than the cheapest pull
+    for cost in record.costs:
+        assert 499 < cost <= 500
+
+
+def test_progress_and_log_hooks():
+    bandit = GaussianBandit(3, rng=0)
+    stream = io.StringIO()
+    logger = logging.getLogger('bandits.test_hooks')
+    logger.setLevel(logging.DEBUG)
+    lines = []
+    handler = logging.Handler()
+    handler.emit = lambda r: lines.append(r.getMessage())
+    logger.addHandler(handler)
+    env = Environment(bandit, [Agent(bandit, EpsilonGreedyPolicy(0.1))],
+                      label='run',
+                      hooks=[ProgressHook(4, stream=stream),
+                             SampledLogHook(every=10, logger=logger)])
+    env.run(25, 4)
+    logger.removeHandler(handler)
+
+    assert stream.getvalue().endswith('\rrun: experiment 4/4\n')
+    assert lines[0].startswith('step 10: action=')
+    assert sum(line.startswith('experiment ') for line in lines) == 4
+    assert sum(line.startswith('step ') for line in lines) == 8
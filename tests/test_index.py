@@ -0,0 +1,113 @@
+"""
+The incremental UCB index against exact UCB1.
+"""
+import numpy as np
+import pytest
+
+from bandits.agent import (Agent, SparseAgent, SlidingWindowAgent,
+                           DiscountedAgent)
+from bandits.bandit import GaussianBandit
+from bandits.policy import IncrementalUCBPolicy, UCBPolicy
+
+
+def exact_ucb(agent, c):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bonus = np.power(np.log(agent.t+1) / agent.action_attempts, 1/c)
+    bonus[agent.action_attempts == 0] = np.inf
+    return agent.value_estimates + bonus, bonus
+
+
+@pytest.mark.parametrize('tolerance', [0.05, 0.2])
+def test_choice_within_tolerance_of_exact_ucb(tolerance):
+    c = 2
+    bandit = GaussianBandit(50, rng=0)
+    agent = Agent(bandit, IncrementalUCBPolicy(c, tolerance), rng=1)
+    for _ in range(3000):
+        action = agent.choose()
+        if agent.t > 0:
+            u, bonus = exact_ucb(agent, c)
+            if np.isinf(u).any():
+                assert np.isinf(u[action])
+            else:
+                assert u[action] >= u.max() - tolerance*bonus.max() - 1e-12
+        reward, _ = bandit.pull(action)
+        agent.observe(reward)
+
+
+def test_zero_tolerance_matches_exact_ucb():
+    bandit = GaussianBandit(30, rng=0)
+    exact = Agent(bandit, UCBPolicy(2))
+    incremental = Agent(bandit, IncrementalUCBPolicy(2, tolerance=0))
+    for _ in range(1000):
+        action = incremental.choose()
+        exact.last_action = action
+        u, _ = exact_ucb(exact, 2)
+        if exact.t > 0 and not np.isinf(u).any():
+            assert action == np.argmax(u)
+        reward, _ = bandit.pull(action)
+        exact.observe(reward)
+        incremental.observe(reward)
+
+
+def test_reset_rebuilds_index():
+    bandit = GaussianBandit(20, rng=0)
+    agent = Agent(bandit, IncrementalUCBPolicy(2))
+    for _ in range(200):
+        agent.choose()
+        agent.observe(bandit.pull(agent.last_action)[0])
+    agent.reset()
+
+    # every arm is untried again, so the first 20 choices cover them all
+    seen = set()
+    for _ in range(20):
+        seen.add(int(agent.choose()))
+        agent.observe(bandit.pull(agent.last_action)[0])
+    assert seen == set(range(20))
+
+
+def test_observe_batch_rebuilds_index():
+    bandit = GaussianBandit(5, rng=0)
+    agent = Agent(bandit, IncrementalUCBPolicy(2, tolerance=0.5))
+    for _ in range(50):
+        agent.choose()
+        agent.observe(bandit.pull(agent.last_action)[0])
+    while agent.choose() == 4:
+        agent.observe(bandit.pull(agent.last_action)[0])
+
+    # one event for another arm than the chosen one, one step later
+    agent.observe_batch([4], [100.])
+    assert agent.choose() == 4
+
+
+def sparse_actions(policy, k=1000, steps=3000):
+    bandit = GaussianBandit(k, rng=0)
+    agent = SparseAgent(bandit, policy, rng=1)
+    actions = []
+    for _ in range(steps):
+        action = agent.choose()
+        agent.observe(bandit.pull(action)[0])
+        actions.append(action)
+    return actions
+
+
+def test_sparse_agent_matches_exact_ucb():
+    exact = sparse_actions(UCBPolicy(2))
+    assert len(set(exact)) == 1000
+    assert sparse_actions(IncrementalUCBPolicy(2, tolerance=0)) == exact
+
+
+def test_sparse_agent_tries_every_arm():
+    assert len(set(sparse_actions(IncrementalUCBPolicy(2)))) == 1000
+
+
+@pytest.mark.parametrize('make_agent', [
+    lambda b, p: SlidingWindowAgent(b, p, window=20),
+    lambda b, p: DiscountedAgent(b, p),
+])
+def test_rejects_agents_that_update_other_arms(make_agent):
+    # their counts change without the step count moving on, which the
+    # index would never notice
+    bandit = GaussianBandit(5, rng=0)
+    agent = make_agent(bandit, IncrementalUCBPolicy(2))
+    with pytest.raises(TypeError):
+        agent.choose()
@@ -0,0 +1,45 @@
+"""
+Several MF cost budgets evaluated from a single run.
+"""
+import numpy as np
+import pytest
+
+from mf_agent import Agent
+from mf_bandits import MF_GaussianBandit
+from mf_environment import Environment
+from mf_policy import MF_UCBPolicy
+
+
+def environment(k=10):
+    rs = np.random.RandomState(0)
+    zeta = [0.8, 0.2, 0]
+    means = np.zeros((k, 3))
+    means[:, 2] = np.linspace(0, 1, k)
+    for j in range(2):
+        means[:, j] = rs.uniform(means[:, 2] - zeta[j],
+                                 means[:, 2] + zeta[j])
+    bandit = MF_GaussianBandit(k, 3, mu=means, sigma=0.2,
+                               zeta=np.broadcast_to(zeta, (k, 3)),
+                               costs=[1, 5, 20])
+    policy = MF_UCBPolicy(2, lambda x: np.power(x, 0.5))
+    return Environment(bandit, Agent(bandit, policy))
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_budget_list_matches_separate_runs(seed):
+    # 200 is already spent by the initial pull of every arm and fidelity
+    budgets = [200, 400, 1000, 3000]
+    env = environment()
+    env.seed(seed)
+    plays, regret, optimal = env.run(budgets)
+    for j, budget in enumerate(budgets):
+        env.seed(seed)
+        alone = env.run(budget)
+        np.testing.assert_array_equal(plays[j], alone[0])
+        np.testing.assert_allclose(regret[j], alone[1])
+        assert optimal[j] == alone[2]
+
+
+def test_budgets_must_be_sorted():
+    with pytest.raises(ValueError):
+        environment().run([1000, 400])
@@ -0,0 +1,53 @@
+"""
+The incremental MF-UCB index against the full MF-UCB scan.
+"""
+import numpy as np
+import pytest
+
+from bandits.hooks import Hook
+from mf_agent import Agent
+from mf_bandits import MF_GaussianBandit
+from mf_environment import Environment
+from mf_policy import IncrementalMF_UCBPolicy, MF_UCBPolicy
+
+
+class RecordActions(Hook):
+    def __init__(self):
+        self.actions = []
+
+    def on_step(self, action, reward, cost):
+        self.actions.append((int(action[0]), int(action[1])))
+
+
+def bandit(seed, k=60):
+    rs = np.random.RandomState(seed)
+    zeta = [0.8, 0.2, 0]
+    means = np.zeros((k, 3))
+    means[:, 2] = np.linspace(0, 1, k)
+    for j in range(2):
+        means[:, j] = rs.uniform(means[:, 2] - zeta[j],
+                                 means[:, 2] + zeta[j])
+    return MF_GaussianBandit(k, 3, mu=means, sigma=0.2,
+                             zeta=np.broadcast_to(zeta, (k, 3)),
+                             costs=[1, 5, 20])
+
+
+def actions(policy, seed, budgets):
+    b = bandit(seed)
+    record = RecordActions()
+    env = Environment(b, Agent(b, policy), hooks=[record])
+    env.seed(seed)
+    plays, regret = env.run(budgets, 2)[:2]
+    return record.actions, regret
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+@pytest.mark.parametrize('tolerance', [1e-4, 0.05])
+def test_same_actions_as_full_scan(seed, tolerance):
+    psi_inv = lambda x: np.power(x, 0.5)
+    budgets = [4000, 8000]
+    scan, scan_regret = actions(MF_UCBPolicy(2, psi_inv), seed, budgets)
+    index, index_regret = actions(
+        IncrementalMF_UCBPolicy(2, psi_inv, tolerance), seed, budgets)
+    assert index == scan
+    np.testing.assert_array_equal(index_regret, scan_regret)
@@ -0,0 +1,31 @@
+"""
+Tie-breaking in the MF UCB policy, scalar and batched.
+"""
+import numpy as np
+
+from mf_agent import Agent
+from mf_bandits import MF_GaussianBandit
+from mf_batch import BatchAgent
+from mf_policy import UCBPolicy
+
+
+def untried_agent(seed):
+    bandit = MF_GaussianBandit(5, 2, mu=np.zeros((5, 2)), sigma=1,
+                               zeta=np.zeros((5, 2)), costs=[1, 10])
+    return Agent(bandit, UCBPolicy(2, np.sqrt, rng=seed))
+
+
+def test_choose_breaks_ties_at_random():
+    # every arm is tied while none has been pulled
+    agent = untried_agent(0)
+    agent.t = 1
+    arms = [agent.policy.choose(agent)[0] for _ in range(200)]
+    assert set(arms) == set(range(5))
+
+
+def test_choose_batch_breaks_ties_at_random():
+    batch = BatchAgent(untried_agent(0), 200)
+    batch.t[:] = 1
+    arms, fids = batch.choose()
+    assert set(arms) == set(range(5))
+    assert np.all(fids == 1)
@@ -0,0 +1,103 @@
+"""
+observe_batch against the equivalent sequence of observe calls.
+"""
+import numpy as np
+import pytest
+
+from bandits.agent import (Agent, BetaAgent, GradientAgent, NormalAgent,
+                           PoissonAgent)
+from bandits.bandit import BernoulliBandit, GaussianBandit
+from bandits.policy import GreedyPolicy, SoftmaxPolicy
+
+
+def observe_each(agent, actions, rewards):
+    for action, reward in zip(actions, rewards):
+        agent.last_action = action
+        agent.observe(reward)
+
+
+def events(k, n, seed=0, binary=False):
+    rng = np.random.default_rng(seed)
+    actions = rng.integers(k, size=n)
+    if binary:
+        return actions, rng.integers(2, size=n).astype(float)
+    return actions, rng.normal(size=n)
+
+
+def test_sample_average_is_exact():
+    bandit = GaussianBandit(10, rng=0)
+    actions, rewards = events(10, 500)
+    batched, sequential = (Agent(bandit, GreedyPolicy()) for _ in range(2))
+    batched.observe_batch(actions, rewards)
+    observe_each(sequential, actions, rewards)
+
+    np.testing.assert_allclose(batched.value_estimates,
+                               sequential.value_estimates)
+    np.testing.assert_array_equal(batched.action_attempts,
+                                  sequential.action_attempts)
+    assert batched.t == sequential.t
+
+
+def test_constant_step_size_uses_mean_of_arm_events():
+    bandit = GaussianBandit(3, rng=0)
+    agent = Agent(bandit, GreedyPolicy(), prior=1, gamma=0.1)
+    agent.observe_batch([0, 0, 2], [2., 4., 5.])
+
+    # two rewards of 3 on arm 0, one reward of 5 on arm 2
+    np.testing.assert_allclose(agent.value_estimates,
+                               [0.9**2 + (1 - 0.9**2)*3, 1, 0.9 + 0.1*5])
+
+
+def test_constant_step_size_single_events_are_exact():
+    bandit = GaussianBandit(10, rng=0)
+    actions = np.arange(10)
+    rewards = np.linspace(-1, 1, 10)
+    batched, sequential = (Agent(bandit, GreedyPolicy(), gamma=0.1)
+                           for _ in range(2))
+    batched.observe_batch(actions, rewards)
+    observe_each(sequential, actions, rewards)
+    np.testing.assert_allclose(batched.value_estimates,
+                               sequential.value_estimates)
+
+
+def test_gradient_batch_of_one_is_exact():
+    bandit = GaussianBandit(5, rng=0)
+    batched, sequential = (GradientAgent(bandit, SoftmaxPolicy())
+                           for _ in range(2))
+    actions, rewards = events(5, 50)
+    for action, reward in zip(actions, rewards):
+        batched.observe_batch([action], [reward])
+        observe_each(sequential, [action], [reward])
+    np.testing.assert_allclose(batched.value_estimates,
+                               sequential.value_estimates)
+    np.testing.assert_allclose(batched.average_reward,
+                               sequential.average_reward)
+
+
+def test_beta_posterior_is_exact():
+    bandit = BernoulliBandit(8, rng=0)
+    actions, rewards = events(8, 300, binary=True)
+    batched, sequential = (BetaAgent(bandit, GreedyPolicy(), ts=False)
+                           for _ in range(2))
+    batched.observe_batch(actions, rewards)
+    observe_each(sequential, actions, rewards)
+    np.testing.assert_array_equal(batched.alpha, sequential.alpha)
+    np.testing.assert_array_equal(batched.beta, sequential.beta)
+
+
+@pytest.mark.parametrize('make_agent', [
+    lambda b: NormalAgent(b, GreedyPolicy()),
+    lambda b: NormalAgent(b, GreedyPolicy(), variance=2),
+    lambda b: PoissonAgent(b, GreedyPolicy()),
+])
+def test_conjugate_posterior_is_exact(make_agent):
+    bandit = GaussianBandit(6, rng=0)
+    actions, rewards = events(6, 300)
+    if isinstance(make_agent(bandit), PoissonAgent):
+        rewards = np.abs(np.round(3*rewards))
+    batched, sequential = make_agent(bandit), make_agent(bandit)
+    batched.observe_batch(actions, rewards)
+    observe_each(sequential, actions, rewards)
+    for name in batched.posterior.PARAMS:
+        np.testing.assert_allclose(getattr(batched.posterior, name),
+                                   getattr(sequential.posterior, name))
@@ -0,0 +1,56 @@
+"""
+The multi-core experiment runner.
+"""
+import numpy as np
+
+from bandits.agent import Agent, BetaAgent
+from bandits.bandit import BernoulliBandit
+from bandits.environment import Environment
+from bandits.parallel import split_experiments
+from bandits.policy import EpsilonGreedyPolicy, GreedyPolicy, UCBPolicy
+
+
+def environment():
+    bandit = BernoulliBandit(5)
+    agents = [Agent(bandit, EpsilonGreedyPolicy(0.1)),
+              Agent(bandit, UCBPolicy(2)),
+              BetaAgent(bandit, GreedyPolicy())]
+    return Environment(bandit, agents)
+
+
+def test_blocks_cover_the_experiments():
+    assert split_experiments(130, 50) == [50, 50, 30]
+    assert split_experiments(100, 50) == [50, 50]
+
+
+def test_seed_gives_identical_results_for_any_worker_count():
+    env = environment()
+    runs = []
+    for workers in (1, 2, 3):
+        results = env.accumulator(40)
+        scores, optimal = env.run(40, 130, workers=workers, seed=7,
+                                  results=results)
+        runs.append((scores, optimal, results))
+
+    scores, optimal, results = runs[0]
+    for other_scores, other_optimal, other_results in runs[1:]:
+        np.testing.assert_array_equal(other_scores, scores)
+        np.testing.assert_array_equal(other_optimal, optimal)
+        assert other_results.n == results.n == 130
+        np.testing.assert_array_equal(other_results['regret'].mean,
+                                      results['regret'].mean)
+
+
+def test_blocks_are_averaged_by_experiment_count():
+    # the uneven last block weighs by its size, as in a serial run
+    env = environment()
+    results = env.accumulator(20)
+    scores, _ = env.run(20, 130, workers=1, seed=0, results=results)
+    np.testing.assert_allclose(scores, results['reward'].mean)
+
+
+def test_different_seeds_give_different_results():
+    env = environment()
+    first, _ = env.run(20, 60, workers=1, seed=0)
+    second, _ = env.run(20, 60, workers=1, seed=1)
+    assert not np.array_equal(first, second)
@@ -0,0 +1,91 @@
+"""
+The struct-of-arrays AgentPool against one scalar Agent per user.
+"""
+import numpy as np
+import pytest
+
+from bandits.agent import Agent
+from bandits.bandit import GaussianBandit
+from bandits.policy import EpsilonGreedyPolicy, GreedyPolicy, UCBPolicy
+from bandits.pool import AgentPool
+
+
+def scalar_agents(pool, policy):
+    bandit = GaussianBandit(pool.k, rng=0)
+    agents = []
+    for user in range(len(pool)):
+        agent = Agent(bandit, policy, pool.prior, pool.gamma)
+        agent._value_estimates = pool.value_estimates[user].copy()
+        agent.action_attempts = pool.action_attempts[user].copy()
+        agent.t = int(pool.t[user])
+        agents.append(agent)
+    return agents
+
+
+@pytest.mark.parametrize('make_policy', [GreedyPolicy,
+                                         lambda: UCBPolicy(2)])
+def test_choose_matches_scalar_agents(make_policy):
+    rng = np.random.default_rng(0)
+    pool = AgentPool(6, 40, make_policy(), value_dtype=np.float64,
+                     count_dtype=np.int64)
+    pool.value_estimates[:] = rng.normal(size=(40, 6))
+    # every arm tried, so there are no ties to break at random
+    pool.action_attempts[:] = rng.integers(1, 5, size=(40, 6))
+    pool.t[:] = pool.action_attempts.sum(axis=1)
+    agents = scalar_agents(pool, make_policy())
+
+    users = rng.permutation(40)[:25]
+    expected = [agents[user].choose() for user in users]
+    np.testing.assert_array_equal(pool.choose(users), expected)
+
+
+def test_observe_matches_scalar_agents():
+    rng = np.random.default_rng(1)
+    pool = AgentPool(4, 10, EpsilonGreedyPolicy(0.1),
+                     value_dtype=np.float64, count_dtype=np.int64)
+    agents = scalar_agents(pool, EpsilonGreedyPolicy(0.1))
+    for _ in range(5):
+        # repeated users and (user, action) pairs in one call
+        users = rng.integers(0, 10, size=30)
+        actions = rng.integers(0, 4, size=30)
+        rewards = rng.normal(size=30)
+        pool.observe(users, actions, rewards)
+        for user, action, reward in zip(users, actions, rewards):
+            agents[user].last_action = action
+            agents[user].observe(reward)
+
+    for user, agent in enumerate(agents):
+        np.testing.assert_allclose(pool.value_estimates[user],
+                                   agent.value_estimates)
+        np.testing.assert_array_equal(pool.action_attempts[user],
+                                      agent.action_attempts)
+        assert pool.t[user] == agent.t
+
+
+def test_constant_step_observe_matches_scalar_agents():
+    rng = np.random.default_rng(2)
+    pool = AgentPool(4, 10, GreedyPolicy(), gamma=0.2,
+                     value_dtype=np.float64)
+    agents = scalar_agents(pool, GreedyPolicy())
+    for _ in range(5):
+        # one event per user, so the constant step size is exact
+        users = rng.permutation(10)[:6]
+        actions = rng.integers(0, 4, size=6)
+        rewards = rng.normal(size=6)
+        pool.observe(users, actions, rewards)
+        for user, action, reward in zip(users, actions, rewards):
+            agents[user].last_action = action
+            agents[user].observe(reward)
+
+    for user, agent in enumerate(agents):
+        np.testing.assert_allclose(pool.value_estimates[user],
+                                   agent.value_estimates)
+
+
+def test_reset_only_touches_the_given_users():
+    pool = AgentPool(3, 4, GreedyPolicy(), prior=1)
+    pool.observe([0, 1, 2, 3], [0, 1, 2, 0], [5., 5., 5., 5.])
+    pool.reset([1, 3])
+    assert pool.t.tolist() == [1, 0, 1, 0]
+    np.testing.assert_array_equal(pool.value_estimates[1], [1, 1, 1])
+    assert pool.value_estimates[0, 0] == 5
@@ -0,0 +1,39 @@
+"""
+Beta posteriors and Binomial rewards drawn with NumPy.
+"""
+import numpy as np
+
+from bandits.agent import BetaAgent
+from bandits.bandit import BinomialBandit
+from bandits.policy import GreedyPolicy
+from bandits.posterior import BetaPosterior
+
+
+def test_beta_agent_counts_successes_and_failures():
+    bandit = BinomialBandit(3, n=5, p=[0.1, 0.5, 0.9], rng=0)
+    agent = BetaAgent(bandit, GreedyPolicy(), ts=False, rng=0)
+    events = [(0, 1), (2, 5), (2, 4), (1, 0)]
+    for action, reward in events:
+        agent.last_action = action
+        agent.observe(reward)
+
+    np.testing.assert_array_equal(agent.alpha, [2, 1, 10])
+    np.testing.assert_array_equal(agent.beta, [5, 6, 2])
+    np.testing.assert_allclose(agent.value_estimates, [2/7, 1/7, 10/12])
+
+
+def test_beta_samples_follow_the_posterior():
+    posterior = BetaPosterior((20000, 2))
+    posterior.update((slice(None), 0), 8, 2)
+    samples = posterior.sample(0)
+    np.testing.assert_allclose(samples.mean(axis=0), [0.75, 0.5], atol=0.01)
+    np.testing.assert_allclose(samples.var(axis=0), [0.75*0.25/13, 1/12],
+                               atol=0.005)
+
+
+def test_binomial_rewards_have_the_binomial_mean():
+    bandit = BinomialBandit(3, n=5, p=[0.1, 0.5, 0.9], t=20000, rng=0)
+    rewards = np.array([bandit.sample for _ in range(20000)])
+    assert rewards.min() >= 0 and rewards.max() <= 5
+    np.testing.assert_allclose(rewards.mean(axis=0), [0.5, 2.5, 4.5],
+                               atol=0.05)
@@ -0,0 +1,52 @@
+"""
+The stable, cached softmax shared by GradientAgent and SoftmaxPolicy.
+"""
+import numpy as np
+
+from bandits.agent import Agent, GradientAgent
+from bandits.bandit import GaussianBandit
+from bandits.policy import SoftmaxPolicy
+from bandits.preference import softmax
+
+
+def test_softmax_does_not_overflow_at_large_preferences():
+    with np.errstate(over='raise', invalid='raise'):
+        pi = softmax(np.array([1000., 1001., 999.]))
+        batch = softmax(np.array([[1e6, 1e6 - 1], [-1e6, 0.]]))
+    np.testing.assert_allclose(pi, softmax(np.array([1., 2., 0.])))
+    e = np.exp(-1)
+    np.testing.assert_allclose(batch, [[1/(1 + e), e/(1 + e)], [0, 1]])
+
+
+def test_policies_choose_at_large_preferences():
+    bandit = GaussianBandit(4, rng=0)
+    gradient = GradientAgent(bandit, SoftmaxPolicy(rng=0))
+    gradient.preferences.h[:] = [1e4, 0, -1e4, 1e4 - 50]
+    gradient.preferences.invalidate()
+    agent = Agent(bandit, SoftmaxPolicy(rng=0))
+    agent._value_estimates[:] = [0, 2e4, 0, -2e4]
+    with np.errstate(over='raise', invalid='raise'):
+        assert {gradient.choose() for _ in range(20)} == {0}
+        assert {agent.choose() for _ in range(20)} == {1}
+
+
+def test_gradient_update_uses_the_cached_distribution():
+    bandit = GaussianBandit(3, rng=0)
+    agent = GradientAgent(bandit, SoftmaxPolicy(), alpha=0.5)
+    h = np.array([0.5, -0.2, 0.1])
+    agent.preferences.h[:] = h
+    agent.preferences.invalidate()
+    agent.last_action = 1
+    agent.observe(2.0)
+
+    # the first reward is the baseline after it, so the step is zero
+    # without the baseline; with it, one textbook step follows
+    pi = softmax(h)
+    np.testing.assert_allclose(agent.preferences.h, h)
+    agent.last_action = 2
+    agent.observe(3.0)
+    step = 0.5*(3.0 - 2.5)
+    expected = h - step*pi
+    expected[2] += step
+    np.testing.assert_allclose(agent.preferences.h, expected)
+    np.testing.assert_allclose(agent.preferences.pi, softmax(expected))
@@ -0,0 +1,84 @@
+"""
+Offline replay, IPS and SNIPS estimates on a known log.
+"""
+import numpy as np
+import pytest
+
+from bandits.agent import Agent
+from bandits.bandit import GaussianBandit
+from bandits.policy import GreedyPolicy
+from bandits.replay import ReplayEvaluator, save_log
+
+ARMS = [0, 1, 1, 2, 1]
+REWARDS = [1., 2., 3., 4., 5.]
+PROPENSITIES = [0.5, 0.25, 0.5, 0.25, 0.25]
+
+
+class FixedAgent(Agent):
+    def __init__(self, arm):
+        super(FixedAgent, self).__init__(GaussianBandit(3, rng=0),
+                                         GreedyPolicy())
+        self.arm = arm
+
+    def __str__(self):
+        return 'arm {}'.format(self.arm)
+
+    def choose(self):
+        self.last_action = self.arm
+        return self.arm
+
+
+def write_csv(path, with_propensities=True):
+    columns = [ARMS, REWARDS] + ([PROPENSITIES] if with_propensities else [])
+    header = 'arm,reward' + (',propensity' if with_propensities else '')
+    np.savetxt(path, np.column_stack(columns), delimiter=',', header=header,
+               comments='')
+
+
+@pytest.mark.parametrize('source', ['npy', 'csv', 'chunks'])
+def test_estimates_on_a_known_log(tmp_path, source):
+    if source == 'npy':
+        path = str(tmp_path / 'log.npy')
+        save_log(path, ARMS, REWARDS, PROPENSITIES)
+    elif source == 'csv':
+        path = str(tmp_path / 'log.csv')
+        write_csv(path)
+    else:
+        path = [(np.array(ARMS[:2]), np.array(REWARDS[:2]),
+                 np.array(PROPENSITIES[:2])),
+                (np.array(ARMS[2:]), np.array(REWARDS[2:]),
+                 np.array(PROPENSITIES[2:]))]
+    agents = [FixedAgent(1), FixedAgent(2)]
+    first, second = ReplayEvaluator(agents).run(path, chunk_size=2)
+
+    # arm 1 matches events 1, 2 and 4
+    assert first['events'] == 5
+    assert first['matches'] == 3
+    assert first['replay_reward'] == pytest.approx(10/3)
+    assert first['ips'] == pytest.approx((2/0.25 + 3/0.5 + 5/0.25) / 5)
+    assert first['snips'] == pytest.approx(34 / 10)
+    assert second['matches'] == 1
+    assert second['ips'] == pytest.approx(16 / 5)
+    assert second['snips'] == pytest.approx(4)
+
+
+def test_log_without_propensities(tmp_path):
+    path = str(tmp_path / 'log.csv')
+    write_csv(path, with_propensities=False)
+    result, = ReplayEvaluator([FixedAgent(0)]).run(path)
+    assert result['matches'] == 1
+    assert result['replay_reward'] == 1
+    assert 'ips' not in result and 'snips' not in result
+
+
+def test_max_events_and_no_matches(tmp_path):
+    path = str(tmp_path / 'log.npy')
+    save_log(path, ARMS, REWARDS, PROPENSITIES)
+    first, second = ReplayEvaluator([FixedAgent(1), FixedAgent(2)]).run(
+        path, chunk_size=2, max_events=3)
+    assert first['events'] == 3
+    assert first['replay_reward'] == pytest.approx(2.5)
+    assert second['matches'] == 0
+    assert np.isnan(second['replay_reward'])
+    assert np.isnan(second['snips'])
+
@@ -0,0 +1,109 @@
+"""
+Streaming result accumulators and confidence intervals.
+"""
+import numpy as np
+
+from bandits.agent import Agent
+from bandits.bandit import GaussianBandit
+from bandits.environment import Environment
+from bandits.hooks import Hook
+from bandits.policy import EpsilonGreedyPolicy
+from bandits.results import (ResultAccumulator, RunningStats, load_results,
+                             moments, run_until)
+
+
+def test_running_stats_match_two_pass():
+    values = np.random.default_rng(0).normal(3, 2, size=(500, 4))
+    stats = RunningStats(4)
+    for x in values:
+        stats.add(x)
+    assert stats.n == 500
+    np.testing.assert_allclose(stats.mean, values.mean(axis=0))
+    np.testing.assert_allclose(stats.variance, values.var(axis=0, ddof=1))
+    np.testing.assert_allclose(stats.half_width(),
+                               1.96*values.std(axis=0, ddof=1)/np.sqrt(500))
+
+
+def test_merge_matches_two_pass():
+    values = np.random.default_rng(1).normal(size=(301, 3))
+    stats = RunningStats(3)
+    for block in np.split(values, [1, 120, 122]):
+        stats.merge(*moments(block))
+    stats.merge(0, np.zeros(3), np.zeros(3))
+    assert stats.n == 301
+    np.testing.assert_allclose(stats.mean, values.mean(axis=0))
+    np.testing.assert_allclose(stats.variance, values.var(axis=0, ddof=1))
+
+
+class ReadResults(Hook):
+    def __init__(self, path):
+        self.path = path
+        self.seen = []
+
+    def on_experiment_end(self, env, experiment, regret):
+        if experiment > 0:
+            self.seen.append(load_results(self.path).n)
+
+
+def test_load_results_mid_run(tmp_path):
+    bandit = GaussianBandit(5, rng=0)
+    path = str(tmp_path / 'results.npz')
+    hook = ReadResults(path)
+    env = Environment(bandit, [Agent(bandit, EpsilonGreedyPolicy(0.1))],
+                      hooks=[hook])
+    results = env.accumulator(20, path=path)
+    scores, _ = env.run(20, 6, results=results)
+
+    # each experiment's statistics are on disk before the next one ends
+    assert hook.seen == [1, 2, 3, 4, 5]
+    loaded = load_results(path)
+    assert loaded.n == 6
+    np.testing.assert_allclose(loaded['reward'].mean, scores)
+    np.testing.assert_array_equal(loaded['regret'].m2, results['regret'].m2)
+
+
+def normal_runs(seed=0):
+    rng = np.random.default_rng(seed)
+    results = ResultAccumulator([('x', ())])
+    blocks = []
+
+    def run(n):
+        blocks.append((results.n, n))
+        results.merge_moments(n, {'x': moments(rng.normal(size=n))[1:]})
+    return run, results, blocks
+
+
+def test_run_until_stops_at_the_target_half_width():
+    run, results, blocks = normal_runs()
+    report = run_until(run, results, 'x', 0.1, 10000, block_size=50)
+
+    # a unit variance needs about (1.96 / 0.1)^2 = 384 experiments
+    assert report['converged']
+    assert report['target'] == 0.1
+    assert report['experiments'] == results.n
+    assert 300 < results.n < 800
+    assert report['half_width'] == results['x'].half_width() <= 0.1
+    assert blocks[0] == (0, 50)
+    # later blocks never more than double the experiments so far
+    for done, n in blocks[1:]:
+        assert 50 <= n <= done
+
+
+def test_run_until_stops_at_max_experiments():
+    run, results, blocks = normal_runs()
+    report = run_until(run, results, 'x', 0.001, 500, block_size=50)
+    assert not report['converged']
+    assert report['experiments'] == results.n == 500
+    assert report['half_width'] > 0.001
+
+
+def test_environment_run_until_is_reproducible():
+    bandit = GaussianBandit(5, rng=0)
+    env = Environment(bandit, [Agent(bandit, EpsilonGreedyPolicy(0.1))])
+    runs = [env.run_until(20, half_width=0.2, seed=3, workers=1)
+            for _ in range(2)]
+    scores, optimal, report = runs[0]
+    assert report['converged']
+    assert scores.shape == optimal.shape == (20, 1)
+    np.testing.assert_array_equal(runs[1][0], scores)
+    assert runs[1][2] == report
@@ -0,0 +1,92 @@
+"""
+Injected random number sources and seeded reproducibility.
+"""
+import numpy as np
+import pytest
+
+from bandits.agent import Agent, BetaAgent, GradientAgent
+from bandits.bandit import BernoulliBandit, GaussianBandit
+from bandits.environment import Environment
+from bandits.policy import (EpsilonGreedyPolicy, GreedyPolicy, SoftmaxPolicy,
+                            UCBPolicy)
+from bandits.rng import BlockRNG, as_rng, spawn
+from mf_agent import Agent as MFAgent
+from mf_bandits import MF_GaussianBandit
+from mf_environment import Environment as MFEnvironment
+from mf_policy import MF_UCBPolicy
+
+
+def environment(rng=None):
+    bandit = GaussianBandit(5, rng=rng)
+    agents = [Agent(bandit, EpsilonGreedyPolicy(0.1, rng=rng)),
+              Agent(bandit, UCBPolicy(2, rng=rng)),
+              GradientAgent(bandit, SoftmaxPolicy(rng=rng), rng=rng)]
+    return Environment(bandit, agents)
+
+
+@pytest.mark.parametrize('batch', [False, True])
+def test_seed_reproduces_a_whole_run(batch):
+    env = environment()
+    runs = []
+    for _ in range(2):
+        env.seed(5)
+        runs.append(env.run(50, 20, batch=batch))
+    np.testing.assert_array_equal(runs[0][0], runs[1][0])
+    np.testing.assert_array_equal(runs[0][1], runs[1][1])
+
+    env.seed(6)
+    other, _ = env.run(50, 20, batch=batch)
+    assert not np.array_equal(other, runs[0][0])
+
+
+def test_seed_reproduces_bayesian_agents():
+    bandit = BernoulliBandit(5)
+    env = Environment(bandit, [BetaAgent(bandit, GreedyPolicy())])
+    runs = []
+    for _ in range(2):
+        env.seed(0)
+        runs.append(env.run(50, 10)[0])
+    np.testing.assert_array_equal(runs[0], runs[1])
+
+
+def test_unseeded_components_follow_the_global_state():
+    env = environment()
+    runs = []
+    for _ in range(2):
+        np.random.seed(1)
+        runs.append(env.run(30, 5)[0])
+    np.testing.assert_array_equal(runs[0], runs[1])
+
+
+def test_components_seeded_alike_draw_alike():
+    first, second = environment(rng=9), environment(rng=9)
+    np.testing.assert_array_equal(first.run(30, 5)[0], second.run(30, 5)[0])
+
+
+def test_block_rng_draws_the_generator_stream():
+    rng = BlockRNG(3, block_size=8)
+    uniforms = [rng.next_uniform() for _ in range(20)]
+    expected = np.random.default_rng(3).random(24)[:20]
+    np.testing.assert_array_equal(uniforms, expected)
+    assert as_rng(rng) is rng
+    assert all(0 <= BlockRNG(0).next_integer(7) < 7 for _ in range(100))
+
+
+def test_spawned_streams_are_independent_and_reproducible():
+    a, b = spawn(0, 2)
+    assert a.next_uniform() != b.next_uniform()
+    assert spawn(0, 2)[1].random() == spawn(0, 2)[1].random()
+
+
+def test_seed_reproduces_an_mf_run():
+    k = 6
+    means = np.tile(np.linspace(0, 1, k)[:, np.newaxis], (1, 2))
+    bandit = MF_GaussianBandit(k, 2, mu=means, sigma=0.5,
+                               zeta=np.zeros((k, 2)), costs=[1, 10])
+    env = MFEnvironment(bandit, MFAgent(bandit, MF_UCBPolicy(2, np.sqrt)))
+    runs = []
+    for _ in range(2):
+        env.seed(4)
+        runs.append(env.run(400, 3))
+    for first, second in zip(*runs):
+        np.testing.assert_array_equal(first, second)
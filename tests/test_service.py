@@ -0,0 +1,77 @@
+"""
+Tickets and reward handling of the asyncio DecisionService.
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from bandits.policy import GreedyPolicy
+from bandits.pool import AgentPool
+from bandits.service import DecisionService
+
+
+def pool(users=8, k=5):
+    pool = AgentPool(k, users, GreedyPolicy(), value_dtype=np.float64)
+    # a distinct best arm per user, so every choice is known in advance
+    pool.value_estimates[:] = 0
+    pool.value_estimates[np.arange(users), np.arange(users) % k] = 1
+    return pool
+
+
+def test_rewards_reach_the_decision_of_their_ticket():
+    service = DecisionService(pool(), window=0.01)
+
+    async def client(user_id):
+        ticket, action = await service.choose(user_id)
+        await service.observe(ticket, 10*user_id + action)
+        return ticket, action
+
+    async def main():
+        return await asyncio.gather(*[client(u) for u in range(8)])
+
+    replies = asyncio.run(main())
+    tickets, actions = zip(*replies)
+    assert len(set(tickets)) == 8
+    assert list(actions) == [u % 5 for u in range(8)]
+    for user_id, action in enumerate(actions):
+        assert service.pool.action_attempts[user_id].sum() == 1
+        assert service.pool.value_estimates[user_id, action] == \
+            10*user_id + action
+    assert service.open_tickets == 0
+    # the eight concurrent choices and observations went out in two batches
+    assert service.stats.batches == 2
+    assert service.stats.counts == {'choose': 8, 'observe': 8}
+
+
+def test_tickets_are_observed_once():
+    service = DecisionService(pool(), window=0)
+
+    async def main():
+        ticket, _ = await service.choose(0)
+        await service.observe(ticket, 1.0)
+        with pytest.raises(KeyError):
+            await service.observe(ticket, 1.0)
+        with pytest.raises(KeyError):
+            await service.observe(ticket + 100, 1.0)
+
+        ticket, _ = await service.choose(1)
+        assert service.open_tickets == 1
+        service.discard(ticket)
+        assert service.open_tickets == 0
+        with pytest.raises(KeyError):
+            await service.observe(ticket, 1.0)
+
+    asyncio.run(main())
+    assert service.pool.t.tolist() == [1, 0, 0, 0, 0, 0, 0, 0]
+
+
+def test_full_batch_is_sent_at_once():
+    service = DecisionService(pool(), window=60, max_batch=4)
+
+    async def main():
+        return await asyncio.wait_for(
+            asyncio.gather(*[service.choose(u) for u in range(4)]), 1)
+
+    assert len(asyncio.run(main())) == 4
+    assert service.stats.batches == 1
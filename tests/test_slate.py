@@ -0,0 +1,72 @@
+"""
+Top-m slates and the multi-play environment mode.
+"""
+import numpy as np
+import pytest
+
+from bandits.agent import Agent, BetaAgent, SparseAgent
+from bandits.bandit import BernoulliBandit, GaussianBandit
+from bandits.environment import Environment
+from bandits.policy import (EpsilonGreedyPolicy, GreedyPolicy, RandomPolicy,
+                            SoftmaxPolicy, UCBPolicy, top_m)
+from bandits.preference import softmax
+
+
+def test_top_m_is_sorted_best_first():
+    q = np.random.default_rng(0).normal(size=50)
+    np.testing.assert_array_equal(top_m(q, 7), np.argsort(-q)[:7])
+    np.testing.assert_array_equal(top_m(q[:3], 5), np.argsort(-q[:3]))
+
+
+def test_top_m_breaks_ties_at_the_cut_off_at_random():
+    q = np.array([3., 1., 1., 2., 1., 0.])
+    seen = set()
+    for seed in range(50):
+        slate = top_m(q, 3, np.random.default_rng(seed))
+        assert slate[:2].tolist() == [0, 3]
+        seen.add(int(slate[2]))
+    assert seen == {1, 2, 4}
+
+
+@pytest.mark.parametrize('make_agent', [
+    lambda b: Agent(b, EpsilonGreedyPolicy(0.5, rng=0)),
+    lambda b: Agent(b, GreedyPolicy(rng=0)),
+    lambda b: Agent(b, RandomPolicy(rng=0)),
+    lambda b: Agent(b, UCBPolicy(2, rng=0)),
+    lambda b: Agent(b, SoftmaxPolicy(rng=0)),
+    lambda b: BetaAgent(b, GreedyPolicy(rng=0), rng=0),
+    lambda b: SparseAgent(b, UCBPolicy(2, rng=0), rng=0),
+])
+def test_slates_are_distinct(make_agent):
+    bandit = BernoulliBandit(8, rng=0)
+    agent = make_agent(bandit)
+    for _ in range(100):
+        slate = agent.choose_slate(4)
+        assert len(slate) == 4
+        assert len(set(np.asarray(slate).tolist())) == 4
+        agent.observe_slate(slate, [bandit.pull(a)[0] for a in slate])
+
+
+def test_softmax_slates_follow_gumbel_top_k():
+    # Gumbel-top-k samples without replacement from the softmax: the first
+    # arm has probability p_i, the second p_j / (1 - p_i) after it
+    bandit = GaussianBandit(3, rng=0)
+    agent = Agent(bandit, SoftmaxPolicy(rng=0))
+    agent._value_estimates[:] = [1., 0., -1.]
+    p = softmax(agent.value_estimates)
+    slates = np.array([agent.choose_slate(2) for _ in range(20000)])
+    first = np.bincount(slates[:, 0], minlength=3) / len(slates)
+    np.testing.assert_allclose(first, p, atol=0.015)
+    after_0 = slates[slates[:, 0] == 0, 1]
+    np.testing.assert_allclose(np.mean(after_0 == 1), p[1] / (1 - p[0]),
+                               atol=0.02)
+
+
+def test_slate_environment_finds_the_best_slate():
+    bandit = GaussianBandit(6, mu=0, sigma=1, rng=0)
+    env = Environment(bandit, [Agent(bandit, UCBPolicy(2, rng=0))], slate=2)
+    env.seed(0)
+    scores, optimal = env.run(300, 20)
+    # optimal is the fraction of each slate in the best slate
+    assert np.all((optimal >= 0) & (optimal <= 1))
+    assert optimal[-50:].mean() > 0.8
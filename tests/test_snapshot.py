@@ -0,0 +1,146 @@
+"""
+Snapshot round trips of every agent and pool.
+"""
+import os
+
+import numpy as np
+import pytest
+
+from bandits.agent import (Agent, BetaAgent, DiscountedAgent,
+                           DiscountedBetaAgent, GradientAgent, LinearAgent,
+                           NormalAgent, PoissonAgent, SlidingWindowAgent,
+                           SparseAgent)
+from bandits.bandit import (BernoulliBandit, GaussianBandit, LinearBandit,
+                            PoissonBandit)
+from bandits.policy import (GreedyPolicy, LinUCBPolicy, SoftmaxPolicy,
+                            UCBPolicy)
+from bandits.pool import AgentPool, BetaAgentPool
+from bandits.rng import as_rng
+from bandits.snapshot import load_state, save_state
+
+GAUSSIAN = GaussianBandit(8, rng=0)
+BERNOULLI = BernoulliBandit(8, rng=0)
+POISSON = PoissonBandit(8, rng=0)
+
+AGENTS = [
+    (GAUSSIAN, lambda b: Agent(b, UCBPolicy(2))),
+    (GAUSSIAN, lambda b: Agent(b, GreedyPolicy(), prior=1, gamma=0.2)),
+    (GAUSSIAN, lambda b: GradientAgent(b, SoftmaxPolicy())),
+    (BERNOULLI, lambda b: BetaAgent(b, GreedyPolicy())),
+    (GAUSSIAN, lambda b: SlidingWindowAgent(b, UCBPolicy(2), window=20)),
+    (GAUSSIAN, lambda b: DiscountedAgent(b, UCBPolicy(2), discount=0.9)),
+    (BERNOULLI, lambda b: DiscountedBetaAgent(b, GreedyPolicy(),
+                                              discount=0.9)),
+    (GAUSSIAN, lambda b: SparseAgent(b, UCBPolicy(2))),
+    (GAUSSIAN, lambda b: NormalAgent(b, GreedyPolicy())),
+    (POISSON, lambda b: PoissonAgent(b, GreedyPolicy())),
+]
+
+
+def play(agent, bandit, steps=100):
+    for _ in range(steps):
+        action = agent.choose()
+        agent.observe(bandit.pull(action)[0])
+
+
+def assert_same_state(a, b):
+    attrs_a, arrays_a = a.get_state()
+    attrs_b, arrays_b = b.get_state()
+    assert attrs_a == attrs_b
+    assert sorted(arrays_a) == sorted(arrays_b)
+    for name in arrays_a:
+        np.testing.assert_array_equal(arrays_a[name], arrays_b[name])
+
+
+@pytest.mark.parametrize('bandit, make_agent', AGENTS)
+def test_agent_round_trip(bandit, make_agent, tmp_path):
+    agent = make_agent(bandit)
+    play(agent, bandit)
+    path = str(tmp_path / 'agent.snap')
+    agent.save(path)
+
+    restored = make_agent(bandit).load(path)
+    assert_same_state(agent, restored)
+
+    # given the same random numbers, the restored agent carries on exactly
+    # like the original
+    for a in (agent, restored):
+        a.rng = a.policy.rng = as_rng(1)
+    for _ in range(20):
+        action = agent.choose()
+        assert restored.choose() == action
+        reward = bandit.pull(action)[0]
+        agent.observe(reward)
+        restored.observe(reward)
+    assert_same_state(agent, restored)
+
+
+def test_linear_agent_round_trip(tmp_path):
+    bandit = LinearBandit(4, 3, rng=0)
+    agent = LinearAgent(bandit, LinUCBPolicy())
+    for _ in range(50):
+        action = agent.choose(bandit.context())
+        agent.observe(bandit.pull(action)[0])
+    path = str(tmp_path / 'linear.snap')
+    agent.save(path)
+    restored = LinearAgent(bandit, LinUCBPolicy()).load(path)
+    assert_same_state(agent, restored)
+    contexts = bandit.context()
+    np.testing.assert_allclose(agent.predict(contexts),
+                               restored.predict(contexts))
+
+
+def test_pool_round_trip_with_mmap(tmp_path):
+    pool = AgentPool(5, 100, UCBPolicy(2))
+    rng = np.random.default_rng(0)
+    users = rng.integers(100, size=1000)
+    pool.observe(users, rng.integers(5, size=1000), rng.normal(size=1000))
+    path = str(tmp_path / 'pool.snap')
+    pool.save(path)
+
+    mapped = AgentPool(5, 1, UCBPolicy(2)).load(path, mmap_mode='r+')
+    assert_same_state(pool, mapped)
+    mapped.observe([0], [1], [10.0])
+    mapped.action_attempts.flush()
+    reread = AgentPool(5, 1, UCBPolicy(2)).load(path)
+    assert reread.action_attempts[0, 1] == pool.action_attempts[0, 1] + 1
+
+
+def test_beta_pool_round_trip(tmp_path):
+    pool = BetaAgentPool(4, 10, GreedyPolicy())
+    pool.observe([0, 1, 1], [2, 3, 3], [1, 0, 1])
+    path = str(tmp_path / 'beta.snap')
+    pool.save(path)
+    assert_same_state(pool, BetaAgentPool(4, 1, GreedyPolicy()).load(path))
+
+
+def test_rejects_other_kinds_and_files(tmp_path):
+    path = str(tmp_path / 'agent.snap')
+    Agent(GAUSSIAN, GreedyPolicy()).save(path)
+    with pytest.raises(ValueError):
+        GradientAgent(GAUSSIAN, SoftmaxPolicy()).load(path)
+
+    other = str(tmp_path / 'other.snap')
+    with open(other, 'wb') as f:
+        f.write(b'not a snapshot')
+    with pytest.raises(ValueError):
+        load_state(other)
+
+
+def test_rejects_other_arm_counts(tmp_path):
+    path = str(tmp_path / 'agent.snap')
+    Agent(GAUSSIAN, GreedyPolicy()).save(path)
+    with pytest.raises(ValueError):
+        Agent(GaussianBandit(3), GreedyPolicy()).load(path)
+
+
+def test_save_state_layout_is_aligned(tmp_path):
+    path = str(tmp_path / 'raw.snap')
+    arrays = {'a': np.arange(7, dtype=np.int8), 'b': np.ones((3, 5))}
+    save_state(path, 'raw', {'x': 1}, arrays)
+    attrs, loaded = load_state(path, 'raw', mmap_mode='r')
+    assert attrs == {'x': 1}
+    for name in arrays:
+        np.testing.assert_array_equal(loaded[name], arrays[name])
+        assert loaded[name].offset % 64 == 0
+    assert os.path.getsize(path) > 0
@@ -0,0 +1,28 @@
+"""
+The untried-arm queue of the sparse agent.
+"""
+import numpy as np
+
+from bandits.agent import SparseAgent
+from bandits.bandit import BernoulliBandit
+from bandits.policy import UCBPolicy
+
+
+def test_queue_is_a_permutation_of_the_arms():
+    agent = SparseAgent(BernoulliBandit(1000), UCBPolicy(2), rng=0)
+    queue = [agent._next_untried() for _ in range(1000)]
+    assert sorted(queue) == list(range(1000))
+
+
+def test_queue_is_not_evenly_spaced():
+    agent = SparseAgent(BernoulliBandit(10**6), UCBPolicy(2), rng=0)
+    queue = np.array([agent._next_untried() for _ in range(100)])
+    steps = np.diff(queue) % agent.k
+    assert len(np.unique(steps)) > 90
+
+
+def test_reset_draws_a_new_queue():
+    agent = SparseAgent(BernoulliBandit(10**6), UCBPolicy(2), rng=0)
+    first = [agent._next_untried() for _ in range(10)]
+    agent.reset()
+    assert [agent._next_untried() for _ in range(10)] != first
@@ -0,0 +1,51 @@
+"""
+Reward tapes: common random numbers across agents and worker counts.
+"""
+import numpy as np
+
+from bandits.agent import Agent
+from bandits.bandit import GaussianBandit, PoissonBandit
+from bandits.environment import Environment
+from bandits.policy import GreedyPolicy, UCBPolicy
+from bandits.rng import as_rng
+from bandits.tape import RewardTape
+
+
+def test_file_tape_is_identical_for_any_worker_count(tmp_path):
+    # a single arm with value 0 pays exactly the tape's variates
+    bandit = GaussianBandit(1, mu=0, sigma=0, rng=0)
+    path = str(tmp_path / 'tape.npy')
+    tape = RewardTape(bandit, length=16, path=path, experiments=200)
+    env = Environment(bandit, [Agent(bandit, GreedyPolicy())], tape=tape)
+
+    scores = [env.run(10, 200, workers=w, seed=0)[0] for w in (1, 4)]
+    np.testing.assert_array_equal(scores[0], scores[1])
+
+    # every experiment replays its own slice of the file
+    expected = np.load(path)[:, 0, :10].mean(axis=0)
+    np.testing.assert_allclose(scores[0][:, 0], expected)
+
+
+def test_tape_has_a_cursor_per_agent():
+    bandit = GaussianBandit(5, rng=0)
+    agents = [Agent(bandit, UCBPolicy(2)), Agent(bandit, UCBPolicy(2)),
+              Agent(bandit, GreedyPolicy())]
+    env = Environment(bandit, agents, tape=RewardTape(bandit))
+    env.seed(0)
+    agents[0].policy.rng = as_rng(1)
+    agents[1].policy.rng = as_rng(1)
+    scores, _ = env.run(50, 2)
+
+    # with common random numbers and the same tie breaks, the two UCB agents
+    # play and earn exactly the same
+    np.testing.assert_array_equal(scores[:, 0], scores[:, 1])
+
+
+def test_poisson_tape_reward_matches_the_rate():
+    # exp(-rate) underflows at this rate, so a CDF search from zero fails
+    bandit = PoissonBandit(2, rates=[800, 3])
+    variates = (np.arange(2000) + 0.5) / 2000
+    for action, rate in enumerate([800, 3]):
+        rewards = [bandit.reward(action, v) for v in variates]
+        assert abs(np.mean(rewards) - rate) < 0.01 * rate + 0.05
+        assert abs(bandit.reward(action, 0.5) - rate) <= 1